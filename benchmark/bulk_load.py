@@ -0,0 +1,88 @@
+"""
+Before/after benchmark of the bulk loader of RacingPostUploader against a local database.
+
+The horse records of the cached raw data are repeated (with new race ids) up to the number of
+rows and written to a new table, once with the previous path (DataFrame.to_sql with its default
+insert) and once with upload_postgreSQL. On PostgreSQL the new path streams the rows with COPY,
+on the other dialects it falls back to executemany in chunks. A local PostgreSQL stand-in can be
+started with
+> docker run --rm -p 5432:5432 -e POSTGRES_HOST_AUTH_METHOD=trust postgres
+
+Run
+> python -m benchmark.bulk_load [rows] [database URL, default a SQLite file]
+"""
+from racing_post.racing_post_scraper import RacingPostFastResult
+from racing_post.racing_post_uploader import RacingPostUploader
+from sqlalchemy import create_engine, text
+import pandas as pd
+import sys
+import tempfile
+import time
+
+RAW_DATA_PATH = "./raw_data/"
+RAW_DATA_FILE = "20220221.json"
+
+def horse_records(rows : int, work_path : str) -> pd.DataFrame:
+    """
+    Horse records of the cached raw data, repeated up to the number of rows
+    """
+    scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+        work_path + "/", RAW_DATA_PATH, RAW_DATA_FILE)
+    scraper.restore_cache_result()
+    df_horse = scraper.normalize_race_record()[2].reset_index()
+    scraper.cleanup()
+
+    copies = []
+    for i in range(rows // len(df_horse) + 1):
+        copy = df_horse.copy()
+        copy["race_id"] = copy["race_id"].astype(str) + f"-{i}"
+        copies.append(copy)
+
+    return pd.concat(copies, ignore_index=True).head(rows).set_index(["race_id", "horse_rank", "horse_name"])
+
+def measure(engine, table_name : str, load) -> float:
+    """
+    Rows per second of a load into a new table
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+
+    start = time.monotonic()
+    rows = load(table_name)
+    seconds = time.monotonic() - start
+
+    with engine.begin() as connection:
+        assert connection.execute(text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar() == rows
+        connection.execute(text(f'DROP TABLE "{table_name}"'))
+
+    return rows / seconds
+
+def main(rows : int = 50000, url : str = None) -> None:
+    with tempfile.TemporaryDirectory() as work_path:
+        engine = create_engine(url if url else f"sqlite:///{work_path}/benchmark.sqlite")
+        uploader = RacingPostUploader(work_path + "/missing.yaml", engine=engine)
+
+        df = horse_records(rows, work_path)
+
+        def previous(table_name):
+            df.to_sql(table_name, engine)
+            return len(df)
+
+        def bulk(table_name):
+            uploader.upload_postgreSQL(df, table_name)
+            return len(df)
+
+        try:
+            before = measure(engine, "benchmark_to_sql", previous)
+            after = measure(engine, "benchmark_bulk_load", bulk)
+        finally:
+            uploader.close_connection()
+
+    method = "COPY" if uploader.insert_method(engine) else "executemany"
+
+    print(f"{engine.dialect.name}, {len(df)} rows, bulk load with {method} in chunks of {RacingPostUploader.BULK_CHUNK_SIZE}")
+    print(f"{'':<16}{'to_sql':>14}{'bulk load':>14}")
+    print(f"{'rows/second':<16}{before:>14.0f}{after:>14.0f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,179 @@
+"""
+Before/after benchmark of the slotted records against the previous dataclass records.
+
+The races of the sample raw data files are repeated for a year of dates and loaded with from_dict,
+converted back with to_dictionary and compared with ==. The time of each step and the memory held
+by the loaded records (traced with tracemalloc) are compared.
+
+Run
+> python -m benchmark.records [days]
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field, asdict
+from racing_post.racing_post_record import RacingPostRaceRecord
+from typing import Any
+import glob
+import json
+import sys
+import time
+import tracemalloc
+
+RAW_DATA_FILES = "./raw_data/*.json"
+
+@dataclass
+class DataclassPrizeRecord():
+    rank: list = field(default_factory=list)
+    prize: list = field(default_factory=list)
+
+    def __eq__(self, other : Any) -> bool:
+        return isinstance(other, self.__class__) and self.rank == other.rank and self.prize == other.prize
+
+@dataclass
+class DataclassHorseRecord():
+    horse_rank: str = None
+    horse_draw: str = None
+    horse_length: str = None
+    horse_no: str = None
+    horse_name: str = None
+    horse_country: str = None
+    horse_odd: str = None
+    horse_silk_url: str = None
+    horse_jockey: str = None
+    horse_trainer: str = None
+    horse_age: str = None
+    horse_st: str = None
+    horse_extra_weight: str = None
+    horse_head_gear: str = None
+    horse_lb: str = None
+    horse_or: str = None
+    horse_ts: str = None
+    horse_rpr: str = None
+    horse_mr: str = None
+    horse_comment: str = None
+    horse_silk: str = None
+    horse_silk_url_s3: str = None
+
+    @classmethod
+    def from_dict(cls, dictionary : dict) -> DataclassHorseRecord:
+        result = cls()
+
+        for k, v in dictionary.items():
+            setattr(result, k, v)
+
+        return result
+
+    def __eq__(self, other : Any) -> bool:
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+@dataclass
+class DataclassRaceRecord():
+    """
+    The race record before the slotted records
+    """
+    url: str = None
+    time: str = None
+    date: str = None
+    title: str = None
+    course: str = None
+    race_class: str = None
+    rating: str = None
+    distance: str = None
+    condition: str = None
+    prize: DataclassPrizeRecord = None
+    horse_rank: list = field(default_factory=list)
+    race_id: str = None
+    race_info_comment: str = None
+    race_extra_info: str = None
+
+    def __eq__(self, other : Any) -> bool:
+        if isinstance(other, self.__class__):
+            for key, value in self.__dict__.items():
+                if key not in other.__dict__ or value != other.__dict__[key]:
+                    return False
+
+            return True
+        else:
+            return False
+
+    @classmethod
+    def from_dict(cls, dictionary : dict) -> DataclassRaceRecord:
+        result = cls()
+        for k, v in dictionary.items():
+            if k == 'horse_rank' and type(v) == list:
+                v = [DataclassHorseRecord().from_dict(horse_dict) for horse_dict in v]
+
+            elif k == 'prize' and type(v) == dict:
+                record = DataclassPrizeRecord()
+                for subkey, subvalue in v.items():
+                    record.rank.append(subkey)
+                    record.prize.append(subvalue)
+
+                v = record
+
+            setattr(result, k, v)
+
+        return result
+
+    def to_dictionary(self) -> dict:
+        result_dict = asdict(self)
+        result_dict['prize'] = { k: v for k, v in zip(self.prize.rank, self.prize.prize)}
+        result_dict['horse_rank'] = [asdict(horse) for horse in self.horse_rank]
+
+        return result_dict
+
+def year_of_races(days : int) -> list:
+    """
+    Race dictionaries of the sample files repeated for the number of days
+    """
+    sample = []
+    for file_path in sorted(glob.glob(RAW_DATA_FILES)):
+        with open(file_path) as f:
+            sample.append(json.load(f))
+
+    return [race for day in range(days) for race in sample[day % len(sample)]]
+
+def measure(record_class : type, race_dicts : list) -> dict:
+    """
+    Seconds of each step and the memory held by the loaded records
+    """
+    start = time.perf_counter()
+    races = [record_class.from_dict(race) for race in race_dicts]
+    load_seconds = time.perf_counter() - start
+
+    # traced separately, tracemalloc slows down the allocations
+    del races
+    tracemalloc.start()
+    races = [record_class.from_dict(race) for race in race_dicts]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for race in races:
+        race.to_dictionary()
+    dump_seconds = time.perf_counter() - start
+
+    others = [record_class.from_dict(race) for race in race_dicts]
+    start = time.perf_counter()
+    assert races == others
+    compare_seconds = time.perf_counter() - start
+
+    return {
+        "from_dict_s": load_seconds,
+        "to_dictionary_s": dump_seconds,
+        "eq_s": compare_seconds,
+        "memory_mb": memory / 1024 / 1024,
+    }
+
+def main(days : int = 365) -> None:
+    race_dicts = year_of_races(days)
+
+    before = measure(DataclassRaceRecord, race_dicts)
+    after = measure(RacingPostRaceRecord, race_dicts)
+
+    print(f"{len(race_dicts)} races, {sum(len(race['horse_rank']) for race in race_dicts)} horses")
+    print(f"{'':<18}{'dataclass':>12}{'slots':>12}")
+    for key in ("from_dict_s", "to_dictionary_s", "eq_s", "memory_mb"):
+        print(f"{key:<18}{before[key]:>12.3f}{after[key]:>12.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 365)
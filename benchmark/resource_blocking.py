@@ -0,0 +1,154 @@
+"""
+Before/after benchmark of the resource blocking profile against a local fixture server.
+
+The fixture page looks like a detail page with a horse table, silk images, web fonts, a video
+and an "ad" script served from a second host name. Every asset is delayed a little to mimic
+the network. The page is loaded with and without blocking and the load time, the number of
+requests served and the JS heap of the page are compared.
+
+Run
+> python -m benchmark.resource_blocking [rounds]
+"""
+from scrapers.webscraper import WebScrapper, BLOCKED_URL_PATTERNS
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import statistics
+import sys
+import threading
+import time
+
+ASSET_DELAY = 0.05
+RUNNERS = 20
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serve the fixture page and its assets, counting the requests
+    """
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with FixtureHandler.lock:
+            FixtureHandler.requests_served += 1
+
+        path = self.path.split("?")[0]
+
+        if path == "/":
+            body, content_type = self.page().encode("utf-8"), "text/html; charset=utf-8"
+        elif path.endswith(".svg"):
+            body, content_type = self.silk(), "image/svg+xml"
+        elif path.endswith(".woff2"):
+            body, content_type = b"\0" * 40000, "font/woff2"
+        elif path.endswith(".mp4"):
+            body, content_type = b"\0" * 500000, "video/mp4"
+        elif path.endswith(".js"):
+            body, content_type = self.ad_script(), "application/javascript"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if path != "/":
+            time.sleep(ASSET_DELAY)
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def page(self):
+        port = self.server.server_address[1]
+        rows = "".join(f"""
+            <tr class="rp-horseTable__mainRow"><td class="rp-horseTable__horseCell">
+                <img class="rp-horseTable__silk" src="/svg/{i}.svg">
+                <a class="rp-horseTable__horse__name">Horse {i}</a>
+            </td></tr>""" for i in range(RUNNERS))
+
+        return f"""<html><head>
+            <style>@font-face {{ font-family: rp; src: url(/fonts/rp.woff2); }} body {{ font-family: rp; }}</style>
+            <script src="http://localhost:{port}/ads/overlay.js"></script>
+        </head><body>
+            <section class="rp-resultsWrapper__section">
+                <table class="rp-horseTable__table"><tbody>{rows}</tbody></table>
+                <video src="/media/replay.mp4" autoplay muted></video>
+            </section>
+        </body></html>"""
+
+    @staticmethod
+    def silk():
+        return (b'<svg xmlns="http://www.w3.org/2000/svg" width="40" height="40">'
+            + b"".join(b'<rect x="%d" y="0" width="1" height="40" fill="#%06x"/>' % (i, i * 4000) for i in range(40))
+            + b"</svg>")
+
+    @staticmethod
+    def ad_script():
+        # build a heavy overlay like an advertisement would
+        return b"""
+            window.adBuffer = [];
+            for (var i = 0; i < 200000; i++) { window.adBuffer.push({id: i, slot: 'slot-' + i}); }
+            document.addEventListener('DOMContentLoaded', function () {
+                var overlay = document.createElement('div');
+                overlay.innerHTML = '<button class="ab-close-button">Close</button>';
+                document.body.appendChild(overlay);
+            });
+        """
+
+    def log_message(self, format, *args):
+        pass
+
+def measure(url : str, block : bool, rounds : int) -> dict:
+    """
+    Load the fixture page a few times with a new driver and collect the metrics
+    """
+    driver = WebScrapper.create_driver(
+        blocked_resources=BLOCKED_URL_PATTERNS if block else None,
+        blocked_domains=["localhost"] if block else None)
+
+    load_times, requests_served, heap_sizes, silks = [], [], [], []
+
+    try:
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        driver.execute_cdp_cmd("Performance.enable", {})
+
+        for _ in range(rounds):
+            FixtureHandler.requests_served = 0
+
+            start = time.monotonic()
+            driver.get(url)
+            load_times.append(time.monotonic() - start)
+
+            requests_served.append(FixtureHandler.requests_served)
+
+            metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+            heap_sizes.append(next(m["value"] for m in metrics if m["name"] == "JSHeapUsedSize") / 1024 / 1024)
+
+            silks.append(len(driver.execute_script(
+                "return Array.from(document.querySelectorAll('img.rp-horseTable__silk')).filter(function (img) { return img.src; })")))
+    finally:
+        driver.quit()
+
+    return {
+        "load_seconds": statistics.median(load_times),
+        "requests": statistics.median(requests_served),
+        "js_heap_mb": statistics.median(heap_sizes),
+        "silk_urls": min(silks),
+    }
+
+def main(rounds : int = 5) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    try:
+        before = measure(url, False, rounds)
+        after = measure(url, True, rounds)
+    finally:
+        server.shutdown()
+
+    print(f"{'':<16}{'no blocking':>14}{'blocking':>14}")
+    for key in ("load_seconds", "requests", "js_heap_mb", "silk_urls"):
+        print(f"{key:<16}{before[key]:>14.2f}{after[key]:>14.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
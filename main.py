@@ -1,14 +1,22 @@
 from racing_post.racing_post_scraper import RacingPostFastResult
-import sys
+from racing_post.racing_post_backfill import RacingPostBackfill
+from racing_post.racing_post_record import Constant
+from scrapers.rate_limiter import RateLimiter
+from scrapers.webscraper import BLOCKED_DOMAINS
+import argparse
 from datetime import date, timedelta
 
-def main(url : str, out_path : str, out_file : str, image_path : str, force_capture : bool):
+def main(url : str, out_path : str, out_file : str, image_path : str, force_capture : bool, extraction_mode : str = Constant.EXTRACTION_MODE_SELENIUM, \
+    fetch_engine : str = Constant.FETCH_ENGINE_BROWSER, drivers : int = 1, max_per_host : int = None, \
+    rate_limiter : RateLimiter = None, poll_frequency : float = 0.1, page_load_strategy : str = "normal", \
+    block_resources : bool = False, blocked_domains : list = None, user_data_dir : str = None, image_workers : int = 8, \
+    parquet_path : str = None):
     """
     Main function of racing post scraper
     Parameters
     ----------
     url: str
-        the url, it can be the URL for today result (https://www.racingpost.com/fast-results/) 
+        the url, it can be the URL for today result (https://www.racingpost.com/fast-results/)
         or a specific date i.e. https://www.racingpost.com/results/2022-02-21/time-order/
     out_path: str
         the file path for the raw data file
@@ -18,24 +26,123 @@ def main(url : str, out_path : str, out_file : str, image_path : str, force_capt
         the path that you want to save the image
     force_capture: bool
         Should re-scrap races that has already existed in DB
+    extraction_mode: str
+        How the detail page is read, selenium (element by element), script (single execute_script)
+        or html (lxml over the page source)
+    fetch_engine: str
+        How the detail page is reached, browser (click in Chrome) or http (pooled HTTP session + lxml)
+    drivers: int
+        Number of headless drivers loading the detail pages concurrently
+    max_per_host: int
+        Maximum number of detail pages loaded from the same host at the same time
+    rate_limiter: RateLimiter
+        Rate limiter for the requests to each host
+    poll_frequency: float
+        Seconds between two checks when waiting for an element
+    page_load_strategy: str
+        Page load strategy of Chrome, normal or eager
+    block_resources: bool
+        Don't load images, fonts, media and ad/analytics domains in Chrome
+    blocked_domains: list
+        Ad/analytics domains to be blocked
+    user_data_dir: str
+        Chrome profile folder kept between runs
+    image_workers: int
+        Number of silks downloaded at the same time
+    parquet_path: str
+        Folder of the local Parquet copy of the tables
     """
 
     print(f"Start scrapping for {url}")
 
-    scraper = RacingPostFastResult(url, image_path, out_path, out_file, force_capture)
+    scraper = RacingPostFastResult(url, image_path, out_path, out_file, force_capture, extraction_mode=extraction_mode, fetch_engine=fetch_engine, \
+        driver_pool_size=drivers, max_per_host=max_per_host, rate_limiter=rate_limiter, \
+        poll_frequency=poll_frequency, page_load_strategy=page_load_strategy, block_resources=block_resources, \
+        blocked_domains=blocked_domains, user_data_dir=user_data_dir, image_workers=image_workers, parquet_path=parquet_path)
     scraper.process()
-    
+
+def backfill(from_date : date, to_date : date, out_path : str, image_path : str, force_capture : bool, \
+    concurrency : int = 1, upload_batch_size : int = 7, **scraper_settings):
+    """
+    Scrape every date from from_date to to_date in one process
+    Parameters
+    ----------
+    from_date: date
+        the first date
+    to_date: date
+        the last date (included)
+    out_path: str
+        the file path for the raw data files, one {yyyymmdd}.jsonl.gz per date
+    image_path: str
+        the path that you want to save the image
+    force_capture: bool
+        Should re-scrap races that has already existed in DB
+    concurrency: int
+        Number of dates scraped at the same time
+    upload_batch_size: int
+        Number of dates uploaded together
+    scraper_settings: dict
+        The other settings of main
+    """
+
+    RacingPostBackfill(from_date, to_date, image_path, out_path, force_capture, concurrency, upload_batch_size, \
+        **scraper_settings).process()
+
 if __name__ == "__main__":
-    args = sys.argv[1:]
-    
     yesterday = date.today() - timedelta(days=1)
 
-    url = args[0] if len(args) > 0 else f"https://www.racingpost.com/results/{yesterday.strftime('%Y-%m-%d')}/time-order/"
-    out_file = args[1] if len(args) > 1 else f"./raw_data/{yesterday.strftime('%Y%m%d')}.json"
-    image_path = args[2] if len(args) > 2 else "./images/"
-    force_capture =  args[3] == 'True' if len(args) > 3 else False
+    parser = argparse.ArgumentParser(description="Racing Post result scraper")
+    parser.add_argument("url", nargs="?", default=f"https://www.racingpost.com/results/{yesterday.strftime('%Y-%m-%d')}/time-order/")
+    parser.add_argument("out_file", nargs="?", default=f"./raw_data/{yesterday.strftime('%Y%m%d')}.jsonl.gz")
+    parser.add_argument("image_path", nargs="?", default="./images/")
+    parser.add_argument("force_capture", nargs="?", default="False")
+    parser.add_argument("--extraction-mode", default=Constant.EXTRACTION_MODE_SELENIUM, \
+        choices=[Constant.EXTRACTION_MODE_SELENIUM, Constant.EXTRACTION_MODE_SCRIPT, Constant.EXTRACTION_MODE_HTML])
+    parser.add_argument("--fetch-engine", default=Constant.FETCH_ENGINE_BROWSER, \
+        choices=[Constant.FETCH_ENGINE_BROWSER, Constant.FETCH_ENGINE_HTTP])
+    parser.add_argument("--drivers", type=int, default=1)
+    parser.add_argument("--max-per-host", type=int, default=None)
+    parser.add_argument("--rate", action="append", default=[], metavar="HOST=REQUESTS_PER_SECOND", \
+        help="Request rate for a host, e.g. racingpost.com=0.5, can be repeated")
+    parser.add_argument("--jitter", type=float, default=Constant.RATE_LIMIT_JITTER, \
+        help="Maximum random seconds added to every wait")
+    parser.add_argument("--poll-frequency", type=float, default=0.1, \
+        help="Seconds between two checks when waiting for an element")
+    parser.add_argument("--page-load-strategy", default="normal", choices=["normal", "eager"])
+    parser.add_argument("--block-resources", action="store_true", \
+        help="Don't load images, fonts, media and ad/analytics domains in Chrome")
+    parser.add_argument("--block-domain", action="append", default=[], \
+        help="Additional domain to be blocked with --block-resources, can be repeated")
+    parser.add_argument("--user-data-dir", default=None, \
+        help="Chrome profile folder, the cookie consent and the cache are kept between runs")
+    parser.add_argument("--image-workers", type=int, default=8, \
+        help="Number of silks downloaded at the same time")
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, default=None, metavar="YYYY-MM-DD", \
+        help="Backfill every date from this date, the url argument is ignored")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat, default=yesterday, metavar="YYYY-MM-DD", \
+        help="Last date of the backfill. Default: yesterday")
+    parser.add_argument("--concurrency", type=int, default=1, \
+        help="Number of dates scraped at the same time in the backfill, each with its own Chrome")
+    parser.add_argument("--upload-batch", type=int, default=7, \
+        help="Number of dates uploaded to S3 and RDS together in the backfill")
+    parser.add_argument("--parquet", default=None, metavar="FOLDER", \
+        help="Also write the tables as Parquet partitioned by race date in this folder")
+
+    args = parser.parse_args()
+
+    url = args.url
+    out_file = args.out_file
+    image_path = args.image_path
+    force_capture = args.force_capture == 'True'
+
+    rates = dict(Constant.RATE_LIMITS)
+    for rate in args.rate:
+        host, _, value = rate.partition("=")
+        rates[host] = float(value)
+
+    rate_limiter = RateLimiter(rates, jitter=args.jitter)
 
-    if not (url.startswith("http://") or url.startswith("https://")):
+    if not args.from_date and not (url.startswith("http://") or url.startswith("https://")):
         raise ValueError("URL should start with http:// or https://")
 
     out_file_paths = out_file.split('/')
@@ -43,4 +150,14 @@ if __name__ == "__main__":
     out_filename = out_file_paths[-1]
     out_file_path = out_file[:-len(out_filename)]
 
-    main(url, out_file_path, out_filename, image_path, force_capture)
\ No newline at end of file
+    if args.from_date:
+        backfill(args.from_date, args.to_date, out_file_path, image_path, force_capture, args.concurrency, args.upload_batch, \
+            extraction_mode=args.extraction_mode, fetch_engine=args.fetch_engine, driver_pool_size=args.drivers, \
+            max_per_host=args.max_per_host, rate_limiter=rate_limiter, poll_frequency=args.poll_frequency, \
+            page_load_strategy=args.page_load_strategy, block_resources=args.block_resources, \
+            blocked_domains=BLOCKED_DOMAINS + args.block_domain, user_data_dir=args.user_data_dir, \
+            image_workers=args.image_workers, parquet_path=args.parquet)
+    else:
+        main(url, out_file_path, out_filename, image_path, force_capture, args.extraction_mode, args.fetch_engine, \
+            args.drivers, args.max_per_host, rate_limiter, args.poll_frequency, args.page_load_strategy, \
+            args.block_resources, BLOCKED_DOMAINS + args.block_domain, args.user_data_dir, args.image_workers, args.parquet)
@@ -0,0 +1,261 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from racing_post.racing_post_record import Constant
+from racing_post.racing_post_scraper import RacingPostFastResult
+from racing_post.racing_post_uploader import RacingPostUploader
+from scrapers.rate_limiter import RateLimiter
+from scrapers.webscraper import WebScrapper, BLOCKED_URL_PATTERNS, BLOCKED_DOMAINS
+from selenium import webdriver
+from typing import Iterator, Optional
+import itertools
+import os
+import threading
+import time
+
+RESULT_URL = "https://www.racingpost.com/results/{date}/time-order/"
+
+class RacingPostBackfill():
+    """
+    Scrape the results of a date range in one process. The dates are scheduled on a few worker threads,
+    each worker keeps one Chrome for all of its dates, and the rate limiter and the uploader (DB engine,
+    S3 client) are shared by every date. One raw data file is written per date, the uploads are done
+    once for every batch of dates.
+    """
+    def __init__(self, from_date : date, to_date : date, image_path : str, out_path : str, force_capture : bool = False, \
+        concurrency : int = 1, upload_batch_size : int = 7, rate_limiter : RateLimiter = None, \
+        uploader : RacingPostUploader = None, user_data_dir : str = None, page_load_strategy : str = "normal", \
+        block_resources : bool = False, blocked_domains : list = None, **scraper_settings) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        from_date: date
+            First date to be scraped
+        to_date: date
+            Last date to be scraped (included)
+        image_path: str
+            The path that you want to save the images
+        out_path: str
+            The path of the raw data files, the files are named {yyyymmdd}.jsonl.gz
+        force_capture: bool
+            Capture the races that have already existed in the database
+        concurrency: int
+            Number of dates scraped at the same time, each with its own Chrome
+        upload_batch_size: int
+            Number of dates uploaded to S3 and RDS together
+        rate_limiter: RateLimiter
+            Rate limiter shared by all dates. Default: None, it means a rate limiter with Constant.RATE_LIMITS
+        uploader: RacingPostUploader
+            Uploader shared by all dates. Default: None, it means a new uploader
+        user_data_dir: str
+            Chrome profile folder, every worker uses its own sub folder
+        page_load_strategy: str
+            Page load strategy of Chrome
+        block_resources: bool
+            Don't load images, fonts, media and the ad/analytics domains
+        blocked_domains: list
+            Ad/analytics domains to be blocked with block_resources. Default: None, it means scrapers.webscraper.BLOCKED_DOMAINS
+        scraper_settings: dict
+            Other keyword arguments of RacingPostFastResult, e.g. extraction_mode
+        """
+        if from_date > to_date:
+            raise ValueError(f"{from_date} is after {to_date}")
+
+        if concurrency < 1 or upload_batch_size < 1:
+            raise ValueError("concurrency and upload_batch_size should be at least 1")
+
+        self.from_date = from_date
+        self.to_date = to_date
+        self.image_path = image_path
+        self.out_path = out_path
+        self.force_capture = force_capture
+        self.concurrency = concurrency
+        self.upload_batch_size = upload_batch_size
+
+        self.rate_limiter = rate_limiter if rate_limiter else \
+            RateLimiter(Constant.RATE_LIMITS, jitter=Constant.RATE_LIMIT_JITTER)
+        self.owns_uploader = uploader is None
+        self.uploader = uploader if uploader else RacingPostUploader()
+        self.user_data_dir = user_data_dir
+
+        self.driver_settings = {
+            "page_load_strategy": page_load_strategy,
+            "blocked_resources": BLOCKED_URL_PATTERNS if block_resources else None,
+            "blocked_domains": (blocked_domains if blocked_domains is not None else BLOCKED_DOMAINS) if block_resources else None,
+        }
+        self.scraper_settings = dict(scraper_settings, page_load_strategy=page_load_strategy, \
+            block_resources=block_resources, blocked_domains=blocked_domains)
+
+        self._local = threading.local()
+        self._drivers = []
+        self._worker_ids = itertools.count()
+        self._lock = threading.Lock()
+
+        self.scraped_dates = []
+        self.failed_dates = []
+        self.race_count = 0
+
+    @staticmethod
+    def date_range(from_date : date, to_date : date) -> Iterator[date]:
+        """
+        Dates from from_date to to_date, both included
+        """
+        for days in range((to_date - from_date).days + 1):
+            yield from_date + timedelta(days=days)
+
+    @staticmethod
+    def date_url(race_date : date) -> str:
+        """
+        URL of the results of a date
+        """
+        return RESULT_URL.format(date=race_date.strftime("%Y-%m-%d"))
+
+    @staticmethod
+    def date_file(race_date : date) -> str:
+        """
+        Raw data file name of a date
+        """
+        return f"{race_date.strftime('%Y%m%d')}.jsonl.gz"
+
+    def worker_driver(self) -> webdriver.Chrome:
+        """
+        The driver of the current worker thread, created for its first date and reused for the next ones
+        """
+        driver = getattr(self._local, "driver", None)
+
+        if driver is None:
+            with self._lock:
+                worker = next(self._worker_ids)
+
+            user_data_dir = os.path.join(self.user_data_dir, f"worker-{worker}") if self.user_data_dir else None
+            driver = WebScrapper.create_driver(**self.driver_settings, user_data_dir=user_data_dir)
+
+            with self._lock:
+                self._drivers.append(driver)
+
+            self._local.driver = driver
+
+        return driver
+
+    def create_scraper(self, race_date : date) -> RacingPostFastResult:
+        """
+        Create the scraper of a date with the shared driver, rate limiter and uploader
+        """
+        return RacingPostFastResult(self.date_url(race_date), self.image_path, self.out_path, self.date_file(race_date), \
+            self.force_capture, driver=self.worker_driver(), rate_limiter=self.rate_limiter, uploader=self.uploader, \
+            **self.scraper_settings)
+
+    def scrape_date(self, race_date : date) -> Optional[RacingPostFastResult]:
+        """
+        Scrape a date and save its raw data file
+
+        Returns
+        ----------
+        Optional[RacingPostFastResult]:
+            The scraper of the date or None if the date failed, a failed date doesn't stop the others
+        """
+        try:
+            scraper = self.create_scraper(race_date)
+            scraper.scrape()
+            scraper.save_raw_data()
+        except Exception as e:
+            print(f"Failed to scrape {race_date}: {e!r}")
+            self.discard_worker_driver()
+            return None
+
+        return scraper
+
+    def discard_worker_driver(self) -> None:
+        """
+        Quit the driver of the current worker after a failure, the next date starts with a new Chrome
+        """
+        driver = getattr(self._local, "driver", None)
+        self._local.driver = None
+
+        if driver is not None:
+            with self._lock:
+                self._drivers.remove(driver)
+
+            try:
+                driver.quit()
+            except Exception as e:
+                print(e)
+
+    def upload_batch(self, scrapers : list[RacingPostFastResult]) -> None:
+        """
+        Upload the images and raw data files of a batch of dates to S3, and their races to RDS 
+        (and the Parquet copy) at once
+        """
+        for scraper in scrapers:
+            scraper.upload_s3()
+
+        races = [race for scraper in scrapers for race in scraper.races]
+
+        if races:
+            scrapers[0].upload_rds(races)
+            scrapers[0].export_parquet(races)
+
+        for scraper in scrapers:
+            scraper.cleanup()
+
+    def process(self) -> None:
+        """
+        Scrape and upload every date of the range. This is the entry point if you want the whole process.
+        """
+        dates = list(self.date_range(self.from_date, self.to_date))
+        start = time.monotonic()
+
+        print(f"Backfilling {len(dates)} dates from {self.from_date} to {self.to_date} with {self.concurrency} workers")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="backfill") as executor:
+                for i in range(0, len(dates), self.upload_batch_size):
+                    batch = dates[i:i + self.upload_batch_size]
+                    scrapers = []
+
+                    for race_date, scraper in zip(batch, executor.map(self.scrape_date, batch)):
+                        if scraper:
+                            scrapers.append(scraper)
+                            self.scraped_dates.append(race_date)
+                            self.race_count += len(scraper.races)
+                        else:
+                            self.failed_dates.append(race_date)
+
+                    if scrapers:
+                        self.upload_batch(scrapers)
+        finally:
+            self.close()
+
+        self.print_summary(time.monotonic() - start)
+
+    def close(self) -> None:
+        """
+        Quit the drivers of the workers and close the shared connections
+        """
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(e)
+
+        if self.owns_uploader:
+            self.uploader.close_connection()
+
+    def print_summary(self, seconds : float) -> None:
+        """
+        Print backfill summary
+        """
+        print("========================")
+        print(f"{len(self.scraped_dates)} dates, {self.race_count} races scraped in {seconds:.0f}s")
+
+        if self.failed_dates:
+            print(f"{len(self.failed_dates)} dates failed: {', '.join(str(d) for d in self.failed_dates)}")
+
+        print("========================")
+        print(f"{self.rate_limiter.throttled_seconds():.1f}s spent waiting for rate limits")
+        print(self.rate_limiter.summary())
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from racing_post.racing_post_record import Constant
+from racing_post.racing_post_uploader import RacingPostUploader
+from typing import Any, Dict, Iterable, List, Tuple
+import os
+import sqlite3
+import threading
+
+class RacingPostDedup():
+    """
+    Find the races that are already in RDS. Only the URLs of the page being scraped
+    are looked up, with indexed "WHERE url IN (...)" queries, instead of reading whole tables.
+    Every answer is also kept in a local SQLite cache, which answers the lookups when RDS cannot
+    be reached (e.g. no config or no network).
+    """
+    def __init__(self, uploader : RacingPostUploader, is_testing : bool = False, cache_file : str = None) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        uploader: RacingPostUploader
+            Uploader providing the RDS engine
+        is_testing: bool
+            Look up the testing tables
+        cache_file: str
+            File path of the local cache. Default: None, it means no local cache
+        """
+        self.uploader = uploader
+        self.race_table = Constant.get_rds_tables_key(Constant.RDS_TABLE_RACE_INFO, is_testing)
+        self.cache_file = cache_file
+        self._lock = threading.RLock()
+        self._cache = None
+
+    @property
+    def cache(self) -> sqlite3.Connection:
+        """
+        Connection of the local cache, created on first use
+        """
+        with self._lock:
+            if self._cache is None and self.cache_file:
+                folder = os.path.dirname(self.cache_file)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+
+                self._cache = sqlite3.connect(self.cache_file, check_same_thread=False)
+                self._cache.execute("CREATE TABLE IF NOT EXISTS races (race_table TEXT, url TEXT, race_id TEXT, PRIMARY KEY (race_table, url))")
+                self._cache.commit()
+
+        return self._cache
+
+    def query(self, table_name : str, key_column : str, value_columns : List[str], keys : List[str]) -> List[Tuple]:
+        """
+        Select the rows of a RDS table whose key column is one of the keys
+
+        Parameters
+        ----------
+        table_name: str
+            Table's name in RDS
+        key_column: str
+            Indexed column to be matched
+        value_columns: List[str]
+            Columns to be returned after the key column
+        keys: List[str]
+            Values of the key column to be looked up
+
+        Returns
+        ----------
+        List[Tuple]:
+            Rows of (key, *values)
+        """
+        from sqlalchemy import column, select, table
+
+        rds_table = table(table_name, column(key_column), *[column(name) for name in value_columns])
+        statement = select(rds_table.c[key_column], *[rds_table.c[name] for name in value_columns]) \
+            .where(rds_table.c[key_column].in_(keys))
+
+        with self.uploader.engine.connect() as connection:
+            return [tuple(row) for row in connection.execute(statement)]
+
+    def lookup(self, cache_table : str, key_column : str, rds_table : str, value_columns : List[str], keys : Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up the keys in RDS, or in the local cache if RDS cannot be reached
+        """
+        from sqlalchemy.exc import OperationalError, ProgrammingError
+
+        keys = sorted({key for key in keys if key})
+        if not keys:
+            return {}
+
+        try:
+            rows = self.query(rds_table, key_column, value_columns, keys)
+        except (OperationalError, ProgrammingError, OSError) as e:
+            # RDS cannot be reached, no config file or the table doesn't exist yet, other errors are bugs
+            print(f"Cannot look up {rds_table} in RDS, use the local cache: {e!r}")
+            return self.lookup_cache(cache_table, key_column, rds_table, value_columns, keys)
+
+        result = {}
+        for key, *values in rows:
+            result.setdefault(key, values[0] if len(values) == 1 else tuple(values))
+
+        self.save_cache(cache_table, rds_table, result)
+
+        return result
+
+    def lookup_cache(self, cache_table : str, key_column : str, rds_table : str, value_columns : List[str], keys : List[str]) -> Dict[str, Any]:
+        """
+        Look up the keys in the local cache
+        """
+        if self.cache is None:
+            return {}
+
+        placeholders = ", ".join("?" * len(keys))
+
+        with self._lock:
+            rows = self.cache.execute(f"SELECT {key_column}, {', '.join(value_columns)} FROM {cache_table} \
+                WHERE race_table = ? AND {key_column} IN ({placeholders})", [rds_table, *keys]).fetchall()
+
+        return {key: values[0] if len(values) == 1 else tuple(values) for key, *values in rows}
+
+    def save_cache(self, cache_table : str, rds_table : str, result : Dict[str, Any]) -> None:
+        """
+        Keep the answers from RDS in the local cache
+        """
+        if self.cache is None or not result:
+            return
+
+        rows = [(rds_table, key, *(value if isinstance(value, tuple) else (value,))) for key, value in result.items()]
+        placeholders = ", ".join("?" * len(rows[0]))
+
+        with self._lock:
+            self.cache.executemany(f"INSERT OR REPLACE INTO {cache_table} VALUES ({placeholders})", rows)
+            self.cache.commit()
+
+    def find_races(self, urls : Iterable[str]) -> Dict[str, str]:
+        """
+        Find the races already in RDS
+
+        Parameters
+        ----------
+        urls: Iterable[str]
+            URLs of the detail pages
+
+        Returns
+        ----------
+        Dict[str, str]:
+            race_id of each URL found
+        """
+        return self.lookup("races", "url", self.race_table, ["race_id"], urls)
+
+    def remember(self, races : list) -> None:
+        """
+        Add uploaded races to the local cache
+
+        Parameters
+        ----------
+        races: list[RacingPostRaceRecord]
+            Races uploaded to RDS
+        """
+        self.save_cache("races", self.race_table, {race.url: race.race_id for race in races})
+
+    def close(self) -> None:
+        """
+        Close the local cache
+        """
+        with self._lock:
+            if self._cache is not None:
+                self._cache.close()
+                self._cache = None
@@ -0,0 +1,325 @@
+from __future__ import annotations
+import uuid
+from typing import Any
+from racing_post.racing_post_record import Constant, RacingPostPrizeRecord, RacingPostHorseRecord, RacingPostRaceRecord
+
+# Collect everything process_detail_page reads from the detail page in a single
+# execute_script call. The XPaths and class names are passed in from Constant so
+# the script walks exactly the same elements as the Selenium path, and the text of
+# an element follows WebElement.text (visible text, trimmed, nbsp as space).
+DETAIL_PAGE_SCRIPT = """
+var C = arguments[0];
+
+function one(xpath, context) {
+    return document.evaluate(xpath, context || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+
+function many(xpath, context) {
+    var snapshot = document.evaluate(xpath, context || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) {
+        nodes.push(snapshot.snapshotItem(i));
+    }
+    return nodes;
+}
+
+function text(element) {
+    if (!element) {
+        return null;
+    }
+    var value = element.innerText;
+    if (value === undefined || value === null) {
+        value = element.textContent || '';
+    }
+    return value.replace(/^[^\\S\\u00a0]+|[^\\S\\u00a0]+$/g, '').replace(/\\u00a0/g, ' ');
+}
+
+function attr(element, name) {
+    return element ? element.getAttribute(name) : null;
+}
+
+function className(element) {
+    return attr(element, C.ATTRIBUTE_CLASS) || '';
+}
+
+function horseCell(td) {
+    var cellDiv = one(C.XPATH_RESULT_HORSE_CELL_DIV, td);
+    var info = one(C.XPATH_RESULT_HORSE_INFO, cellDiv);
+    var name = one(C.XPATH_RESULT_HORSE_NAME, info);
+    var silk = one(C.XPATH_RESULT_HORSE_SILK, cellDiv);
+    var human = one(C.XPATH_RESULT_HORSE_HUMAN, info);
+
+    return {
+        no: text(one(C.XPATH_RESULT_HORSE_NO, info)),
+        name: text(name),
+        name_children: name ? many(C.XPATH_RESULT_HORSE_NAME_CHILDREN, name).map(text) : [],
+        country: text(one(C.XPATH_RESULT_HORSE_COUNTRY, info)),
+        odd: text(one(C.XPATH_RESULT_HORSE_ODD, info)),
+        silk_src: silk ? (silk.src || attr(silk, 'src')) : null,
+        humans: many(C.XPATH_RESULT_HORSE_HUMAN_WRAPPER, human).map(function (wrapper) {
+            return {
+                prefix: attr(wrapper, C.ATTRIBUTE_DATA_PREFIX),
+                name: text(one(C.XPATH_RESULT_HORSE_JOCKEY, wrapper))
+            };
+        })
+    };
+}
+
+function weightCell(td) {
+    return many(C.XPATH_RESULT_HORSE_WGT_SPAN, td).map(function (span) {
+        return {
+            'class': className(span),
+            selector: attr(span, C.ATTRIBUTE_DATA_TEST_SELECTOR),
+            text: text(span),
+            extra_weight: text(one(C.XPATH_RESULT_HORSE_EXTRA_WEIGHT, span))
+        };
+    });
+}
+
+function horseRow(row) {
+    var rowClass = className(row);
+    var result = {'class': rowClass};
+
+    if (rowClass.indexOf(C.XPATH_RESULT_HORSE_TABLE_MAIN_ROW) >= 0) {
+        var posDiv = one(C.XPATH_RESULT_HORSE_POS_DIV, row);
+
+        result.pos = text(one(C.XPATH_RESULT_HORSE_POS, posDiv));
+        result.draw = text(one(C.XPATH_RESULT_HORSE_DRAW, posDiv));
+        result.length = text(one(C.XPATH_RESULT_HORSE_LENGTH, posDiv));
+        result.tds = many(C.XPATH_RESULT_MAIN_ROW_TDS, row).map(function (td) {
+            var tdClass = className(td);
+            var cell = {
+                'class': tdClass,
+                data_ending: attr(td, C.ATTRIBUTE_DATA_ENDING),
+                text: text(td)
+            };
+
+            if (tdClass.indexOf(C.XPATH_RESULT_HORSE_TABLE_TD_HORSE_CELL) >= 0) {
+                cell.horse = horseCell(td);
+            } else if (tdClass.indexOf(C.XPATH_RESULT_HORSE_TABLE_TD_WGT_CELL) >= 0) {
+                cell.spans = weightCell(td);
+            }
+            return cell;
+        });
+    } else if (rowClass.indexOf(C.XPATH_RESULT_HORSE_TABLE_COMMENT_ROW) >= 0) {
+        result.comment = text(one(C.XPATH_RESULT_HORSE_COMMENT, row));
+    }
+    return result;
+}
+
+var raceInfo = one(C.XPATH_RESULT_RACE_INFO);
+var raceDetail = one(C.XPATH_RESULT_RACE_DETAIL, raceInfo);
+var raceDetailContainer = one(C.XPATH_RESULT_RACE_DETAIL_CONTAINER, raceDetail);
+var horseTable = one(C.XPATH_RESULT_HORSE_TABLE);
+
+return {
+    time: text(one(C.XPATH_RESULT_RACE_TIME, raceInfo)),
+    course: text(one(C.XPATH_RESULT_RACE_COURSE, raceInfo)),
+    date: text(one(C.XPATH_RESULT_RACE_DATE, raceInfo)),
+    title: text(one(C.XPATH_RESULT_RACE_TITLE, raceDetail)),
+    rating: text(one(C.XPATH_RESULT_RACE_RATING, raceDetailContainer)),
+    distance: text(one(C.XPATH_RESULT_RACE_DISTANCE, raceDetailContainer)),
+    race_class: text(one(C.XPATH_RESULT_RACE_CLASS, raceDetailContainer)),
+    condition: text(one(C.XPATH_RESULT_RACE_CONDITION, raceDetailContainer)),
+    prize: text(one(C.XPATH_RESULT_RACE_DETAIL_DIV, raceDetailContainer)),
+    rows: many(C.XPATH_RESULT_HORSE_ROW, horseTable).map(horseRow),
+    extra_info: many(C.XPATH_RESULT_RACE_INFO_OLS).map(function (li) {
+        return {
+            text: text(li),
+            svg_titles: many(C.XPATH_RESULT_OL_CHILDREN, li).filter(function (child) {
+                return child.tagName.toLowerCase() === C.ATTRIBUTE_TAG_SVG;
+            }).map(text)
+        };
+    }),
+    comment: text(one(C.XPATH_RESULT_RACE_INFO_COMMENT))
+};
+"""
+
+class RacingPostDetailExtractor():
+    """
+    Extract a detail page with one WebDriver round trip. The page is collected into a
+    JSON payload by DETAIL_PAGE_SCRIPT and turned into a RacingPostRaceRecord by
+    build_race_record, which applies the same rules as RacingPostFastResult.process_detail_page.
+
+    Payload format
+    --------------
+    time, course, date, title, rating, distance, race_class, condition, prize, comment: Optional[str]
+        Text of the header elements, None if the element doesn't exist
+    rows: list[dict]
+        One dictionary per row of the horse table with keys class, pos, draw, length, tds (main row)
+        or class, comment (comment row)
+    extra_info: list[dict]
+        One dictionary per race info li with keys text and svg_titles
+    """
+
+    @staticmethod
+    def script_arguments() -> dict:
+        """
+        XPaths, class names and attributes from Constant used by the script
+
+        Returns
+        --------------
+        dict
+            Name and value of every XPATH_ and ATTRIBUTE_ constant
+        """
+        return { k: v for k, v in vars(Constant).items() if k.startswith(("XPATH_", "ATTRIBUTE_")) }
+
+    @classmethod
+    def extract(cls, driver : Any, url : str) -> RacingPostRaceRecord:
+        """
+        Extract the detail page currently shown in the driver
+
+        Parameters
+        --------------
+        driver: WebDriver
+            Driver showing the detail page
+        url: str
+            The URL of the detail page
+
+        Returns
+        --------------
+        RacingPostRaceRecord:
+            Race record captured from the detail page
+        """
+        payload = driver.execute_script(DETAIL_PAGE_SCRIPT, cls.script_arguments())
+
+        return cls.build_race_record(url, payload)
+
+    @staticmethod
+    def build_race_record(url : str, payload : dict) -> RacingPostRaceRecord:
+        """
+        Build a race record from the payload of a detail page
+
+        Parameters
+        --------------
+        url: str
+            The URL of the detail page
+        payload: dict
+            Detail page payload, see the class documentation for the format
+
+        Returns
+        --------------
+        RacingPostRaceRecord:
+            Race record captured from the detail page
+        """
+        prize_list = payload["prize"].split() if payload.get("prize") is not None else []
+        prize_info = RacingPostPrizeRecord()
+
+        for i in range(int(len(prize_list)/2)):
+            prize_info.add_prize_rank(prize_list[2*i], prize_list[2*i+1])
+
+        race_info = RacingPostRaceRecord()
+        race_info.url = url
+        race_info.time = payload.get("time")
+        race_info.date = payload.get("date")
+        race_info.title = payload.get("title")
+        race_info.course = payload.get("course")
+        race_info.rating = payload.get("rating")
+        race_info.distance = payload.get("distance")
+        race_info.race_class = payload.get("race_class")
+        race_info.condition = payload.get("condition")
+        race_info.prize = prize_info
+
+        cache_record = None
+
+        for row in payload.get("rows", []):
+            row_class = row.get("class") or ""
+
+            if Constant.XPATH_RESULT_HORSE_TABLE_MAIN_ROW in row_class:
+                if cache_record:
+                    race_info.horse_rank.append(cache_record)
+
+                cache_record = RacingPostHorseRecord()
+
+                horse_pos, horse_draw = row.get("pos"), row.get("draw")
+
+                if horse_pos is not None and horse_draw is not None:
+                    horse_pos_text = horse_pos.replace(horse_draw, "").strip()
+                    horse_draw_text = horse_draw.replace("(", "").replace(")", "").strip()
+                else:
+                    horse_pos_text = horse_pos
+                    horse_draw_text = horse_draw
+
+                cache_record.horse_rank = horse_pos_text
+                cache_record.horse_draw = horse_draw_text
+                cache_record.horse_length = row.get("length")
+
+                for td in row.get("tds", []):
+                    td_class = td.get("class") or ""
+
+                    if Constant.XPATH_RESULT_HORSE_TABLE_TD_HORSE_CELL in td_class:
+                        horse = td.get("horse") or {}
+
+                        horse_name_text = horse.get("name")
+                        if horse_name_text is not None:
+                            for child_text in horse.get("name_children", []):
+                                horse_name_text = horse_name_text.replace(child_text or "", "")
+
+                        cache_record.horse_no = horse.get("no")
+                        cache_record.horse_name = horse_name_text
+                        cache_record.horse_country = horse.get("country")
+                        cache_record.horse_odd = horse.get("odd")
+
+                        # we only save the silk for the winner
+                        if horse_pos_text == "1":
+                            cache_record.horse_silk_url = horse.get("silk_src")
+
+                        for human in horse.get("humans", []):
+                            prefix = human.get("prefix") or ""
+                            if Constant.XPATH_RESULT_HORSE_JOCKEY_PREFIX in prefix:
+                                cache_record.horse_jockey = human.get("name")
+                            elif Constant.XPATH_RESULT_HORSE_TRAINER_PREFIX in prefix:
+                                cache_record.horse_trainer = human.get("name")
+
+                    elif Constant.XPATH_RESULT_HORSE_TABLE_TD_AGE_CELL in td_class:
+                        cache_record.horse_age = td.get("text")
+
+                    elif Constant.XPATH_RESULT_HORSE_TABLE_TD_WGT_CELL in td_class:
+                        for span in td.get("spans", []):
+                            span_class = span.get("class") or ""
+
+                            if Constant.XPATH_RESULT_HORSE_TABLE_ST in span_class:
+                                cache_record.horse_st = span.get("text")
+                            elif Constant.XPATH_RESULT_HORSE_TABLE_EXTRA_DATA in span_class:
+                                cache_record.horse_extra_weight = span.get("extra_weight")
+                            elif Constant.XPATH_RESULT_HORSE_TABLE_HEAD_GEAR in span_class:
+                                cache_record.horse_head_gear = span.get("text")
+                            elif span.get("selector") == Constant.ATTRIBUTE_DATA_HORSE_WEIGHT_LB:
+                                cache_record.horse_lb = span.get("text")
+
+                    else:
+                        data_ending = td.get("data_ending")
+
+                        if data_ending == Constant.ATTRIBUTE_DATA_ENDING_OR:
+                            cache_record.horse_or = td.get("text")
+                        elif data_ending == Constant.ATTRIBUTE_DATA_ENDING_TS:
+                            cache_record.horse_ts = td.get("text")
+                        elif data_ending == Constant.ATTRIBUTE_DATA_ENDING_RPR:
+                            cache_record.horse_rpr = td.get("text")
+                        elif data_ending == Constant.ATTRIBUTE_DATA_ENDING_MR:
+                            cache_record.horse_mr = td.get("text")
+
+            elif Constant.XPATH_RESULT_HORSE_TABLE_COMMENT_ROW in row_class and cache_record:
+                cache_record.horse_comment = row.get("comment")
+
+        if cache_record:
+            race_info.horse_rank.append(cache_record)
+
+        extra_infos = []
+
+        # skip svg title for extra info
+        for li in payload.get("extra_info", []):
+            li_text = li.get("text") or ""
+
+            for svg_title in li.get("svg_titles", []):
+                li_text = li_text.replace(svg_title or "", "")
+
+            extra_infos.append(li_text)
+
+        race_info.race_extra_info = "\n".join(extra_infos)
+        race_info.race_info_comment = payload.get("comment")
+
+        # assign the race with an UUID
+        race_info.race_id = uuid.uuid5(uuid.NAMESPACE_URL, url).hex
+
+        return race_info
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from racing_post.racing_post_record import RacingPostHorseRecord, RacingPostRaceRecord
+from typing import Iterable, Iterator, List, Tuple, TYPE_CHECKING
+import itertools
+import operator
+
+# pandas is imported on first use, it takes most of the start up time
+if TYPE_CHECKING:
+    import pandas as pd
+
+class RacingPostNormalizer():
+    """
+    Normalise races into 3 tables (race_info, prize_info and horse_record) in one pass. The values are read
+    from the record attributes as tuples, appended to a row buffer per table, and turned into columns
+    once when the frames are built, without a dictionary per race or per horse.
+    """
+
+    RACE_COLUMNS = tuple(name for name in RacingPostRaceRecord.FIELDS if name not in ("prize", "horse_rank"))
+    PRIZE_COLUMNS = ("race_id", "rank", "prize")
+    HORSE_COLUMNS = ("race_id",) + RacingPostHorseRecord.FIELDS
+
+    RACE_INDEX = ["race_id"]
+    PRIZE_INDEX = ["race_id", "rank"]
+    HORSE_INDEX = ["race_id", "horse_rank", "horse_name"]
+
+    _race_values = operator.attrgetter(*RACE_COLUMNS)
+
+    @classmethod
+    def normalize(cls, races : Iterable[RacingPostRaceRecord]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Normalise races into 3 tables
+
+        Parameters
+        ------------
+        races: Iterable[RacingPostRaceRecord]
+            Races to be normalised, e.g. a list or a generator
+
+        Returns
+        ------------
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+            race_info, prize_info and horse_record tables, indexed by their keys
+        """
+        race_rows = []
+        prize_rows = []
+        horse_rows = []
+
+        race_values = cls._race_values
+
+        for race in races:
+            race_rows.append(race_values(race))
+
+            race_id = race.race_id
+
+            if race.prize is not None:
+                prize_rows.extend(zip(itertools.repeat(race_id), race.prize.rank, race.prize.prize))
+
+            key = (race_id,)
+            horse_rows.extend(key + horse.to_tuple() for horse in race.horse_rank)
+
+        return cls.frame(cls.RACE_COLUMNS, race_rows, cls.RACE_INDEX), \
+            cls.frame(cls.PRIZE_COLUMNS, prize_rows, cls.PRIZE_INDEX), \
+            cls.frame(cls.HORSE_COLUMNS, horse_rows, cls.HORSE_INDEX)
+
+    @classmethod
+    def normalize_chunks(cls, races : Iterable[RacingPostRaceRecord], chunk_size : int = 1000) \
+        -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+        """
+        Normalise races a chunk at a time, only the races of one chunk are held in memory
+        when reading from a generator, e.g. RacingPostRawData.read()
+
+        Parameters
+        ------------
+        races: Iterable[RacingPostRaceRecord]
+            Races to be normalised
+        chunk_size: int
+            Number of races per chunk
+
+        Returns
+        ------------
+        Iterator[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+            race_info, prize_info and horse_record tables of each chunk
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size should be at least 1 but found {chunk_size}")
+
+        races = iter(races)
+
+        while True:
+            chunk = list(itertools.islice(races, chunk_size))
+            if not chunk:
+                return
+
+            yield cls.normalize(chunk)
+
+    @staticmethod
+    def frame(columns : Tuple[str, ...], rows : List[tuple], index : List[str]) -> pd.DataFrame:
+        """
+        DataFrame of a row buffer, the rows are transposed into columns at once
+        """
+        import pandas as pd
+
+        values = zip(*rows) if rows else itertools.repeat((), len(columns))
+
+        return pd.DataFrame({column: list(column_values) for column, column_values in zip(columns, values)}).set_index(index)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+from datetime import date
+from racing_post.racing_post_schema import RacingPostSchema
+from racing_post.racing_post_uploader import RacingPostUploader
+from typing import Any, List, Optional, TYPE_CHECKING
+import os
+
+# pandas and pyarrow are imported on first use, pyarrow is only needed for the export
+if TYPE_CHECKING:
+    import pandas as pd
+
+class RacingPostParquetStore():
+    """
+    Local Parquet copy of the normalised tables, {root}/{table}/race_date=YYYY-MM-DD/part-0.parquet.
+    The columns have the types of RacingPostSchema, and the repeated names (course, jockey, trainer) are
+    dictionary encoded. The tables are partitioned by race date, so reading a date range only opens the
+    files of these dates. race_info keeps its date in race_date, the partition column of every table.
+    """
+
+    PARTITION_COLUMN = "race_date"
+
+    # columns with a few distinct values repeated in every race, read back as categories
+    DICTIONARY_COLUMNS = ("course", "horse_jockey", "horse_trainer")
+
+    def __init__(self, root : str) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        root: str
+            Root folder of the tables, created on the first write
+        """
+        if not root.endswith("/"):
+            root += "/"
+
+        self.root = root
+        self.schema = RacingPostSchema()
+
+    def table_path(self, table_name : str) -> str:
+        """
+        Folder of a table
+        """
+        return self.root + table_name
+
+    def partitioning(self) -> Any:
+        """
+        Hive partitioning by race date, e.g. race_date=2022-02-21
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(pa.schema([(self.PARTITION_COLUMN, pa.date32())]), flavor="hive")
+
+    def arrow_schema(self, table : Any) -> Any:
+        """
+        Arrow schema of a table of RacingPostSchema, with the partition column instead of the race date
+        """
+        import pyarrow as pa
+        from sqlalchemy import BigInteger, Date, Float, Integer, Numeric, SmallInteger
+
+        fields = []
+
+        for column in table.columns:
+            if isinstance(column.type, Date):
+                continue
+            elif column.name in self.DICTIONARY_COLUMNS:
+                arrow_type = pa.dictionary(pa.int32(), pa.string())
+            elif isinstance(column.type, SmallInteger):
+                arrow_type = pa.int16()
+            elif isinstance(column.type, BigInteger):
+                arrow_type = pa.int64()
+            elif isinstance(column.type, Integer):
+                arrow_type = pa.int32()
+            elif isinstance(column.type, (Float, Numeric)):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+
+            fields.append(pa.field(column.name, arrow_type, nullable=not column.primary_key))
+
+        fields.append(pa.field(self.PARTITION_COLUMN, pa.date32()))
+
+        return pa.schema(fields)
+
+    def write(self, df_race : pd.DataFrame, df_prize : pd.DataFrame, df_horse : pd.DataFrame) -> None:
+        """
+        Write the normalised tables, e.g. from RacingPostFastResult.parse_race_record. The races replace
+        their previous rows, the other races of the same dates are kept
+
+        Parameters
+        ----------
+        df_race: pd.DataFrame
+            race_info table
+        df_prize: pd.DataFrame
+            prize_info table
+        df_horse: pd.DataFrame
+            horse_record table
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        frames = {
+            self.schema.race_info: df_race,
+            self.schema.prize_info: df_prize,
+            self.schema.horse_record: df_horse,
+        }
+
+        df_race = RacingPostUploader.conform_frame(self.schema.race_info, df_race).reset_index()
+        race_dates = dict(zip(df_race["race_id"], df_race["date"]))
+
+        for table, dataframe in frames.items():
+            frame = RacingPostUploader.conform_frame(table, dataframe).reset_index()
+            frame[self.PARTITION_COLUMN] = frame["race_id"].map(race_dates)
+
+            if frame.empty:
+                continue
+
+            # a partition is rewritten with the other races already stored for its date
+            dates = set(frame[self.PARTITION_COLUMN].dropna())
+            existing = self.read(table.name, min(dates), max(dates)) if dates else None
+
+            if existing is not None:
+                existing = existing[existing[self.PARTITION_COLUMN].isin(dates) & ~existing["race_id"].isin(set(frame["race_id"]))]
+                frame = pd.concat([existing.astype({column: object for column in self.DICTIONARY_COLUMNS if column in existing}), frame], \
+                    ignore_index=True)
+
+            schema = self.arrow_schema(table)
+            arrow_table = pa.Table.from_pandas(frame.reindex(columns=schema.names), schema=schema, preserve_index=False)
+
+            ds.write_dataset(arrow_table, self.table_path(table.name), format="parquet", partitioning=self.partitioning(), \
+                basename_template="part-{i}.parquet", existing_data_behavior="delete_matching")
+
+    def read(self, table_name : str, from_date : date = None, to_date : date = None, columns : List[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Read a table, only the partitions between from_date and to_date are scanned
+
+        Parameters
+        ----------
+        table_name: str
+            race_info, prize_info or horse_record
+        from_date: date
+            First race date (included). Default: None, it means from the first date
+        to_date: date
+            Last race date (included). Default: None, it means up to the last date
+        columns: List[str]
+            Columns to be read. Default: None, it means all columns
+
+        Returns
+        ----------
+        Optional[pd.DataFrame]:
+            Rows of the dates, or None if the table has never been written
+        """
+        import pyarrow.dataset as ds
+
+        path = self.table_path(table_name)
+        if not os.path.isdir(path):
+            return None
+
+        dataset = ds.dataset(path, format="parquet", partitioning=self.partitioning())
+
+        condition = None
+        if from_date:
+            condition = ds.field(self.PARTITION_COLUMN) >= from_date
+        if to_date:
+            upper = ds.field(self.PARTITION_COLUMN) <= to_date
+            condition = upper if condition is None else condition & upper
+
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
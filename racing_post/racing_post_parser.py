@@ -0,0 +1,242 @@
+from __future__ import annotations
+import re
+from urllib.parse import urljoin
+from lxml import etree, html as lxml_html
+from typing import Any, Optional
+from racing_post.racing_post_record import Constant, RacingPostRaceRecord
+from racing_post.racing_post_extractor import RacingPostDetailExtractor
+
+class RacingPostHtmlParser():
+    """
+    Parse a captured detail page (driver.page_source or a saved file) into a RacingPostRaceRecord
+    without a browser. The page is read with lxml using precompiled versions of the XPaths in
+    Constant into the same payload as DETAIL_PAGE_SCRIPT, so both share RacingPostDetailExtractor.build_race_record.
+    """
+
+    XPATHS = { k: etree.XPath(v) for k, v in vars(Constant).items() \
+        if k.startswith("XPATH_") and isinstance(v, str) and v.startswith(("/", ".")) }
+
+    XPATH_VISIBLE_TEXT = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+    WHITESPACE_PATTERN = re.compile(r"[^\S\xa0]+")
+
+    @classmethod
+    def one(cls, name : str, context : Any) -> Optional[etree._Element]:
+        """
+        Get the first element matching the XPath, see RacingPostFastResult.get_web_element
+
+        Parameters
+        ------------
+        name: str
+            Name of the XPath in Constant
+        context: etree._Element
+            Parent element, the search starts from the root if not specified
+
+        Returns
+        ------------
+        Optional[etree._Element]:
+            The first element found or None
+        """
+        elements = cls.XPATHS[name](context)
+        return elements[0] if elements else None
+
+    @classmethod
+    def many(cls, name : str, context : Any) -> list:
+        """
+        Get all elements matching the XPath, see RacingPostFastResult.get_web_elements
+
+        Parameters
+        ------------
+        name: str
+            Name of the XPath in Constant
+        context: etree._Element
+            Parent element
+
+        Returns
+        ------------
+        list[etree._Element]:
+            Elements found
+        """
+        return cls.XPATHS[name](context)
+
+    @classmethod
+    def text(cls, element : Optional[etree._Element]) -> Optional[str]:
+        """
+        Text of an element in the same way as WebElement.text, white spaces are collapsed and trimmed
+        and non-breaking spaces are kept as space
+
+        Parameters
+        ------------
+        element: etree._Element
+            The element
+
+        Returns
+        ------------
+        Optional[str]:
+            Text of the element or None if the element doesn't exist
+        """
+        if element is None:
+            return None
+
+        value = "".join(cls.XPATH_VISIBLE_TEXT(element))
+        value = cls.WHITESPACE_PATTERN.sub(" ", value).strip(" \t\n\r\f\v")
+
+        return value.replace("\xa0", " ")
+
+    @staticmethod
+    def attribute(element : Optional[etree._Element], name : str) -> Optional[str]:
+        """
+        Attribute of an element or None if the element doesn't exist
+        """
+        return element.get(name) if element is not None else None
+
+    @classmethod
+    def parse(cls, page_source : str, url : str) -> RacingPostRaceRecord:
+        """
+        Parse the detail page
+
+        Parameters
+        ------------
+        page_source: str
+            HTML of the detail page
+        url: str
+            The URL of the detail page
+
+        Returns
+        ------------
+        RacingPostRaceRecord:
+            Race record captured from the detail page
+        """
+        return RacingPostDetailExtractor.build_race_record(url, cls.build_payload(page_source, url))
+
+    @classmethod
+    def parse_file(cls, file_path : str, url : str) -> RacingPostRaceRecord:
+        """
+        Parse a saved detail page
+
+        Parameters
+        ------------
+        file_path: str
+            Path of the saved HTML file
+        url: str
+            The URL of the detail page
+
+        Returns
+        ------------
+        RacingPostRaceRecord:
+            Race record captured from the detail page
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls.parse(f.read(), url)
+
+    @classmethod
+    def build_payload(cls, page_source : str, url : str) -> dict:
+        """
+        Read the detail page into the payload format of RacingPostDetailExtractor
+
+        Parameters
+        ------------
+        page_source: str
+            HTML of the detail page
+        url: str
+            The URL of the detail page, used for resolving relative silk URLs
+
+        Returns
+        ------------
+        dict:
+            Detail page payload
+        """
+        root = lxml_html.document_fromstring(page_source)
+
+        # same as get_web_element, search from the root if the parent doesn't exist
+        def context(element):
+            return element if element is not None else root
+
+        race_info = cls.one("XPATH_RESULT_RACE_INFO", root)
+        race_detail = cls.one("XPATH_RESULT_RACE_DETAIL", context(race_info))
+        race_detail_container = cls.one("XPATH_RESULT_RACE_DETAIL_CONTAINER", context(race_detail))
+        horse_table = cls.one("XPATH_RESULT_HORSE_TABLE", root)
+
+        return {
+            "time": cls.text(cls.one("XPATH_RESULT_RACE_TIME", context(race_info))),
+            "course": cls.text(cls.one("XPATH_RESULT_RACE_COURSE", context(race_info))),
+            "date": cls.text(cls.one("XPATH_RESULT_RACE_DATE", context(race_info))),
+            "title": cls.text(cls.one("XPATH_RESULT_RACE_TITLE", context(race_detail))),
+            "rating": cls.text(cls.one("XPATH_RESULT_RACE_RATING", context(race_detail_container))),
+            "distance": cls.text(cls.one("XPATH_RESULT_RACE_DISTANCE", context(race_detail_container))),
+            "race_class": cls.text(cls.one("XPATH_RESULT_RACE_CLASS", context(race_detail_container))),
+            "condition": cls.text(cls.one("XPATH_RESULT_RACE_CONDITION", context(race_detail_container))),
+            "prize": cls.text(cls.one("XPATH_RESULT_RACE_DETAIL_DIV", context(race_detail_container))),
+            "rows": [cls.horse_row(row, url) for row in cls.many("XPATH_RESULT_HORSE_ROW", context(horse_table))],
+            "extra_info": [{
+                "text": cls.text(li),
+                "svg_titles": [cls.text(child) for child in cls.many("XPATH_RESULT_OL_CHILDREN", li) \
+                    if isinstance(child.tag, str) and child.tag.lower() == Constant.ATTRIBUTE_TAG_SVG],
+            } for li in cls.many("XPATH_RESULT_RACE_INFO_OLS", root)],
+            "comment": cls.text(cls.one("XPATH_RESULT_RACE_INFO_COMMENT", root)),
+        }
+
+    @classmethod
+    def horse_row(cls, row : etree._Element, url : str) -> dict:
+        """
+        Read a row of the horse table, the row is either a main row, a comment row or a separator
+        """
+        row_class = row.get(Constant.ATTRIBUTE_CLASS) or ""
+        result = {"class": row_class}
+
+        if Constant.XPATH_RESULT_HORSE_TABLE_MAIN_ROW in row_class:
+            pos_div = cls.one("XPATH_RESULT_HORSE_POS_DIV", row)
+
+            result["pos"] = cls.text(cls.one("XPATH_RESULT_HORSE_POS", pos_div)) if pos_div is not None else None
+            result["draw"] = cls.text(cls.one("XPATH_RESULT_HORSE_DRAW", pos_div)) if pos_div is not None else None
+            result["length"] = cls.text(cls.one("XPATH_RESULT_HORSE_LENGTH", pos_div)) if pos_div is not None else None
+            result["tds"] = [cls.horse_row_cell(td, url) for td in cls.many("XPATH_RESULT_MAIN_ROW_TDS", row)]
+
+        elif Constant.XPATH_RESULT_HORSE_TABLE_COMMENT_ROW in row_class:
+            result["comment"] = cls.text(cls.one("XPATH_RESULT_HORSE_COMMENT", row))
+
+        return result
+
+    @classmethod
+    def horse_row_cell(cls, td : etree._Element, url : str) -> dict:
+        """
+        Read a td of the main row of the horse table
+        """
+        td_class = td.get(Constant.ATTRIBUTE_CLASS) or ""
+        cell = {
+            "class": td_class,
+            "data_ending": td.get(Constant.ATTRIBUTE_DATA_ENDING),
+            "text": cls.text(td),
+        }
+
+        if Constant.XPATH_RESULT_HORSE_TABLE_TD_HORSE_CELL in td_class:
+            cell_div = cls.one("XPATH_RESULT_HORSE_CELL_DIV", td)
+            info = cls.one("XPATH_RESULT_HORSE_INFO", cell_div) if cell_div is not None else None
+            name = cls.one("XPATH_RESULT_HORSE_NAME", info) if info is not None else None
+            silk = cls.one("XPATH_RESULT_HORSE_SILK", cell_div) if cell_div is not None else None
+            human = cls.one("XPATH_RESULT_HORSE_HUMAN", info) if info is not None else None
+            silk_src = cls.attribute(silk, "src")
+
+            cell["horse"] = {
+                "no": cls.text(cls.one("XPATH_RESULT_HORSE_NO", info)) if info is not None else None,
+                "name": cls.text(name),
+                "name_children": [cls.text(child) for child in cls.many("XPATH_RESULT_HORSE_NAME_CHILDREN", name)] \
+                    if name is not None else [],
+                "country": cls.text(cls.one("XPATH_RESULT_HORSE_COUNTRY", info)) if info is not None else None,
+                "odd": cls.text(cls.one("XPATH_RESULT_HORSE_ODD", info)) if info is not None else None,
+                "silk_src": urljoin(url, silk_src) if silk_src else None,
+                "humans": [{
+                    "prefix": wrapper.get(Constant.ATTRIBUTE_DATA_PREFIX),
+                    "name": cls.text(cls.one("XPATH_RESULT_HORSE_JOCKEY", wrapper)),
+                } for wrapper in cls.many("XPATH_RESULT_HORSE_HUMAN_WRAPPER", human)] if human is not None else [],
+            }
+
+        elif Constant.XPATH_RESULT_HORSE_TABLE_TD_WGT_CELL in td_class:
+            cell["spans"] = [{
+                "class": span.get(Constant.ATTRIBUTE_CLASS) or "",
+                "selector": span.get(Constant.ATTRIBUTE_DATA_TEST_SELECTOR),
+                "text": cls.text(span),
+                "extra_weight": cls.text(cls.one("XPATH_RESULT_HORSE_EXTRA_WEIGHT", span)),
+            } for span in cls.many("XPATH_RESULT_HORSE_WGT_SPAN", td)]
+
+        return cell
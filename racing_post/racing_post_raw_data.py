@@ -0,0 +1,231 @@
+from __future__ import annotations
+from racing_post.racing_post_record import RacingPostRaceRecord
+from typing import IO, Iterable, Iterator
+import gzip
+import io
+import json
+import os
+
+class RacingPostRawData():
+    """
+    Raw data file of the races, written and read one race at a time. The format follows the file name:
+    *.jsonl is a race per line, *.json is the pretty JSON array of the earlier versions, and a .gz or .zst
+    suffix compresses the file with gzip or zstd (zstd needs the zstandard package). The reader recognises
+    a JSON array by its content, so a file can be read whatever its name.
+    """
+
+    # characters read at a time when streaming a JSON array
+    READ_SIZE = 65536
+
+    def __init__(self, file_path : str) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_path: str
+            File path of the raw data, e.g. ./raw_data/20220221.jsonl.gz
+        """
+        self.file_path = file_path
+
+    @property
+    def compression(self) -> str:
+        """
+        Compression of the file from its name, "gzip", "zstd" or None
+        """
+        if self.file_path.endswith(".gz"):
+            return "gzip"
+        elif self.file_path.endswith(".zst"):
+            return "zstd"
+
+        return None
+
+    @property
+    def is_jsonl(self) -> bool:
+        """
+        Whether races are written one per line, otherwise as a JSON array
+        """
+        name = self.file_path
+        for suffix in (".gz", ".zst"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+
+        return name.endswith(".jsonl")
+
+    def open(self, file_path : str, mode : str) -> IO[str]:
+        """
+        Open a file as text, compressed according to the file name of the raw data
+
+        Parameters
+        ----------
+        file_path: str
+            File to be opened, the raw data file or its temporary file
+        mode: str
+            "r" or "w"
+        """
+        raw = open(file_path, mode + "b")
+
+        try:
+            if self.compression == "gzip":
+                # no name and time in the header, the same races give the same file (and MD5 in S3)
+                stream = gzip.GzipFile(filename="", mode=mode + "b", fileobj=raw, mtime=0)
+            elif self.compression == "zstd":
+                import zstandard
+
+                if mode == "w":
+                    stream = zstandard.ZstdCompressor().stream_writer(raw)
+                else:
+                    stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            else:
+                return io.TextIOWrapper(raw, encoding="utf-8")
+        except BaseException:
+            raw.close()
+            raise
+
+        return _ClosingTextWrapper(stream, raw)
+
+    def write(self, races : Iterable[RacingPostRaceRecord]) -> int:
+        """
+        Write the races one at a time, the file is replaced at once when all the races are written,
+        a crash while writing leaves the previous file. The folder is created if it doesn't exist
+
+        Parameters
+        ----------
+        races: Iterable[RacingPostRaceRecord]
+            Races to be written, e.g. a generator
+
+        Returns
+        ----------
+        int:
+            Number of races written
+        """
+        folder = os.path.dirname(self.file_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        temp_file = self.file_path + ".tmp"
+        count = 0
+
+        with self.open(temp_file, "w") as f:
+            if not self.is_jsonl:
+                f.write("[")
+
+            for race in races:
+                if self.is_jsonl:
+                    f.write(json.dumps(race.to_dictionary(), ensure_ascii=False, separators=(",", ":")) + "\n")
+                else:
+                    f.write(("," if count else "") + "\n" + self.indent(json.dumps(race.to_dictionary(), indent=4)))
+
+                count += 1
+
+            if not self.is_jsonl:
+                f.write("\n]" if count else "]")
+
+        os.replace(temp_file, self.file_path)
+
+        return count
+
+    @staticmethod
+    def indent(text : str) -> str:
+        """
+        Indent an element of the JSON array like json.dump(..., indent=4)
+        """
+        return "\n".join("    " + line for line in text.split("\n"))
+
+    def read(self) -> Iterator[RacingPostRaceRecord]:
+        """
+        Read the races one at a time, in JSONL or as a JSON array
+
+        Returns
+        ----------
+        Iterator[RacingPostRaceRecord]:
+            Races in the order they were written, nothing if the file doesn't exist
+        """
+        try:
+            f = self.open(self.file_path, "r")
+        except FileNotFoundError:
+            return
+
+        with f:
+            buffer = f.read(self.READ_SIZE)
+            start = len(buffer) - len(buffer.lstrip())
+
+            if buffer[start:start + 1] == "[":
+                for race in self.read_array(f, buffer, start + 1):
+                    yield RacingPostRaceRecord.from_dict(race)
+            else:
+                for line in self.read_lines(f, buffer):
+                    if line.strip():
+                        yield RacingPostRaceRecord.from_dict(json.loads(line))
+
+    @staticmethod
+    def read_lines(f : IO[str], buffer : str) -> Iterator[str]:
+        """
+        Lines of a file whose beginning is already read into buffer
+        """
+        lines = buffer.split("\n")
+
+        # the last line may continue in the file
+        tail = lines.pop()
+        yield from lines
+
+        for line in f:
+            if tail:
+                line, tail = tail + line, ""
+
+            yield line
+
+        if tail:
+            yield tail
+
+    def read_array(self, f : IO[str], buffer : str, position : int) -> Iterator[dict]:
+        """
+        Elements of a JSON array decoded one at a time, only the element being decoded is kept in memory
+        """
+        decoder = json.JSONDecoder()
+        eof = False
+
+        while True:
+            # skip the separator before the next element
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if position == len(buffer):
+                if eof:
+                    raise ValueError(f"Unexpected end of {self.file_path}")
+
+                buffer, position = f.read(self.READ_SIZE), 0
+                eof = not buffer
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the element continues in the file
+                chunk = f.read(self.READ_SIZE)
+                if not chunk:
+                    raise
+
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+            yield element
+
+            buffer, position = buffer[end:], 0
+
+class _ClosingTextWrapper(io.TextIOWrapper):
+    """
+    Text stream over a compressed stream, the underlying file is closed with it
+    """
+    def __init__(self, stream : IO[bytes], raw : IO[bytes]) -> None:
+        super().__init__(stream, encoding="utf-8")
+        self._raw = raw
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._raw.close()
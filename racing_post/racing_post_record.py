@@ -0,0 +1,362 @@
+from __future__ import annotations
+from typing import Any, Optional, Tuple
+import operator
+
+class Constant():
+    XPATH_COOKIES = "//*[@id=\"truste-consent-button\"]"
+    XPATH_AD_BUTTON = "//button[contains(@class, 'ab-close-button')]"
+    XPATH_TIME_LIST = "//div[contains(@class, 'rp-timeView__list')]"
+    XPATH_TIME_ITEM = "./div[contains(@class, 'rp-timeView__listItem') and not(contains(@class, 'rp-emptyResult'))]"
+    XPATH_FULL_RESULT = ".//a[contains(text(), \"Full result\")]"
+    XPATH_RESULT_SECTION = "//section[contains(@class, 'rp-resultsWrapper__section')]"
+    XPATH_RESULT_RACE_INFO = "//div[contains(@class, 'rp-raceTimeCourseName')]"
+
+    XPATH_RESULT_RACE_TIME = "./h1/span[contains(@class, 'rp-raceTimeCourseName__time')]"
+    XPATH_RESULT_RACE_COURSE = "./h1/a[contains(@class, 'rp-raceTimeCourseName__name')]"
+    XPATH_RESULT_RACE_DATE = "./h1/span[contains(@class, 'rp-raceTimeCourseName__date')]"
+
+    XPATH_RESULT_RACE_DETAIL = "./div[contains(@class, 'rp-raceTimeCourseName__info')]"
+
+    XPATH_RESULT_RACE_TITLE = "./h2[contains(@class, 'rp-raceTimeCourseName__title')]"
+
+    XPATH_RESULT_RACE_DETAIL_CONTAINER = "./span[contains(@class, 'rp-raceTimeCourseName__info_container')]"
+    XPATH_RESULT_RACE_RATING = "./span[contains(@class, 'rp-raceTimeCourseName_ratingBandAndAgesAllowed')]"
+    XPATH_RESULT_RACE_DISTANCE = "./span[contains(@class, 'rp-raceTimeCourseName_distance')]"
+    XPATH_RESULT_RACE_CLASS = "./span[contains(@class, 'rp-raceTimeCourseName_class')]"
+    XPATH_RESULT_RACE_CONDITION = "./span[contains(@class, 'rp-raceTimeCourseName_condition')]"
+
+    XPATH_RESULT_RACE_DETAIL_DIV = "./div[@data-test-selector='text-prizeMoney']"
+
+    XPATH_RESULT_HORSE_TABLE = "//table[contains(@class, 'rp-horseTable__table')]"
+    XPATH_RESULT_HORSE_ROW = "./tbody/tr"
+
+    XPATH_RESULT_HORSE_POS_DIV = "./td/div[contains(@class, 'rp-horseTable__pos')]"
+
+    XPATH_RESULT_HORSE_POS = "./div/span[contains(@class, 'rp-horseTable__pos__number')]"
+    XPATH_RESULT_HORSE_DRAW = "./div/span/sup[contains(@class, 'rp-horseTable__pos__draw')]"
+
+    XPATH_RESULT_HORSE_LENGTH = "./div/span[contains(@class, 'rp-horseTable__pos__length')]"
+
+    XPATH_RESULT_HORSE_CELL_DIV = "./div[contains(@class, 'rp-horseTable__horseContainer')]"
+
+    XPATH_RESULT_HORSE_INFO = "./div[contains(@class, 'rp-horseTable__info')]"
+
+    XPATH_RESULT_HORSE_NO = "./span[contains(@class, 'rp-horseTable__saddleClothNo')]"
+    XPATH_RESULT_HORSE_NAME = ".//a[contains(@class, 'rp-horseTable__horse__name')]"
+
+    XPATH_RESULT_HORSE_COUNTRY = ".//span[contains(@class, 'rp-horseTable__horse__country')]"
+    XPATH_RESULT_HORSE_ODD = ".//span[contains(@class, 'rp-horseTable__horse__price')]"
+
+    XPATH_RESULT_HORSE_SILK = ".//img[contains(@class, 'rp-horseTable__silk')]"
+
+    XPATH_RESULT_HORSE_HUMAN = "./div[contains(@class, 'rp-horseTable__human')]"
+    XPATH_RESULT_HORSE_HUMAN_WRAPPER = "./span[contains(@class, 'rp-horseTable__human__wrapper')]"
+    
+    XPATH_RESULT_HORSE_JOCKEY = "./a[contains(@class, 'rp-horseTable__human__link')]"
+    XPATH_RESULT_HORSE_JOCKEY_PREFIX = "J:"
+    XPATH_RESULT_HORSE_TRAINER = "./a[contains(@class, 'rp-horseTable__human__link')]"
+    XPATH_RESULT_HORSE_TRAINER_PREFIX = "T:"
+
+    XPATH_RESULT_HORSE_WGT_SPAN = "./span"
+
+    XPATH_RESULT_HORSE_TABLE_MAIN_ROW = "rp-horseTable__mainRow"
+    XPATH_RESULT_HORSE_TABLE_COMMENT_ROW = "rp-horseTable__commentRow"
+    
+    XPATH_RESULT_MAIN_ROW_TDS = "./td"
+    XPATH_RESULT_HORSE_TABLE_TD_HORSE_CELL = "rp-horseTable__horseCell"
+    
+    XPATH_RESULT_HORSE_TABLE_TD_AGE_CELL = 'rp-horseTable__spanNarrow_age'
+    XPATH_RESULT_HORSE_TABLE_TD_WGT_CELL = 'rp-horseTable__wgt'
+
+    XPATH_RESULT_HORSE_TABLE_ST = 'rp-horseTable__st'
+    XPATH_RESULT_HORSE_TABLE_HEAD_GEAR = 'rp-horseTable__headGear'
+    XPATH_RESULT_HORSE_TABLE_EXTRA_DATA = 'rp-horseTable__extraData'
+
+    XPATH_RESULT_HORSE_EXTRA_WEIGHT = "./span"
+    XPATH_RESULT_HORSE_COMMENT = "./td"
+
+    XPATH_RESULT_RACE_INFO_OLS = "//div[contains(@class, 'rp-raceInfo')]/ul/li"
+    XPATH_RESULT_RACE_INFO_COMMENT = "//span[contains(@class, 'rp-raceInfo__comments')]"
+
+    XPATH_RESULT_OL_CHILDREN = "./*/*"
+    XPATH_RESULT_HORSE_NAME_CHILDREN = "./*"
+
+    ATTRIBUTE_CLASS = "class"
+    ATTRIBUTE_DATA_ENDING = "data-ending"
+    ATTRIBUTE_DATA_PREFIX = "data-prefix"
+    ATTRIBUTE_DATA_TEST_SELECTOR = 'data-test-selector'
+    ATTRIBUTE_DATA_ENDING_OR = "OR"
+    ATTRIBUTE_DATA_ENDING_TS = "TS"
+    ATTRIBUTE_DATA_ENDING_RPR = "RPR"
+    ATTRIBUTE_DATA_ENDING_MR = "MR"
+
+    ATTRIBUTE_TAG_SVG = "svg"
+
+    ATTRIBUTE_DATA_HORSE_WEIGHT_LB = 'horse-weight-lb'
+
+    EXTRACTION_MODE_SELENIUM = "selenium"
+    EXTRACTION_MODE_SCRIPT = "script"
+    EXTRACTION_MODE_HTML = "html"
+
+    FETCH_ENGINE_BROWSER = "browser"
+    FETCH_ENGINE_HTTP = "http"
+
+    # requests per second for each host
+    RATE_LIMITS = {
+        "racingpost.com": 0.2,
+        "rp-assets.com": 2.0,
+    }
+    RATE_LIMIT_JITTER = 2.0
+
+    RDS_TABLE_RACE_INFO = "race_info"
+    RDS_TABLE_PRIZE_INFO = "prize_info"
+    RDS_TABLE_HORSE_RECORD = "horse_record"
+    RDS_TABLE_SILK_REGISTRY = "silk_registry"
+
+    # local cache of the races and silks found in RDS, in the raw data folder
+    DEDUP_CACHE_FILE = ".dedup_cache.sqlite"
+
+    # local silk registry, in the image folder
+    SILK_REGISTRY_FILE = ".silk_registry.sqlite"
+
+    # silks are downloaded here, then moved into the content addressed store
+    IMAGE_INCOMING_FOLDER = ".incoming/"
+
+    RDS_TABLE_RACE_INFO_TEST = "race_info_test"
+    RDS_TABLE_PRIZE_INFO_TEST = "prize_info_test"
+    RDS_TABLE_HORSE_RECORD_TEST = "horse_record_test"
+    RDS_TABLE_SILK_REGISTRY_TEST = "silk_registry_test"
+
+    def get_rds_tables_key(table_name, is_testing=False) -> Optional[str]:
+        if table_name == Constant.RDS_TABLE_RACE_INFO:
+            return Constant.RDS_TABLE_RACE_INFO_TEST if is_testing else Constant.RDS_TABLE_RACE_INFO
+        elif table_name == Constant.RDS_TABLE_PRIZE_INFO:
+            return Constant.RDS_TABLE_PRIZE_INFO_TEST if is_testing else Constant.RDS_TABLE_PRIZE_INFO
+        elif table_name == Constant.RDS_TABLE_HORSE_RECORD:
+            return Constant.RDS_TABLE_HORSE_RECORD_TEST if is_testing else Constant.RDS_TABLE_HORSE_RECORD
+        elif table_name == Constant.RDS_TABLE_SILK_REGISTRY:
+            return Constant.RDS_TABLE_SILK_REGISTRY_TEST if is_testing else Constant.RDS_TABLE_SILK_REGISTRY
+
+        return None
+
+class SlottedRecord():
+    """
+    Base class of the records. The fields are the __slots__ of the subclass, in the order of its
+    constructor, so a record has no __dict__ and is converted to a dict or a tuple in one attrgetter call.
+    __eq__ is generated for every subclass, it compares the fields one by one without building a dict or a tuple.
+    """
+    __slots__ = ()
+
+    # names of the fields, set from __slots__ for every subclass
+    FIELDS : Tuple[str, ...] = ()
+
+    # records are mutable, they are compared by value but cannot be hashed
+    __hash__ = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(cls.__slots__)
+        cls._values = operator.attrgetter(*cls.FIELDS)
+
+        if "__eq__" not in cls.__dict__:
+            cls.__eq__ = cls._generate_eq(cls.FIELDS)
+
+    @staticmethod
+    def _generate_eq(fields : Tuple[str, ...]) -> Any:
+        """
+        __eq__ comparing the fields in order and stopping at the first difference, like dataclasses does
+        """
+        comparisons = " and ".join(f"self.{name} == other.{name}" for name in fields)
+        source = f"""def __eq__(self, other):
+    if isinstance(other, self.__class__):
+        return {comparisons}
+    else:
+        return False
+"""
+        namespace = {}
+        exec(source, namespace)
+
+        return namespace["__eq__"]
+
+    @classmethod
+    def from_dict(cls, dictionary : dict) -> Any:
+        """
+        Create this object from a dictionary
+
+        Parameters
+        --------------
+        dictionary: dict
+            Dictionary for storing all keys and values matching attributes of this class,
+            the other keys are ignored and the missing ones get their default
+
+        """
+        # positional arguments, matching the keys read from JSON to the keyword arguments is slower
+        return cls(*map(dictionary.get, cls.FIELDS))
+
+    @classmethod
+    def from_tuple(cls, values : tuple) -> Any:
+        """
+        Create this object from the values of its fields, in the order of FIELDS
+        """
+        return cls(*values)
+
+    def to_tuple(self) -> tuple:
+        """
+        Values of the fields, in the order of FIELDS
+        """
+        return self._values(self)
+
+    def to_dictionary(self) -> dict:
+        """
+        Convert this object to a dictionary
+
+        Returns
+        -----------
+        dict
+            Dictionary that storing all attributes of this class
+
+        """
+        return dict(zip(self.FIELDS, self._values(self)))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self.FIELDS, self._values(self)))
+        return f"{self.__class__.__name__}({fields})"
+
+class RacingPostPrizeRecord(SlottedRecord):
+    """
+    Record for storing prize records for a race
+    """
+    __slots__ = ("rank", "prize")
+
+    def __init__(self, rank : list = None, prize : list = None) -> None:
+        self.rank = rank if rank is not None else []
+        self.prize = prize if prize is not None else []
+
+    def add_prize_rank(self, this_rank : str, this_prize : str) -> None:
+        """
+        A helper function for setting rank and prize
+
+        Parameters
+        --------------
+        this_rank: str
+            Rank (1st, 2nd, ...)
+        prize: str
+            Prize for the rank, it usually start with currency symbol ($/£/¢...) 
+            and formatted with ","
+            E.g. ($1,000.21)
+
+        """
+        self.rank.append(this_rank)
+        self.prize.append(this_prize)
+
+class RacingPostHorseRecord(SlottedRecord):
+    """
+    Record for storing horse records for a race
+    """
+    __slots__ = ("horse_rank", "horse_draw", "horse_length",
+        "horse_no", "horse_name", "horse_country", "horse_odd", "horse_silk_url",
+        "horse_jockey", "horse_trainer",
+        "horse_age", "horse_st", "horse_extra_weight", "horse_head_gear", "horse_lb",
+        "horse_or", "horse_ts", "horse_rpr", "horse_mr",
+        "horse_comment", "horse_silk", "horse_silk_url_s3")
+
+    def __init__(self, horse_rank : str = None, horse_draw : str = None, horse_length : str = None,
+        horse_no : str = None, horse_name : str = None, horse_country : str = None, horse_odd : str = None, horse_silk_url : str = None,
+        horse_jockey : str = None, horse_trainer : str = None,
+        horse_age : str = None, horse_st : str = None, horse_extra_weight : str = None, horse_head_gear : str = None, horse_lb : str = None,
+        horse_or : str = None, horse_ts : str = None, horse_rpr : str = None, horse_mr : str = None,
+        horse_comment : str = None, horse_silk : str = None, horse_silk_url_s3 : str = None) -> None:
+        self.horse_rank = horse_rank
+        self.horse_draw = horse_draw
+        self.horse_length = horse_length
+
+        self.horse_no = horse_no
+        self.horse_name = horse_name
+        self.horse_country = horse_country
+        self.horse_odd = horse_odd
+        self.horse_silk_url = horse_silk_url
+
+        self.horse_jockey = horse_jockey
+        self.horse_trainer = horse_trainer
+
+        self.horse_age = horse_age
+        self.horse_st = horse_st
+        self.horse_extra_weight = horse_extra_weight
+        self.horse_head_gear = horse_head_gear
+        self.horse_lb = horse_lb
+
+        self.horse_or = horse_or
+        self.horse_ts = horse_ts
+        self.horse_rpr = horse_rpr
+        self.horse_mr = horse_mr
+
+        self.horse_comment = horse_comment
+        self.horse_silk = horse_silk
+        self.horse_silk_url_s3 = horse_silk_url_s3
+
+class RacingPostRaceRecord(SlottedRecord):
+    """
+    Record for storing race records
+    """
+    __slots__ = ("url", "time", "date", "title", "course", "race_class", "rating", "distance", "condition",
+        "prize", "horse_rank", "race_id", "race_info_comment", "race_extra_info")
+
+    def __init__(self, url : str = None, time : str = None, date : str = None, title : str = None, course : str = None,
+        race_class : str = None, rating : str = None, distance : str = None, condition : str = None,
+        prize : RacingPostPrizeRecord = None, horse_rank : list = None, race_id : str = None,
+        race_info_comment : str = None, race_extra_info : str = None) -> None:
+        self.url = url
+        self.time = time
+        self.date = date
+        self.title = title
+        self.course = course
+        self.race_class = race_class
+        self.rating = rating
+        self.distance = distance
+        self.condition = condition
+        self.prize = prize
+        self.horse_rank = horse_rank if horse_rank is not None else []
+        self.race_id = race_id
+        self.race_info_comment = race_info_comment
+        self.race_extra_info = race_extra_info
+
+    @classmethod
+    def from_dict(cls : type[RacingPostRaceRecord], dictionary : dict) -> RacingPostRaceRecord:
+        """
+        Create this object from a dictionary
+
+        Parameters
+        --------------
+        dictionary: dict
+            Dictionary for storing all keys and values matching attributes of this class
+
+        Returns
+        --------------
+        Self:
+            An instance with attributes filled with the input dictionary
+
+        """
+        result = super().from_dict(dictionary)
+
+        result.horse_rank = [RacingPostHorseRecord.from_dict(horse) if type(horse) == dict else horse for horse in result.horse_rank]
+
+        if type(result.prize) == dict:
+            result.prize = RacingPostPrizeRecord(list(result.prize.keys()), list(result.prize.values()))
+
+        return result
+
+    def to_dictionary(self) -> dict:
+        """
+        Convert this object to a dictionary, with the prize as {rank: prize} and the horses as dictionaries
+
+        Returns
+        -----------
+        dict
+            Dictionary that storing all attributes of this class
+
+        """
+        result_dict = super().to_dictionary()
+        result_dict['prize'] = dict(zip(self.prize.rank, self.prize.prize)) if self.prize is not None else None
+        result_dict['horse_rank'] = [horse.to_dictionary() for horse in self.horse_rank]
+
+        return result_dict
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from racing_post.racing_post_record import Constant
+from typing import Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sqlalchemy import MetaData, Table
+
+class RacingPostSchema():
+    """
+    Schema of the race tables in RDS. race_info is keyed by race_id, prize_info by (race_id, rank) and
+    horse_record by (race_id, horse_rank, horse_name), both referencing race_info. The URLs looked up when
+    scraping are indexed, and the numeric and date columns are typed instead of text. The display text of
+    the prizes, odds, distances and weights is kept next to its value parsed by RacingPostValueParser.
+    The tables are created and migrated by RacingPostUploader.migrate_schema.
+    """
+
+    # format of the race date on Racing Post, e.g. 21 Feb 2022
+    DATE_FORMAT = "%d %b %Y"
+
+    def __init__(self, is_testing : bool = False) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        is_testing: bool
+            Use the testing tables
+        """
+        from sqlalchemy import BigInteger, Column, Date, Float, ForeignKey, Integer, MetaData, SmallInteger, Table, Text
+
+        self.metadata = MetaData()
+
+        race_table = Constant.get_rds_tables_key(Constant.RDS_TABLE_RACE_INFO, is_testing)
+
+        self.race_info = Table(race_table, self.metadata,
+            Column("race_id", Text, primary_key=True),
+            Column("url", Text, index=True),
+            Column("time", Text),
+            Column("date", Date, index=True, info={"format": self.DATE_FORMAT}),
+            Column("title", Text),
+            Column("course", Text),
+            Column("race_class", Text),
+            Column("rating", Text),
+            Column("distance", Text),
+            Column("distance_yards", Integer),
+            Column("condition", Text),
+            Column("race_info_comment", Text),
+            Column("race_extra_info", Text),
+        )
+
+        self.prize_info = Table(Constant.get_rds_tables_key(Constant.RDS_TABLE_PRIZE_INFO, is_testing), self.metadata,
+            Column("race_id", Text, ForeignKey(f"{race_table}.race_id", ondelete="CASCADE"), primary_key=True),
+            Column("rank", Text, primary_key=True),
+            Column("prize", Text),
+            Column("prize_minor", BigInteger),
+            Column("prize_currency", Text),
+        )
+
+        self.horse_record = Table(Constant.get_rds_tables_key(Constant.RDS_TABLE_HORSE_RECORD, is_testing), self.metadata,
+            Column("race_id", Text, ForeignKey(f"{race_table}.race_id", ondelete="CASCADE"), primary_key=True),
+            Column("horse_rank", Text, primary_key=True),
+            Column("horse_name", Text, primary_key=True),
+            Column("horse_draw", SmallInteger),
+            Column("horse_length", Text),
+            Column("horse_no", SmallInteger),
+            Column("horse_country", Text),
+            Column("horse_odd", Text),
+            Column("horse_odd_decimal", Float),
+            Column("horse_implied_probability", Float),
+            Column("horse_silk_url", Text, index=True),
+            Column("horse_jockey", Text),
+            Column("horse_trainer", Text),
+            Column("horse_age", SmallInteger),
+            Column("horse_st", SmallInteger),
+            Column("horse_extra_weight", SmallInteger),
+            Column("horse_head_gear", Text),
+            Column("horse_lb", SmallInteger),
+            Column("horse_weight_lb", SmallInteger),
+            Column("horse_or", SmallInteger),
+            Column("horse_ts", SmallInteger),
+            Column("horse_rpr", SmallInteger),
+            Column("horse_mr", SmallInteger),
+            Column("horse_comment", Text),
+            Column("horse_silk", Text),
+            Column("horse_silk_url_s3", Text),
+        )
+
+    @property
+    def tables(self) -> Dict[str, Table]:
+        """
+        Tables by name, parents first
+        """
+        return {table.name: table for table in self.metadata.sorted_tables}
@@ -1,323 +1,120 @@
 from __future__ import annotations
-from dataclasses import dataclass
 from scrapers.webscraper import WebScrapper
-import pprint
-import random
+from scrapers.http_fetcher import HttpFetcher
+from scrapers.webdriver_pool import WebDriverPool
+from scrapers.rate_limiter import RateLimiter
+from scrapers.checkpoint import JsonlCheckpoint
+from scrapers.image_downloader import ImageDownloader
+from scrapers.content_store import ContentAddressedStore
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
 import time
 import uuid
-import json
 import os
-import shutil
-import pandas as pd
-from collections import defaultdict
+import requests
 from racing_post.racing_post_uploader import RacingPostUploader
-from dataclasses import dataclass, field, asdict
-from typing import Any, Tuple, Optional
-
-class Constant():
-    XPATH_COOKIES = "//*[@id=\"truste-consent-button\"]"
-    XPATH_AD_BUTTON = "//button[contains(@class, 'ab-close-button')]"
-    XPATH_TIME_LIST = "//div[contains(@class, 'rp-timeView__list')]"
-    XPATH_TIME_ITEM = "./div[contains(@class, 'rp-timeView__listItem') and not(contains(@class, 'rp-emptyResult'))]"
-    XPATH_FULL_RESULT = ".//a[contains(text(), \"Full result\")]"
-    XPATH_RESULT_SECTION = "//section[contains(@class, 'rp-resultsWrapper__section')]"
-    XPATH_RESULT_RACE_INFO = "//div[contains(@class, 'rp-raceTimeCourseName')]"
-
-    XPATH_RESULT_RACE_TIME = "./h1/span[contains(@class, 'rp-raceTimeCourseName__time')]"
-    XPATH_RESULT_RACE_COURSE = "./h1/a[contains(@class, 'rp-raceTimeCourseName__name')]"
-    XPATH_RESULT_RACE_DATE = "./h1/span[contains(@class, 'rp-raceTimeCourseName__date')]"
-
-    XPATH_RESULT_RACE_DETAIL = "./div[contains(@class, 'rp-raceTimeCourseName__info')]"
-
-    XPATH_RESULT_RACE_TITLE = "./h2[contains(@class, 'rp-raceTimeCourseName__title')]"
-
-    XPATH_RESULT_RACE_DETAIL_CONTAINER = "./span[contains(@class, 'rp-raceTimeCourseName__info_container')]"
-    XPATH_RESULT_RACE_RATING = "./span[contains(@class, 'rp-raceTimeCourseName_ratingBandAndAgesAllowed')]"
-    XPATH_RESULT_RACE_DISTANCE = "./span[contains(@class, 'rp-raceTimeCourseName_distance')]"
-    XPATH_RESULT_RACE_CLASS = "./span[contains(@class, 'rp-raceTimeCourseName_class')]"
-    XPATH_RESULT_RACE_CONDITION = "./span[contains(@class, 'rp-raceTimeCourseName_condition')]"
-
-    XPATH_RESULT_RACE_DETAIL_DIV = "./div[@data-test-selector='text-prizeMoney']"
-
-    XPATH_RESULT_HORSE_TABLE = "//table[contains(@class, 'rp-horseTable__table')]"
-    XPATH_RESULT_HORSE_ROW = "./tbody/tr"
-
-    XPATH_RESULT_HORSE_POS_DIV = "./td/div[contains(@class, 'rp-horseTable__pos')]"
-
-    XPATH_RESULT_HORSE_POS = "./div/span[contains(@class, 'rp-horseTable__pos__number')]"
-    XPATH_RESULT_HORSE_DRAW = "./div/span/sup[contains(@class, 'rp-horseTable__pos__draw')]"
-
-    XPATH_RESULT_HORSE_LENGTH = "./div/span[contains(@class, 'rp-horseTable__pos__length')]"
-
-    XPATH_RESULT_HORSE_CELL_DIV = "./div[contains(@class, 'rp-horseTable__horseContainer')]"
-
-    XPATH_RESULT_HORSE_INFO = "./div[contains(@class, 'rp-horseTable__info')]"
-
-    XPATH_RESULT_HORSE_NO = "./span[contains(@class, 'rp-horseTable__saddleClothNo')]"
-    XPATH_RESULT_HORSE_NAME = ".//a[contains(@class, 'rp-horseTable__horse__name')]"
-
-    XPATH_RESULT_HORSE_COUNTRY = ".//span[contains(@class, 'rp-horseTable__horse__country')]"
-    XPATH_RESULT_HORSE_ODD = ".//span[contains(@class, 'rp-horseTable__horse__price')]"
-
-    XPATH_RESULT_HORSE_SILK = ".//img[contains(@class, 'rp-horseTable__silk')]"
-
-    XPATH_RESULT_HORSE_HUMAN = "./div[contains(@class, 'rp-horseTable__human')]"
-    XPATH_RESULT_HORSE_HUMAN_WRAPPER = "./span[contains(@class, 'rp-horseTable__human__wrapper')]"
-    
-    XPATH_RESULT_HORSE_JOCKEY = "./a[contains(@class, 'rp-horseTable__human__link')]"
-    XPATH_RESULT_HORSE_JOCKEY_PREFIX = "J:"
-    XPATH_RESULT_HORSE_TRAINER = "./a[contains(@class, 'rp-horseTable__human__link')]"
-    XPATH_RESULT_HORSE_TRAINER_PREFIX = "T:"
-
-    XPATH_RESULT_HORSE_WGT_SPAN = "./span"
-
-    XPATH_RESULT_HORSE_TABLE_MAIN_ROW = "rp-horseTable__mainRow"
-    XPATH_RESULT_HORSE_TABLE_COMMENT_ROW = "rp-horseTable__commentRow"
-    
-    XPATH_RESULT_MAIN_ROW_TDS = "./td"
-    XPATH_RESULT_HORSE_TABLE_TD_HORSE_CELL = "rp-horseTable__horseCell"
-    
-    XPATH_RESULT_HORSE_TABLE_TD_AGE_CELL = 'rp-horseTable__spanNarrow_age'
-    XPATH_RESULT_HORSE_TABLE_TD_WGT_CELL = 'rp-horseTable__wgt'
-
-    XPATH_RESULT_HORSE_TABLE_ST = 'rp-horseTable__st'
-    XPATH_RESULT_HORSE_TABLE_HEAD_GEAR = 'rp-horseTable__headGear'
-    XPATH_RESULT_HORSE_TABLE_EXTRA_DATA = 'rp-horseTable__extraData'
-
-    XPATH_RESULT_HORSE_EXTRA_WEIGHT = "./span"
-    XPATH_RESULT_HORSE_COMMENT = "./td"
-
-    XPATH_RESULT_RACE_INFO_OLS = "//div[contains(@class, 'rp-raceInfo')]/ul/li"
-    XPATH_RESULT_RACE_INFO_COMMENT = "//span[contains(@class, 'rp-raceInfo__comments')]"
-
-    XPATH_RESULT_OL_CHILDREN = "./*/*"
-    XPATH_RESULT_HORSE_NAME_CHILDREN = "./*"
-
-    ATTRIBUTE_CLASS = "class"
-    ATTRIBUTE_DATA_ENDING = "data-ending"
-    ATTRIBUTE_DATA_PREFIX = "data-prefix"
-    ATTRIBUTE_DATA_TEST_SELECTOR = 'data-test-selector'
-    ATTRIBUTE_DATA_ENDING_OR = "OR"
-    ATTRIBUTE_DATA_ENDING_TS = "TS"
-    ATTRIBUTE_DATA_ENDING_RPR = "RPR"
-    ATTRIBUTE_DATA_ENDING_MR = "MR"
-
-    ATTRIBUTE_TAG_SVG = "svg"
-
-    ATTRIBUTE_DATA_HORSE_WEIGHT_LB = 'horse-weight-lb'
-
-    RDS_TABLE_RACE_INFO = "race_info"
-    RDS_TABLE_PRIZE_INFO = "prize_info"
-    RDS_TABLE_HORSE_RECORD = "horse_record"
-
-    RDS_TABLE_RACE_INFO_TEST = "race_info_test"
-    RDS_TABLE_PRIZE_INFO_TEST = "prize_info_test"
-    RDS_TABLE_HORSE_RECORD_TEST = "horse_record_test"
-
-    def get_rds_tables_key(table_name, is_testing=False) -> Optional[str]:
-        if table_name == Constant.RDS_TABLE_RACE_INFO:
-            return Constant.RDS_TABLE_RACE_INFO_TEST if is_testing else Constant.RDS_TABLE_RACE_INFO
-        elif table_name == Constant.RDS_TABLE_PRIZE_INFO:
-            return Constant.RDS_TABLE_PRIZE_INFO_TEST if is_testing else Constant.RDS_TABLE_PRIZE_INFO
-        elif table_name == Constant.RDS_TABLE_HORSE_RECORD:
-            return Constant.RDS_TABLE_HORSE_RECORD_TEST if is_testing else Constant.RDS_TABLE_HORSE_RECORD
-
-        return None
-
-@dataclass
-class RacingPostPrizeRecord():
-    """
-    Data Class for storing prize records for a race
-    """
-    rank: list = field(default_factory=list)
-    prize: list = field(default_factory=list)
-
-    def add_prize_rank(self, this_rank : str, this_prize : str) -> None:
-        """
-        A helper function for setting rank and prize
-
-        Parameters
-        --------------
-        this_rank: str
-            Rank (1st, 2nd, ...)
-        prize: str
-            Prize for the rank, it usually start with currency symbol ($/£/¢...) 
-            and formatted with ","
-            E.g. ($1,000.21)
-
-        """
-        self.rank.append(this_rank)
-        self.prize.append(this_prize)
-
-    def __eq__(self, other : Any) -> bool:
-        if isinstance(other, self.__class__):
-            if len(self.prize) != len(other.rank) or len(self.rank) != len(other.rank) \
-                or len(other.prize) != len(other.rank):
-                return False
-
-            for i in range(len(other.rank)):
-                if other.rank[i] != self.rank[i] or other.prize[i] != self.prize[i]:
-                    return False
-            
-            return True
-        else:
-            return False
-
-@dataclass
-class RacingPostHorseRecord():
-    """
-    Data Class for storing horse records for a race
-    """
-    horse_rank: str = None
-    horse_draw: str = None
-    horse_length: str = None
-
-    horse_no: str =None
-    horse_name: str = None
-    horse_country: str = None
-    horse_odd: str = None
-    horse_silk_url: str = None
-
-    horse_jockey: str = None
-    horse_trainer: str = None
-
-    horse_age: str = None
-    horse_st: str = None
-    horse_extra_weight: str = None
-    horse_head_gear: str = None
-    horse_lb: str = None
-
-    horse_or: str = None
-    horse_ts: str = None
-    horse_rpr: str = None
-    horse_mr: str = None
-
-    horse_comment: str = None
-    horse_silk: str = None
-    horse_silk_url_s3: str = None
-
-    @classmethod
-    def from_dict(cls: type[RacingPostHorseRecord], dictionary : dict) -> RacingPostHorseRecord:
-        """
-        Create this object from a dictionary
-
-        Parameters
-        --------------
-        dictionary: dict
-            Dictionary for storing all keys and values matching attributes of this data class
-
-        """
-        result = cls()
-
-        for k, v in dictionary.items():
-            setattr(result, k, v)
-
-        return result
-
-    def __eq__(self, other : Any) -> bool:
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        else:
-            return False
-
-@dataclass
-class RacingPostRaceRecord():
-    """
-    Data Class for storing race records
-    """
-
-    url: str = None
-    time: str = None
-    date: str = None
-    title: str = None
-    course: str = None
-    race_class: str = None
-    rating: str = None
-    distance: str = None
-    condition: str = None
-    prize: RacingPostPrizeRecord = None
-    horse_rank: list = field(default_factory=list)
-    race_id: str = None
-    race_info_comment: str = None
-    race_extra_info: str = None
-
-    def __eq__(self, other : Any) -> bool:
-        if isinstance(other, self.__class__):
-            for key, value in self.__dict__.items():
-                if key not in other.__dict__ or value != other.__dict__[key]:
-                    return False
-            
-            return True
-        else:
-            return False
-
-    @classmethod
-    def from_dict(cls : type[RacingPostRaceRecord], dictionary : dict) -> RacingPostRaceRecord:
-        """
-        Create this object from a dictionary
-
-        Parameters
-        --------------
-        dictionary: dict
-            Dictionary for storing all keys and values matching attributes of this data class
-
-        Returns
-        --------------
-        Self:
-            An instance with attributes filled with the input dictionary
-
-        """
-
-        result = cls()
-        for k, v in dictionary.items():
-            if k == 'horse_rank' and type(v) == list:
-                v = [RacingPostHorseRecord().from_dict(horse_dict) for horse_dict in v]
-
-            elif k == 'prize' and type(v) == dict:
-                record = RacingPostPrizeRecord()
-                for subkey, subvalue in v.items():
-                    record.add_prize_rank(subkey, subvalue)
-
-                v = record
-
-            setattr(result, k, v)
-
-        return result
-
-    def to_dictionary(self) -> dict:
-        """
-        Convert this object to a dictionary
-
-        Returns
-        -----------
-        dict
-            Dictionary that storing all attributes of this data class
-
-        """
-
-        result_dict = asdict(self)
-        result_dict['prize'] = { k: v for k, v in zip(self.prize.rank, self.prize.prize)}
-        result_dict['horse_rank'] = [asdict(horse) for horse in self.horse_rank]
-
-        return result_dict
+from racing_post.racing_post_dedup import RacingPostDedup
+from racing_post.racing_post_normalizer import RacingPostNormalizer
+from racing_post.racing_post_parquet import RacingPostParquetStore
+from racing_post.racing_post_raw_data import RacingPostRawData
+from racing_post.racing_post_schema import RacingPostSchema
+from racing_post.racing_post_values import RacingPostValueParser
+from racing_post.racing_post_silk_registry import SilkRegistry, SilkEntry
+from racing_post.racing_post_record import Constant, RacingPostPrizeRecord, RacingPostHorseRecord, RacingPostRaceRecord
+from racing_post.racing_post_extractor import RacingPostDetailExtractor
+from racing_post.racing_post_parser import RacingPostHtmlParser
+from typing import Any, Iterable, Tuple, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class RacingPostFastResult(WebScrapper):
     """
     This is a class (inherent of WebScrapper) for capturing fast result for RacingPost.com
     """
 
-    def __init__(self, url: str, image_path: str = None, out_path: str = None, out_file: str = None, force_capture: bool = False, is_testing : bool = False) -> None:
-        super().__init__(url, image_path, out_path, out_file, force_capture, is_testing)
-        self.uploader = RacingPostUploader()
-
-        self.df_race_info = self.uploader.get_postgreSQL(\
-            Constant.get_rds_tables_key(Constant.RDS_TABLE_RACE_INFO, self.is_testing))
-        self.df_prize_info = self.uploader.get_postgreSQL(\
-            Constant.get_rds_tables_key(Constant.RDS_TABLE_PRIZE_INFO, self.is_testing))
-        self.df_horse_record = self.uploader.get_postgreSQL(\
-            Constant.get_rds_tables_key(Constant.RDS_TABLE_HORSE_RECORD, self.is_testing))
+    def __init__(self, url: str, image_path: str = None, out_path: str = None, out_file: str = None, force_capture: bool = False, is_testing : bool = False, \
+        extraction_mode : str = Constant.EXTRACTION_MODE_SELENIUM, fetch_engine : str = Constant.FETCH_ENGINE_BROWSER, \
+        driver_pool_size : int = 1, max_per_host : int = None, rate_limiter : RateLimiter = None, \
+        poll_frequency : float = 0.1, page_load_strategy : str = "normal", block_resources : bool = False, \
+        blocked_domains : list = None, driver : webdriver.Chrome = None, user_data_dir : str = None, \
+        uploader : RacingPostUploader = None, image_workers : int = 8, parquet_path : str = None) -> None:
+        """
+        Constructor
 
-        # print(self.df_race_info)
+        Parameters
+        ----------
+        extraction_mode: str
+            How the detail page is read. Constant.EXTRACTION_MODE_SELENIUM looks up every element with WebDriver,
+            Constant.EXTRACTION_MODE_SCRIPT reads the whole page with a single execute_script,
+            Constant.EXTRACTION_MODE_HTML parses driver.page_source offline with lxml.
+        fetch_engine: str
+            How the detail page is reached. Constant.FETCH_ENGINE_BROWSER clicks the full result button in Chrome,
+            Constant.FETCH_ENGINE_HTTP gets the page with a pooled HTTP session and parses it with lxml,
+            Chrome is then only used for the listing page.
+        driver_pool_size: int
+            Number of headless drivers loading the detail pages concurrently with the browser engine.
+            Default: 1, the detail pages are loaded one by one by the driver of this scraper
+        max_per_host: int
+            Maximum number of detail pages loaded from the same host at the same time by the pool
+        rate_limiter: RateLimiter
+            Rate limiter for the detail pages and images, shared with other scrapers if needed.
+            Default: None, it means a rate limiter with Constant.RATE_LIMITS
+        block_resources: bool
+            Don't load images, fonts, media and the ad/analytics domains, the silk URLs are still read from the page
+        blocked_domains: list
+            Ad/analytics domains to be blocked with block_resources. Default: None, it means scrapers.webscraper.BLOCKED_DOMAINS
+        driver: webdriver.Chrome
+            A long-lived driver shared by several scrapers (e.g. one per date), it is left open after processing
+        user_data_dir: str
+            Chrome profile folder, the cookie consent and the cache survive between runs
+        uploader: RacingPostUploader
+            Uploader shared by several scrapers, its connections are left open by cleanup
+        image_workers: int
+            Number of silks downloaded at the same time, max_per_host also applies to the image host
+        parquet_path: str
+            Folder of the local Parquet copy of the tables, see RacingPostParquetStore. Default: None, it means no Parquet export
+            See WebScrapper for the other parameters
+        """
+        super().__init__(url, image_path, out_path, out_file, force_capture, is_testing, poll_frequency, page_load_strategy, \
+            block_resources, blocked_domains, driver, user_data_dir)
+
+        if extraction_mode not in (Constant.EXTRACTION_MODE_SELENIUM, Constant.EXTRACTION_MODE_SCRIPT, Constant.EXTRACTION_MODE_HTML):
+            raise ValueError(f"Unknown extraction mode {extraction_mode}")
+
+        if fetch_engine not in (Constant.FETCH_ENGINE_BROWSER, Constant.FETCH_ENGINE_HTTP):
+            raise ValueError(f"Unknown fetch engine {fetch_engine}")
+
+        self.extraction_mode = extraction_mode
+        self.fetch_engine = fetch_engine
+        self.rate_limiter = rate_limiter if rate_limiter else \
+            RateLimiter(Constant.RATE_LIMITS, jitter=Constant.RATE_LIMIT_JITTER)
+        self.http_fetcher = HttpFetcher(rate_limiter=self.rate_limiter) if fetch_engine == Constant.FETCH_ENGINE_HTTP else None
+        self.image_downloader = ImageDownloader(image_workers, max_per_host, rate_limiter=self.rate_limiter)
+        self.driver_pool = WebDriverPool(driver_pool_size, lambda: self.create_driver(**self.driver_settings), max_per_host, self.init_pool_driver) \
+            if driver_pool_size > 1 and not self.http_fetcher else None
+
+        # the uploader and the tables already in RDS are loaded on first use, 
+        # the driver is created on first use by WebScrapper
+        # every race is appended to the checkpoint as soon as it is captured, 
+        # a rerun after a crash only captures the missing races
+        self.checkpoint = JsonlCheckpoint(self.out_path + self.out_file + ".checkpoint.jsonl")
+
+        self.owns_uploader = uploader is None
+        self.uploader = uploader if uploader else RacingPostUploader()
+
+        # the races and silks already stored are looked up by URL, the local cache answers if RDS is down
+        self.dedup = RacingPostDedup(self.uploader, self.is_testing, self.out_path + Constant.DEDUP_CACHE_FILE)
+        self.silk_registry = SilkRegistry(self.uploader, self.is_testing, self.image_path + Constant.SILK_REGISTRY_FILE)
+
+        # silks are stored once per content, as {image_path}/{hash prefix}/{hash}.svg
+        self.image_store = ContentAddressedStore(self.image_path)
+
+        # races captured again with force_capture, their previous records are replaced in RDS when uploading
+        self.replaced_race_ids = set()
+
+        self.parquet_store = RacingPostParquetStore(parquet_path) if parquet_path else None
 
     def process(self) -> None:
         """
@@ -329,16 +126,38 @@ class RacingPostFastResult(WebScrapper):
         5. Close all the window
         6. Download images (Silk)
         7. Upload raw data (JSON) and images to AWS S3, and in table format in AWS RDS
+        8. Write the tables to the local Parquet copy (if parquet_path is set)
 
         This is the entry point if you want the whole process.
         """
 
+        self.scrape()
+
+        # TODO: disable if exceeds S3 free tier limit
+        self.upload_s3()
+        self.upload_rds()
+        self.export_parquet()
+
+        
+        self.cleanup()
+        self.print_summary()
+
+    def scrape(self) -> None:
+        """
+        Capture the races and download the images without uploading anything (steps 1 to 6 of process)
+        """
+
         self.races = None
 
         self.load_url()
         self.accept_cookies()
 
-        time.sleep(10)
+        # the advertisement shows up a few seconds after loading the page, 
+        # it isn't loaded at all if the ad domains are blocked
+        if not self.driver_settings["blocked_domains"]:
+            until = self.get_EC_element_clickable(xpath=Constant.XPATH_AD_BUTTON)
+            self.wait_until(until)
+
         self.skip_ads()
 
         self.process_main_page()
@@ -351,30 +170,20 @@ class RacingPostFastResult(WebScrapper):
         # pprint.pprint(self.races)
         # print(f"============================")
 
-        # TODO: disable if exceeds S3 free tier limit
-        self.upload_s3()
-        self.upload_rds()
-
-        
-        self.cleanup()
-        self.print_summary()
-
     def restore_cache_result(self) -> None:
         """
-        Restore from json file if the raw data is available
+        Restore from the raw data file if it is available, in JSONL or the earlier JSON format
         """
 
-        try:
-            with open(self.out_path+self.out_file, "r") as f:
-                race_list = json.load(f)
-            
-            self.races = [RacingPostRaceRecord.from_dict(race) for race in race_list]
-        except FileNotFoundError as e:
-            pass
+        races = list(RacingPostRawData(self.out_path + self.out_file).read())
+
+        if races:
+            self.races = races
 
     def load_url(self, wait_seconds : int = 10) -> None:
         """
-        Load URL until the accept cookies button clickable
+        Load URL until the accept cookies button clickable, or the race list is shown 
+        if the cookies have been accepted in this browser session or profile before
 
         Parameters 
         ==============
@@ -384,9 +193,19 @@ class RacingPostFastResult(WebScrapper):
         """
         xpath_accept_cookies = Constant.XPATH_COOKIES
 
-        until = self.get_EC_element_clickable(xpath=xpath_accept_cookies)
+        until = EC.any_of(self.get_EC_element_clickable(xpath=xpath_accept_cookies), \
+            self.get_EC_element_presence(xpath=Constant.XPATH_TIME_LIST))
         super().load_url(wait_seconds, until)
 
+    def stop_scraping(self) -> None:
+        """
+        Close the web driver and the drivers in the pool
+        """
+        if self.driver_pool:
+            self.driver_pool.quit()
+
+        super().stop_scraping()
+
     def skip_ads(self) -> None:
         """
         Ask Chrome to open the url and wait the accept cookies button appear
@@ -398,19 +217,26 @@ class RacingPostFastResult(WebScrapper):
         """
         Accept cookies
         """
-        # accept cookies
-        self.click_button(xpath=Constant.XPATH_COOKIES)
-        print("Accept cookies")
-        
-        time.sleep(2)
+        # accept cookies, the button doesn't appear again in a reused browser session or profile
+        if self.get_web_elements(xpath=Constant.XPATH_COOKIES):
+            self.click_button(xpath=Constant.XPATH_COOKIES)
+            print("Accept cookies")
+            
+            until = self.get_EC_element_invisible(xpath=Constant.XPATH_COOKIES)
+            self.wait_until(until, 2)
+        else:
+            print("Cookies already accepted")
+
+        # detail pages fetched over HTTP share the consent of the browser session
+        if self.http_fetcher:
+            self.http_fetcher.copy_browser_session(self.driver)
 
     def process_main_page(self) -> None:
         """
         Process the main page to get a list of detail page, and go into every valid detail page 
         """
 
-        until = self.get_EC_element_presence(xpath=Constant.XPATH_TIME_LIST)
-        self.wait_until(until)
+        self.wait_for_xpath(Constant.XPATH_TIME_LIST)
 
         self.move_to_element(xpath=Constant.XPATH_TIME_LIST)
 
@@ -418,61 +244,173 @@ class RacingPostFastResult(WebScrapper):
         timeView_list = self.get_web_element(xpath=Constant.XPATH_TIME_LIST)
         elements = self.get_web_elements(parent=timeView_list, xpath=Constant.XPATH_TIME_ITEM)
 
-        races = []
-
-        # print(df_race_info)
+        races = self.restore_checkpoint()
+        pool_urls = []
 
+        # read the URLs of the page first, so the races already stored are looked up in one query
+        element_urls = []
         if elements:
             print(f"{len(elements)} races found")
             elements.reverse()
 
-            # for each result, click the full result button to go to detail view            
             for element in elements:
                 full_result_button = self.get_web_element(parent=element, xpath=Constant.XPATH_FULL_RESULT)
                 url = full_result_button.get_attribute("href") if full_result_button else None
+                element_urls.append((element, url))
+
+        existing_races = self.dedup.find_races([url for _, url in element_urls] + [race.url for race in races])
 
-                if not full_result_button or not url:
-                    # imcompleted result, skip this record
+        # the checkpoint of a run which stopped after uploading to RDS may have races already stored,
+        # they are only uploaded again (replacing their records) with force capture
+        if self.force_capture:
+            self.replaced_race_ids.update(existing_races[race.url] for race in races if race.url in existing_races)
+        else:
+            stored = [race for race in races if race.url in existing_races]
+            if stored:
+                print(f"{len(stored)} races of the checkpoint are already stored")
+                races = [race for race in races if race.url not in existing_races]
+
+        checkpoint_urls = {race.url for race in races}
+
+        # for each result, click the full result button to go to detail view            
+        for element, url in element_urls:
+            if not url:
+                # imcompleted result, skip this record
+                continue
+            
+            if url in existing_races:
+                # previous records are removed in one go by upload_rds
+                if self.force_capture:
+                    self.replaced_race_ids.add(existing_races[url])
+            
+                else:
+                    print(f"This race {url} is already downloaded")
                     continue
-                
-                if self.df_race_info is not None and self.df_race_info.shape[0] > 0:
-                    df_same_url = self.df_race_info[self.df_race_info["url"] == url]
-
-                    if df_same_url.shape[0] > 0:
-                        # remove previous records from pd.Dataframe
-                        if self.force_capture:
-                            # print(df_same_url)
-                            race_id = df_same_url["race_id"].iloc[0]
-
-                            self.df_race_info = self.df_race_info[self.df_race_info["url"] != url]
-                            self.df_prize_info = self.df_prize_info[self.df_prize_info["race_id"] != race_id]
-                            self.df_horse_record = self.df_horse_record[self.df_horse_record["race_id"] != race_id]
-                    
-                        else:
-                            print(f"This race {url} is already downloaded")
-                            continue
+
+            if url in checkpoint_urls:
+                print(f"This race {url} is restored from the checkpoint")
+                continue
+
+            # the pool loads the detail pages after all URLs are collected
+            if self.driver_pool:
+                pool_urls.append(url)
+                continue
+
+            if self.http_fetcher:
+                # the fetcher waits for the turn of the host and reports the response
+                race_info_dict = self.fetch_detail_page(url)
+                if not race_info_dict:
+                    continue
+
+                self.checkpoint.append(race_info_dict.to_dictionary())
+                races.append(race_info_dict)
+            else:
+                # wait for the turn of the host instead of sleeping for a fixed time
+                self.rate_limiter.wait(url)
 
                 success, _ = self.click_button(parent=element, xpath=Constant.XPATH_FULL_RESULT)
                 if not success: 
                     continue
 
+                self.command_counter.reset()
+                start = time.monotonic()
+
                 race_info_dict = self.process_detail_page(url)
+                self.checkpoint.append(race_info_dict.to_dictionary())
                 races.append(race_info_dict)
 
+                self.rate_limiter.report(url, elapsed=time.monotonic() - start)
+
+                print(f"{self.command_counter.total} WebDriver commands sent for {url}")
+
                 # close and move to the window of the main page
                 self.close_current_window()
                 self.switch_to_new_window()
 
-                # randomly sleep to avoid being suspicious 
-                sleep_second = random.randint(5, 10)
-                time.sleep(sleep_second)
+            #TODO: TESTING
+            # if len(races) == 1:
+            #     break
 
-                #TODO: TESTING
-                # if len(races) == 1:
-                #     break
+        if pool_urls:
+            print(f"Processing {len(pool_urls)} races with {self.driver_pool.size} drivers")
+            races += [race for race in self.driver_pool.map(self.process_detail_page_in_pool, pool_urls) if race]
 
         self.races = races
 
+    def restore_checkpoint(self) -> list[RacingPostRaceRecord]:
+        """
+        Restore the races captured by a previous run that stopped before saving the raw data
+
+        Returns
+        ------------
+        list[RacingPostRaceRecord]:
+            Races in the checkpoint, empty if there is no checkpoint
+        """
+        races = [RacingPostRaceRecord.from_dict(race) for race in self.checkpoint.load()]
+
+        if races:
+            print(f"{len(races)} races restored from {self.checkpoint.file_path}")
+
+        return races
+
+    def init_pool_driver(self, driver : webdriver.Chrome) -> None:
+        """
+        Copy the cookies of this scraper into a new driver of the pool, 
+        so the drivers in the pool share the cookies accepted in the main page
+
+        Parameters
+        ------------
+        driver: webdriver.Chrome
+            New driver in the pool
+        """
+        driver.get(self.url)
+
+        for cookie in self.driver.get_cookies():
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                print(e)
+
+    def process_detail_page_in_pool(self, driver : webdriver.Chrome, url : str) -> RacingPostRaceRecord:
+        """
+        Load and process the detail page with a driver from the pool. The page is read by the HTML parser
+        in html extraction mode, or by the single execute_script extractor otherwise, since the element by
+        element extraction is bound to the driver of this scraper
+
+        Parameters
+        ------------
+        driver: webdriver.Chrome
+            Driver from the pool
+        url: str
+            The URL of the detail page
+
+        Returns
+        ------------
+        RacingPostRaceRecord:
+            Race record captured from the detail page
+
+        """
+
+        print(f"Prasing race detail for {url}")
+
+        self.rate_limiter.wait(url)
+        start = time.monotonic()
+
+        driver.get(url)
+
+        self.wait_for_xpath(Constant.XPATH_RESULT_SECTION, driver=driver)
+
+        self.rate_limiter.report(url, elapsed=time.monotonic() - start)
+
+        if self.extraction_mode == Constant.EXTRACTION_MODE_HTML:
+            race = RacingPostHtmlParser.parse(driver.page_source, url)
+        else:
+            race = RacingPostDetailExtractor.extract(driver, url)
+
+        self.checkpoint.append(race.to_dictionary())
+
+        return race
+
     def process_detail_page(self, url : str, move_to_new_window : bool = True) -> RacingPostRaceRecord:
         """
         Process the detail page for all the information, 
@@ -503,8 +441,12 @@ class RacingPostFastResult(WebScrapper):
 
             self.switch_to_new_window()
 
-        until = self.get_EC_element_presence(xpath=Constant.XPATH_RESULT_SECTION)
-        self.wait_until(until)
+        self.wait_for_xpath(Constant.XPATH_RESULT_SECTION)
+
+        if self.extraction_mode == Constant.EXTRACTION_MODE_SCRIPT:
+            return RacingPostDetailExtractor.extract(self.driver, url)
+        elif self.extraction_mode == Constant.EXTRACTION_MODE_HTML:
+            return RacingPostHtmlParser.parse(self.driver.page_source, url)
         
         # race information (header labels)
         race_info = self.get_web_element(xpath=Constant.XPATH_RESULT_RACE_INFO)
@@ -709,99 +651,126 @@ class RacingPostFastResult(WebScrapper):
 
         return race_info
 
+    def fetch_detail_page(self, url : str) -> Optional[RacingPostRaceRecord]:
+        """
+        Get the detail page over HTTP and parse it without the browser
+
+        Parameters
+        ------------
+        url: str
+            The URL of the detail page
+
+        Returns
+        ------------
+        Optional[RacingPostRaceRecord]:
+            Race record captured from the detail page or None if the page cannot be fetched
+
+        """
+
+        print(f"Fetching race detail for {url}")
+
+        try:
+            page_source = self.http_fetcher.get(url)
+        except requests.RequestException as e:
+            print(e)
+            return None
+
+        return RacingPostHtmlParser.parse(page_source, url)
+
     def save_raw_data(self) -> None:
         """
-        Save raw data in json format. 
+        Save raw data in JSONL (or JSON) format, compressed if out_file ends with .gz or .zst, see RacingPostRawData. 
         It will create a folder if the folder specified in out_path doesn't exist.
+        The file is replaced at once, a crash while writing leaves the previous file
         """
-        os.makedirs(self.out_path, exist_ok=True)
-
-        with open(self.out_path + self.out_file, 'w+') as file:
-            json.dump([race.to_dictionary() for race in self.races], file, indent=4)
+        RacingPostRawData(self.out_path + self.out_file).write(self.races)
 
     def download_images(self) -> None:
         """
-        Download images for each race and save it into image path
+        Download images for each race and save it into image path. The silks are stored by content,
+        horse_silk of every horse is the key of its silk in the store (and in S3)
         """
         
         print("Downloading images...")
+        self.silk_registry.resolve(horse.horse_silk_url for race in self.races for horse in race.horse_rank)
+
+        # a silk is downloaded once, the other races with the same silk reuse it
+        jobs = {}
+        queued = set()
+
         for race in self.races:
             race_uuid = race.race_id
-            for horse in race.horse_rank:
+            for i, horse in enumerate(race.horse_rank):
                 horse_silk_url = horse.horse_silk_url
 
-                if horse_silk_url:
-                    if self.df_horse_record is not None and self.df_horse_record.shape[0] > 0:
-                        same_silk = self.df_horse_record[self.df_horse_record["horse_silk_url"] == horse_silk_url]
-                    else:
-                        same_silk = None
+                if horse_silk_url and horse_silk_url not in queued:
+                    entry = self.silk_registry.get(horse_silk_url)
 
-                    if same_silk is None or same_silk.shape[0] == 0:
-                        this_image_path = self.image_path + race_uuid + "/" 
+                    if not entry or not entry.horse_silk:
+                        jobs[(race_uuid, i)] = (horse_silk_url, self.image_path + Constant.IMAGE_INCOMING_FOLDER + race_uuid + "/")
+                        queued.add(horse_silk_url)
 
-                        file_name = self.download_image(horse_silk_url, this_image_path)
-                        horse.horse_silk = race_uuid + "/" + file_name
-                    else:
-                        horse.horse_silk = same_silk["horse_silk"].iloc[0] if same_silk is not None else None
+        start = time.monotonic()
+        file_names = self.image_downloader.download_all(jobs)
 
+        for key, file_name in file_names.items():
+            race_uuid = key[0]
+            horse_silk_url, this_image_path = jobs[key]
 
-            sleep_second = random.randint(1, 5)
-            time.sleep(sleep_second)
+            stored = self.image_store.add(this_image_path + file_name) if file_name else None
 
-    def normalize_race_record(self, race_list : list[dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+            if stored:
+                key, content_hash = stored
+                self.silk_registry.put(horse_silk_url, SilkEntry(key, content_hash=content_hash))
+
+        if jobs:
+            print(f"{sum(1 for file_name in file_names.values() if file_name)}/{len(jobs)} silks downloaded in {time.monotonic() - start:.1f}s")
+
+        for race in self.races:
+            for horse in race.horse_rank:
+                if horse.horse_silk_url:
+                    entry = self.silk_registry.get(horse.horse_silk_url)
+                    horse.horse_silk = entry.horse_silk if entry else None
+
+    def normalize_race_record(self, race_list : Iterable[RacingPostRaceRecord] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
-        Normalize the raw data into 3 tables (race information, prize information and horse records)
+        Normalize the raw data into 3 tables (race information, prize information and horse records), see RacingPostNormalizer
         Parameters
         ------------
-        race_list: list[dict]
-            A list for races in dictionary format
+        race_list: Iterable[RacingPostRaceRecord]
+            Races to be normalized, e.g. a list or a generator. Default: None, it means the races of this scraper
 
         Returns
         ------------
         Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-            horse_info table, prize_info and horse_record table in panda DataFrame format
+            race_info table, prize_info and horse_record table in panda DataFrame format
 
         """
-
-        if not race_list:
+        if race_list is None:
             race_list = self.races
 
-        race_info_dict = defaultdict(list)
-        prize_info_dict = defaultdict(list)
-        horse_info_dict = defaultdict(list)
-       
-        for race in race_list:
-            race_dict = race.to_dictionary()
-            race_id = race_dict["race_id"]
-            
-            for key, value in race_dict.items():
-                if key == 'prize':
-                    for prize_key, prize_value in value.items():
-                        prize_info_dict["race_id"].append(race_id)
-                        prize_info_dict["rank"].append(prize_key)
-                        prize_info_dict["prize"].append(prize_value)
-
-                elif key == 'horse_rank':
-                    for horse in value:
-                        horse_info_dict["race_id"].append(race_id)
-
-                        for horse_key, horse_value in horse.items():
-                            horse_info_dict[horse_key].append(horse_value)
-                else:
-                    race_info_dict[key].append(value)
-
-        df_race_info = pd.DataFrame.from_dict(race_info_dict).set_index("race_id")
-        df_prize_info = pd.DataFrame.from_dict(prize_info_dict).set_index(["race_id", "rank"])
-        df_horse_info = pd.DataFrame.from_dict(horse_info_dict).set_index(["race_id", "horse_rank", "horse_name"])
+        return RacingPostNormalizer.normalize(race_list)
 
-        # print(df_horse_info)
+    def parse_race_record(self, race_list : Iterable[RacingPostRaceRecord] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Normalize the raw data into 3 tables and add the numeric values of their text, see RacingPostValueParser.
+        The values are parsed a column at a time for the whole batch
+        Parameters
+        ------------
+        race_list: Iterable[RacingPostRaceRecord]
+            Races to be normalized. Default: None, it means the races of this scraper
 
-        return df_race_info, df_prize_info, df_horse_info
+        Returns
+        ------------
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+            race_info table, prize_info and horse_record table with the numeric columns
+        """
+        return RacingPostValueParser.parse(*self.normalize_race_record(race_list))
 
     def upload_s3(self) -> None:
         """
         Upload images and raw data file into s3. The key for raw data will be equal to raw_data/{input filename}
-        and for images will be {UUID for each race}/{horse_silk}
+        and for images will be {horse_silk}, i.e. {hash prefix}/{hash}.svg
         """
 
         # for testing only
@@ -809,80 +778,130 @@ class RacingPostFastResult(WebScrapper):
             self.restore_cache_result()
 
         if len(self.races) > 0:
-            # upload images into s3
+            self.silk_registry.resolve(horse.horse_silk_url for race in self.races for horse in race.horse_rank)
+
+            # silks to be uploaded, by key, the same content is put once
+            files = {}
+
             for race in self.races:
-                race_id = race.race_id
+                for horse in race.horse_rank:
+                    if horse.horse_silk_url and horse.horse_silk:
+                        entry = self.silk_registry.get(horse.horse_silk_url) or SilkEntry()
+
+                        file_path = f"{self.image_path}{horse.horse_silk}"
+
+                        # with force_capture, a silk is uploaded again (unless unchanged in S3), a silk
+                        # resolved from RDS without a local file keeps its S3 URL
+                        if (self.force_capture or not entry.horse_silk_url_s3) and os.path.isfile(file_path):
+                            files[horse.horse_silk] = file_path
+
+            # upload images into s3 in parallel
+            silk_urls = self.uploader.upload_files_to_s3(files)
 
+            for race in self.races:
                 for horse in race.horse_rank:
                     if horse.horse_silk_url:
-                        if self.df_horse_record is not None and self.df_horse_record.shape[0] > 0:
-                            df_same_silk = self.df_horse_record[self.df_horse_record["horse_silk_url"] == horse.horse_silk_url]
-                            url = df_same_silk["horse_silk_url_s3"].iloc[0] if df_same_silk.shape[0] > 0 else None
-                        else:
-                            df_same_silk = None
-                            url = None
-                        
+                        entry = self.silk_registry.get(horse.horse_silk_url) or SilkEntry()
                         file_name = horse.horse_silk
 
-                        if url and not self.force_capture:
-                            horse.horse_silk_url_s3 = url
-                        elif file_name:
-                            keyname = file_name
-                            silk_url = self.uploader.upload_to_s3(f"{self.image_path}{keyname}", keyname)
-                            horse.horse_silk_url_s3 = silk_url
+                        # None if the upload failed, the previous URL is kept
+                        if silk_urls.get(file_name):
+                            horse.horse_silk_url_s3 = silk_urls[file_name]
+                        else:
+                            horse.horse_silk_url_s3 = entry.horse_silk_url_s3
+
+                        if file_name and horse.horse_silk_url_s3 and horse.horse_silk_url_s3 != entry.horse_silk_url_s3:
+                            self.silk_registry.put(horse.horse_silk_url, SilkEntry(file_name, horse.horse_silk_url_s3, entry.content_hash \
+                                if entry.horse_silk == file_name else SilkRegistry.content_hash(self.image_path + file_name)))
+
+            # share the silks with the other machines and the later runs
+            self.silk_registry.sync()
 
             
             self.save_raw_data()
 
             # upload raw data into s3
-            self.uploader.upload_to_s3(f"{self.out_path + self.out_file}", f"raw_data/{self.out_file}")
+            self.uploader.upload_to_s3(f"{self.out_path + self.out_file}", f"raw_data/{self.out_file}", skip_unchanged=True)
                             
-    def upload_rds(self) -> None:
+    def upload_rds(self, race_list : list[RacingPostRaceRecord] = None) -> None:
         """
         Upload raw data into tabular format into AWS RDS, it first normalize raw data into 3 tables
         (race_info, prize_info and horse_record) in pandas dataframe format, where prize info and 
         horse record has the foreign key "race_id" referencing to primary key "race_id" in race_info 
         table. 
+
+        Parameters
+        ------------
+        race_list: list[RacingPostRaceRecord]
+            Races to be uploaded in one batch, e.g. the races of several dates. 
+            Default: None, it means the races of this scraper
         """
         
-        if not self.races:
-            self.restore_cache_result()
+        if not race_list:
+            if not self.races:
+                self.restore_cache_result()
 
-        if len(self.races) > 0:
-            self.df_race_upload, self.df_prize_upload, self.df_horse_upload = self.normalize_race_record()
+            race_list = self.races
 
-            if self.df_race_info is not None and self.force_capture:
-                
-                self.df_race_info = self.df_race_info.set_index("race_id")
-                self.df_prize_info = self.df_prize_info.set_index(["race_id", "rank"])
-                self.df_horse_record = self.df_horse_record.set_index(["race_id", "horse_rank", "horse_name"])
+        if len(race_list) > 0:
+            self.df_race_upload, self.df_prize_upload, self.df_horse_upload = self.parse_race_record(race_list)
 
-                df_race_upload = self.df_race_info.append(self.df_race_upload)
-                df_prize_upload = self.df_prize_info.append(self.df_prize_upload)
-                df_horse_upload = self.df_horse_record.append(self.df_horse_upload)
+            # the tables are created (or migrated from the untyped tables) with keys, indexes and types
+            schema = RacingPostSchema(self.is_testing)
+            self.uploader.migrate_schema(schema.metadata)
 
-                if_exists = "replace"
+            tables = {
+                schema.race_info.name: self.uploader.conform_frame(schema.race_info, self.df_race_upload),
+                schema.prize_info.name: self.uploader.conform_frame(schema.prize_info, self.df_prize_upload),
+                schema.horse_record.name: self.uploader.conform_frame(schema.horse_record, self.df_horse_upload),
+            }
 
+            if self.force_capture:
+                # the uploaded races replace their previous records, including the races of a batch
+                # that were not captured by this scraper, the other rows are left untouched
+                self.uploader.upsert_postgreSQL(tables, "race_id", self.replaced_race_ids | set(self.df_race_upload.index), \
+                    schema.metadata)
             else:
-                df_race_upload = self.df_race_upload
-                df_prize_upload = self.df_prize_upload
-                df_horse_upload = self.df_horse_upload
+                for table_name, dataframe in tables.items():
+                    self.uploader.upload_postgreSQL(dataframe, table_name, "append")
+
+            self.dedup.remember(race_list)
 
-                if_exists = "replace" if self.force_capture else "append"
+    def export_parquet(self, race_list : list[RacingPostRaceRecord] = None) -> None:
+        """
+        Write the normalised tables to the local Parquet copy, partitioned by race date, if parquet_path is set
 
-            self.uploader.upload_postgreSQL(df_race_upload, \
-                Constant.get_rds_tables_key(Constant.RDS_TABLE_RACE_INFO, self.is_testing), if_exists)
-            self.uploader.upload_postgreSQL(df_prize_upload, \
-                Constant.get_rds_tables_key(Constant.RDS_TABLE_PRIZE_INFO, self.is_testing), if_exists)
-            self.uploader.upload_postgreSQL(df_horse_upload, \
-                Constant.get_rds_tables_key(Constant.RDS_TABLE_HORSE_RECORD, self.is_testing), if_exists)
+        Parameters
+        ------------
+        race_list: list[RacingPostRaceRecord]
+            Races to be exported in one batch. Default: None, it means the races of this scraper
+        """
+        if not self.parquet_store:
+            return
+
+        race_list = race_list if race_list else self.races
+
+        if race_list:
+            self.parquet_store.write(*self.parse_race_record(race_list))
 
     def cleanup(self) -> None:
         """
-        Close all connections
+        Close all connections, a shared uploader is left open for the other scrapers. 
+        The checkpoint is removed, the races are in the raw data file now
         """
 
-        self.uploader.close_connection()
+        self.checkpoint.remove()
+
+        self.dedup.close()
+        self.silk_registry.close()
+
+        if self.owns_uploader:
+            self.uploader.close_connection()
+
+        if self.http_fetcher:
+            self.http_fetcher.close()
+
+        self.image_downloader.close()
 
         # try:
         #     shutil.rmtree(self.image_path)
@@ -905,3 +924,6 @@ class RacingPostFastResult(WebScrapper):
             print(f"{self.df_prize_upload.shape[0]} prize info records scraped")
             print(f"{self.df_horse_upload.shape[0]} horse records scraped")
             print("========================")
+
+        print(f"{self.rate_limiter.throttled_seconds():.1f}s spent waiting for rate limits")
+        print(self.rate_limiter.summary())
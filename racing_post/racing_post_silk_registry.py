@@ -0,0 +1,251 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, astuple
+from racing_post.racing_post_record import Constant
+from racing_post.racing_post_uploader import RacingPostUploader
+from scrapers.content_store import ContentAddressedStore
+from typing import Dict, Iterable, Optional
+import os
+import sqlite3
+import threading
+
+@dataclass
+class SilkEntry():
+    """
+    Data Class for a stored silk
+    """
+    horse_silk: str = None
+    horse_silk_url_s3: str = None
+    content_hash: str = None
+
+class SilkRegistry():
+    """
+    Registry of the silks already downloaded or uploaded, keyed by their URL on Racing Post.
+    The entries live in a local SQLite file with an LRU layer in memory, and are synced with
+    a registry table in RDS, so other machines and later runs reuse them. The silks are resolved
+    without reading horse_record, it is only queried for the URLs the registry has never seen.
+    """
+
+    COLUMNS = ("horse_silk_url", "horse_silk", "horse_silk_url_s3", "content_hash")
+
+    def __init__(self, uploader : RacingPostUploader, is_testing : bool = False, registry_file : str = None, \
+        cache_size : int = 1024) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        uploader: RacingPostUploader
+            Uploader providing the RDS engine
+        is_testing: bool
+            Sync with the testing tables
+        registry_file: str
+            File path of the local registry. Default: None, it means the registry is kept in memory
+        cache_size: int
+            Number of entries kept in the LRU layer
+        """
+        self.uploader = uploader
+        self.rds_table = Constant.get_rds_tables_key(Constant.RDS_TABLE_SILK_REGISTRY, is_testing)
+        self.horse_table = Constant.get_rds_tables_key(Constant.RDS_TABLE_HORSE_RECORD, is_testing)
+        self.registry_file = registry_file
+        self.cache_size = cache_size
+
+        self._memory = OrderedDict()
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """
+        Connection of the local registry, created on first use
+        """
+        with self._lock:
+            if self._db is None:
+                if self.registry_file and os.path.dirname(self.registry_file):
+                    os.makedirs(os.path.dirname(self.registry_file), exist_ok=True)
+
+                self._db = sqlite3.connect(self.registry_file if self.registry_file else ":memory:", check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS silks (horse_silk_url TEXT PRIMARY KEY, horse_silk TEXT, \
+                    horse_silk_url_s3 TEXT, content_hash TEXT)")
+                self._db.commit()
+
+            return self._db
+
+    @staticmethod
+    def content_hash(file_path : str) -> Optional[str]:
+        """
+        SHA-256 of a file
+
+        Returns
+        ----------
+        Optional[str]:
+            Hex digest or None if the file cannot be read
+        """
+        return ContentAddressedStore.hash_file(file_path)
+
+    def _remember(self, silk_url : str, entry : SilkEntry) -> None:
+        self._memory[silk_url] = entry
+        self._memory.move_to_end(silk_url)
+
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def get(self, silk_url : str) -> Optional[SilkEntry]:
+        """
+        Get a silk from the local registry
+
+        Parameters
+        ----------
+        silk_url: str
+            URL of the silk on Racing Post
+
+        Returns
+        ----------
+        Optional[SilkEntry]:
+            The stored silk or None if it is not in the local registry
+        """
+        with self._lock:
+            entry = self._memory.get(silk_url)
+
+            if entry:
+                self._memory.move_to_end(silk_url)
+                return entry
+
+            row = self.db.execute("SELECT horse_silk, horse_silk_url_s3, content_hash FROM silks WHERE horse_silk_url = ?", \
+                (silk_url,)).fetchone()
+
+            if row:
+                entry = SilkEntry(*row)
+                self._remember(silk_url, entry)
+
+            return entry
+
+    def put(self, silk_url : str, entry : SilkEntry, sync : bool = True) -> None:
+        """
+        Add or update a silk in the local registry
+
+        Parameters
+        ----------
+        silk_url: str
+            URL of the silk on Racing Post
+        entry: SilkEntry
+            The stored silk
+        sync: bool
+            Push the entry to RDS on the next sync
+        """
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO silks VALUES (?, ?, ?, ?)", (silk_url, *astuple(entry)))
+            self.db.commit()
+            self._remember(silk_url, entry)
+
+            if sync:
+                self._pending[silk_url] = entry
+
+    def resolve(self, silk_urls : Iterable[str]) -> Dict[str, SilkEntry]:
+        """
+        Find the stored silks, the URLs missing locally are pulled from RDS in one query
+
+        Parameters
+        ----------
+        silk_urls: Iterable[str]
+            URLs of the silks on Racing Post
+
+        Returns
+        ----------
+        Dict[str, SilkEntry]:
+            Entry of each silk URL found
+        """
+        result = {}
+        missing = set()
+
+        for silk_url in set(silk_urls):
+            if not silk_url:
+                continue
+
+            entry = self.get(silk_url)
+            if entry:
+                result[silk_url] = entry
+            else:
+                missing.add(silk_url)
+
+        if missing:
+            for silk_url, entry in self.pull(missing).items():
+                self.put(silk_url, entry, sync=False)
+                result[silk_url] = entry
+
+        return result
+
+    def pull(self, silk_urls : set[str]) -> Dict[str, SilkEntry]:
+        """
+        Read silks from the registry table in RDS, or from the horse records stored before the registry existed
+        """
+        from sqlalchemy import column, select, table
+        from sqlalchemy.exc import OperationalError, ProgrammingError
+
+        found = {}
+
+        # the registry table is created by the first sync, the horse records may not exist yet either
+        for table_name, columns in ((self.rds_table, self.COLUMNS), (self.horse_table, self.COLUMNS[:3])):
+            missing = silk_urls - found.keys()
+            if not missing:
+                break
+
+            rds_table = table(table_name, *[column(name) for name in columns])
+
+            try:
+                with self.uploader.engine.connect() as connection:
+                    for silk_url, *values in connection.execute(select(*rds_table.c).where(rds_table.c.horse_silk_url.in_(missing))):
+                        found.setdefault(silk_url, SilkEntry(*values))
+            except (OperationalError, ProgrammingError, OSError) as e:
+                print(f"Cannot look up silks in {table_name}: {e!r}")
+
+        return found
+
+    def sync(self) -> int:
+        """
+        Push the silks added since the last sync to the registry table in RDS
+
+        Returns
+        ----------
+        int:
+            Number of silks pushed
+        """
+        from sqlalchemy import Column, MetaData, Table, Text
+        from sqlalchemy.exc import OperationalError, ProgrammingError
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        metadata = MetaData()
+        registry = Table(self.rds_table, metadata, Column("horse_silk_url", Text, primary_key=True), \
+            *[Column(name, Text) for name in self.COLUMNS[1:]])
+
+        try:
+            metadata.create_all(self.uploader.engine, checkfirst=True)
+
+            with self.uploader.engine.begin() as connection:
+                connection.execute(registry.delete().where(registry.c.horse_silk_url.in_(pending.keys())))
+                connection.execute(registry.insert(), [dict(zip(self.COLUMNS, (silk_url, *astuple(entry)))) \
+                    for silk_url, entry in pending.items()])
+        except (OperationalError, ProgrammingError, OSError) as e:
+            print(f"Cannot sync silks to RDS, retry on the next sync: {e!r}")
+
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+
+            return 0
+
+        return len(pending)
+
+    def close(self) -> None:
+        """
+        Close the local registry
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
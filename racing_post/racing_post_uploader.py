@@ -1,18 +1,128 @@
+from __future__ import annotations
 from curses import keyname
-from sqlalchemy import create_engine
 import yaml
-import boto3
-import pandas as pd 
-from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, TYPE_CHECKING
+import hashlib
+import itertools
 import os
 import re
+import threading
+
+# pandas, boto3 and sqlalchemy are imported on first use, they take most of the start up time
+if TYPE_CHECKING:
+    import pandas as pd
 
 class RacingPostUploader():
     """
     Class for uploading tabular data, JSON data and images into AWS S3 and RDS
     """
-    def __init__(self):
-        aws_config = self.read_cloud_config()
+    # objects below this size are uploaded in one part, so their ETag is the MD5 of the content
+    MULTIPART_THRESHOLD = 64 * 1024 * 1024
+
+    # rows sent to RDS per COPY (or executemany) statement, it bounds the memory used by a bulk load
+    BULK_CHUNK_SIZE = 10000
+
+    def __init__(self, config_file : str = "./aws.yaml", s3_client : Any = None, s3_bucket : str = None, s3_workers : int = 8, \
+        engine : Any = None):
+        """
+        Constructor, the DB engine and the S3 client are created on first use
+
+        Parameters
+        =================
+        config_file: str
+            File path for the config file
+        s3_client: Any
+            S3 client to be used instead of the one from the config file, e.g. a local S3 stand-in
+        s3_bucket: str
+            Default bucket instead of the one from the config file
+        s3_workers: int
+            Number of files uploaded at the same time by upload_files_to_s3
+        engine: Any
+            SQLAlchemy engine to be used instead of the one from the config file
+        """
+        self.config_file = config_file
+        self.s3_workers = s3_workers
+        self._aws_config = None
+        self._engine = engine
+        self._s3_client = s3_client
+        self._s3_bucket = s3_bucket
+        self._bucket_regions = {}
+
+        # tables already created or migrated by migrate_schema
+        self._migrated_tables = set()
+
+        # number of objects uploaded and skipped as unchanged
+        self.s3_stats = Counter()
+
+        # the uploader can be shared by scrapers running in several threads
+        self._lock = threading.RLock()
+
+    @property
+    def aws_config(self) -> dict:
+        """
+        AWS config read from the config file on first use
+        """
+        with self._lock:
+            if self._aws_config is None:
+                self._aws_config = self.read_cloud_config(self.config_file)
+
+        return self._aws_config
+
+    @property
+    def engine(self) -> Any:
+        """
+        SQLAlchemy engine of RDS (PostgreSQL), connected on first use
+        """
+        with self._lock:
+            if self._engine is None:
+                self._engine = self.create_postgreSQL_engine(self.aws_config)
+
+        return self._engine
+
+    @property
+    def s3_bucket(self) -> str:
+        """
+        Default S3 bucket from the config file
+        """
+        return self._s3_bucket if self._s3_bucket else self.aws_config["aws-s3"]["bucket"]
+
+    @property
+    def s3_client(self) -> Any:
+        """
+        boto3 S3 client, created on first use
+        """
+        with self._lock:
+            if self._s3_client is None:
+                import boto3
+
+                aws_config = self.aws_config
+                self._s3_client = boto3.client('s3',
+                    aws_access_key_id=aws_config["aws-s3"]["access_key_id"],
+                    aws_secret_access_key=aws_config["aws-s3"]["secret_access_key"],
+                    region_name=aws_config["aws-s3"]["region_name"]
+                )
+
+        return self._s3_client
+
+    @staticmethod
+    def create_postgreSQL_engine(aws_config : dict) -> Any:
+        """
+        Create and connect the SQLAlchemy engine of RDS (PostgreSQL)
+
+        Parameters
+        =================
+        aws_config: dict
+            AWS config in dictionary format
+
+        Returns 
+        =================
+        Engine:
+            SQLAlchemy engine
+        """
+        from sqlalchemy import create_engine
+
         postgre_config = aws_config['aws-postgresql']
 
         db_type = postgre_config["dbtype"]
@@ -24,16 +134,11 @@ class RacingPostUploader():
         database = postgre_config["database"]
 
         print(f"Create postgreSQL engine {db_type}+{db_api}://{user}:*******@{endpoint}:{port}/{database}")
-        self.engine = create_engine(f"{db_type}+{db_api}://{user}:{password}@{endpoint}:{port}/{database}")
-        self.engine.connect()
-
-        self.s3_bucket = aws_config["aws-s3"]["bucket"]
-        self.s3_client = boto3.client('s3',
-            aws_access_key_id=aws_config["aws-s3"]["access_key_id"],
-            aws_secret_access_key=aws_config["aws-s3"]["secret_access_key"],
-            region_name=aws_config["aws-s3"]["region_name"]
-        )
-        
+        engine = create_engine(f"{db_type}+{db_api}://{user}:{password}@{endpoint}:{port}/{database}")
+        engine.connect()
+
+        return engine
+
     @staticmethod
     def read_cloud_config(config_file : str = "./aws.yaml") -> dict:
         """
@@ -68,9 +173,73 @@ class RacingPostUploader():
         
         return aws_config
         
-    def upload_postgreSQL(self, dataframe : pd.DataFrame, table_name : str, if_existed : str = "append") -> None:
+    @staticmethod
+    def copy_rows(table : Any, connection : Any, keys : list, data_iter : Any) -> int:
         """
-        Upload dataframe into RDS (PostgreSQL)
+        Insert method of DataFrame.to_sql streaming the rows through PostgreSQL "COPY FROM STDIN" as CSV,
+        one round trip per chunk instead of one per row
+
+        Parameters
+        =================
+        table: pandas.io.sql.SQLTable
+            Table being written
+        connection: Any
+            SQLAlchemy connection of the table
+        keys: list
+            Column names
+        data_iter: Any
+            Rows of the chunk, None for missing values
+
+        Returns
+        =================
+        int:
+            Number of rows copied
+        """
+        import csv
+        import io
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+
+        # \N marks NULL, so empty strings stay empty strings
+        for row in data_iter:
+            writer.writerow(["\\N" if value is None else value for value in row])
+            count += 1
+
+        buffer.seek(0)
+
+        columns = ", ".join('"{}"'.format(key.replace('"', '""')) for key in keys)
+        table_name = '"{}"'.format(table.name.replace('"', '""'))
+        if table.schema:
+            table_name = '"{}".{}'.format(table.schema.replace('"', '""'), table_name)
+
+        sql = f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+        return count
+
+    @classmethod
+    def insert_method(cls, connectable : Any) -> Any:
+        """
+        Insert method of DataFrame.to_sql for a database, COPY for PostgreSQL or None (executemany) for the other dialects
+        """
+        return cls.copy_rows if connectable.dialect.name == "postgresql" else None
+
+    def upload_postgreSQL(self, dataframe : pd.DataFrame, table_name : str, if_existed : str = "append", chunksize : int = None) -> None:
+        """
+        Upload dataframe into RDS (PostgreSQL), the rows are bulk loaded with COPY in chunks
 
         Parameters
         =================
@@ -80,9 +249,235 @@ class RacingPostUploader():
             Table's name in RDS
         if_exists: str
             Use "append" to append to the table or use "replace" to replace the entire table
+        chunksize: int
+            Number of rows per statement. Default: None, it means BULK_CHUNK_SIZE
+
+        """
+        dataframe.to_sql(table_name, self.engine, if_exists=if_existed, chunksize=chunksize if chunksize else self.BULK_CHUNK_SIZE, \
+            method=self.insert_method(self.engine))
+
+    @staticmethod
+    def conform_frame(table : Any, dataframe : pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert a dataframe to the types of a table, the values that cannot be converted
+        (e.g. "–" for no rating) become NULL and the columns not in the table are dropped
+
+        Parameters
+        =================
+        table: sqlalchemy.Table
+            Table to be written
+        dataframe: pd.DataFrame
+            Dataframe with text values, its index is kept
+
+        Returns
+        =================
+        pd.DataFrame:
+            Dataframe with the types of the table
+        """
+        import pandas as pd
+        from sqlalchemy import Date, Float, Integer, Numeric
+
+        index_names = [name for name in dataframe.index.names if name]
+        frame = dataframe.reset_index() if index_names else dataframe.copy()
+
+        dropped = [name for name in frame.columns if name not in table.columns]
+        if dropped:
+            print(f"Columns not in {table.name} are not uploaded: {dropped}")
+
+        frame = frame[[column.name for column in table.columns if column.name in frame.columns]]
+
+        for column in table.columns:
+            if column.name not in frame.columns:
+                continue
+
+            if isinstance(column.type, Integer):
+                values = frame[column.name]
+
+                # e.g. the horse number "3.", the columns parsed by RacingPostValueParser are already numbers
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = values.astype("string").str.rstrip(".")
+
+                frame[column.name] = pd.to_numeric(values, errors="coerce").round().astype("Int64")
+            elif isinstance(column.type, (Float, Numeric)):
+                frame[column.name] = pd.to_numeric(frame[column.name], errors="coerce")
+            elif isinstance(column.type, Date):
+                frame[column.name] = pd.to_datetime(frame[column.name], format=column.info.get("format"), errors="coerce").dt.date
+
+        return frame.set_index(index_names) if index_names else frame
+
+    def migrate_schema(self, metadata : Any) -> None:
+        """
+        Create the tables of a schema in RDS (PostgreSQL), or migrate the existing ones. A table created by
+        DataFrame.to_sql (all text, without primary key) is rebuilt with the schema and its rows are copied,
+        the columns and indexes missing from the other tables are added. Each table is migrated once per uploader.
+
+        Parameters
+        =================
+        metadata: sqlalchemy.MetaData
+            Tables of the schema, e.g. RacingPostSchema.metadata
+        """
+        from sqlalchemy import inspect, text
+
+        with self._lock:
+            tables = [table for table in metadata.sorted_tables if table.name not in self._migrated_tables]
+            if not tables:
+                return
+
+            with self.engine.begin() as connection:
+                for table in tables:
+                    inspector = inspect(connection)
+
+                    if not inspector.has_table(table.name):
+                        table.create(connection)
+
+                    elif not inspector.get_pk_constraint(table.name)["constrained_columns"]:
+                        self.rebuild_table(connection, table)
+
+                    else:
+                        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+                        for column in table.columns:
+                            if column.name not in existing:
+                                column_type = column.type.compile(dialect=connection.dialect)
+                                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+                        for index in table.indexes:
+                            index.create(connection, checkfirst=True)
+
+                self._migrated_tables.update(table.name for table in tables)
+
+    def rebuild_table(self, connection : Any, table : Any) -> None:
+        """
+        Rebuild a table created by DataFrame.to_sql with the schema, the rows are copied in chunks and
+        converted to the types of the schema, only the first row of a duplicated key is kept. The rows
+        which cannot be keyed (a NULL key, or a race_id missing in the referenced table) are not copied
+        """
+        import pandas as pd
+        from sqlalchemy import and_, column, func, literal_column, select, table as sql_table, text
+
+        legacy_name = f"{table.name}_legacy"
+        key_columns = [key_column.name for key_column in table.primary_key.columns]
+
+        print(f"Migrate {table.name} to the typed schema")
+
+        connection.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy_name}"'))
+        table.create(connection)
+
+        legacy = sql_table(legacy_name, *[column(name) for name in {*key_columns, *(key.parent.name for key in table.foreign_keys)}])
+
+        conditions = [legacy.c[name].isnot(None) for name in key_columns]
+        for key in table.foreign_keys:
+            # the referenced tables are migrated first, see MetaData.sorted_tables
+            referenced = sql_table(key.column.table.name, column(key.column.name))
+            conditions.append(legacy.c[key.parent.name].in_(select(referenced.c[key.column.name])))
+
+        total = connection.execute(select(func.count()).select_from(legacy)).scalar()
+        valid = connection.execute(select(func.count()).select_from(legacy).where(and_(*conditions))).scalar()
+        if valid < total:
+            print(f"{total - valid} rows of {table.name} without a key or a referenced race are not migrated")
+
+        seen = set()
+        query = select(literal_column("*")).select_from(legacy).where(and_(*conditions))
+
+        for chunk in pd.read_sql_query(query, connection, chunksize=self.BULK_CHUNK_SIZE):
+            chunk = self.conform_frame(table, chunk)
+
+            keep = []
+            for key in chunk[key_columns].itertuples(index=False, name=None):
+                keep.append(key not in seen)
+                seen.add(key)
+
+            chunk = chunk[keep]
+
+            chunk.to_sql(table.name, connection, if_exists="append", index=False, chunksize=self.BULK_CHUNK_SIZE, \
+                method=self.insert_method(connection))
 
+        connection.execute(text(f'DROP TABLE "{legacy_name}"'))
+
+    def upsert_postgreSQL(self, dataframes : Dict[str, pd.DataFrame], key_column : str = "race_id", keys : set = None, \
+        metadata : Any = None) -> None:
         """
-        dataframe.to_sql(table_name, self.engine, if_exists=if_existed)
+        Replace the rows of some keys in RDS (PostgreSQL) tables in one transaction. Every dataframe is
+        loaded into a temporary staging table with the columns and types of its table, then the rows with
+        the same keys are deleted from the table and the staging rows are inserted. Only the changed rows
+        are written, whatever the size of the tables.
+
+        Parameters
+        =================
+        dataframes: Dict[str, pd.DataFrame]
+            Dataframe of each table's name, e.g. from conform_frame, the index is written as in upload_postgreSQL
+        key_column: str
+            Column identifying the rows to be replaced, e.g. race_id
+        keys: set
+            Additional keys whose rows are deleted even if they have no new rows.
+            Default: None, it means only the keys in the dataframes
+        metadata: sqlalchemy.MetaData
+            Tables created if they don't exist yet, e.g. RacingPostSchema.metadata.
+            Default: None, it means the tables should exist, see migrate_schema
+        """
+        import uuid
+        from sqlalchemy import Column, MetaData, Table, delete, inspect, insert, select
+
+        suffix = uuid.uuid4().hex[:8]
+
+        with self.engine.begin() as connection:
+            for table_name, dataframe in dataframes.items():
+                frame = dataframe.reset_index() if any(dataframe.index.names) else dataframe
+
+                if not inspect(connection).has_table(table_name):
+                    if metadata is None or table_name not in metadata.tables:
+                        raise ValueError(f"Table {table_name} doesn't exist, create it with migrate_schema first")
+
+                    metadata.tables[table_name].create(connection)
+
+                target = Table(table_name, MetaData(), autoload_with=connection)
+
+                unknown = [name for name in frame.columns if name not in target.columns]
+                if unknown:
+                    raise ValueError(f"Columns not in {table_name}: {unknown}")
+
+                # the staging table has the types of the table, e.g. an empty date column is still a date
+                staging = Table(f"{table_name}_staging_{suffix}", MetaData(), \
+                    *[Column(name, target.c[name].type) for name in frame.columns], prefixes=["TEMPORARY"])
+                staging.create(connection)
+
+                self.insert_rows(connection, staging, frame)
+
+                condition = target.c[key_column].in_(select(staging.c[key_column]))
+                if keys:
+                    condition = condition | target.c[key_column].in_(list(keys))
+
+                connection.execute(delete(target).where(condition))
+                connection.execute(insert(target).from_select(list(frame.columns), select(*staging.c)))
+                staging.drop(connection)
+
+    def insert_rows(self, connection : Any, table : Any, dataframe : pd.DataFrame) -> None:
+        """
+        Insert the rows of a dataframe into an existing table in chunks, with COPY for PostgreSQL
+        or executemany for the other dialects, missing values are NULL
+
+        Parameters
+        =================
+        connection: Any
+            SQLAlchemy connection
+        table: sqlalchemy.Table
+            Table to be written, its columns are the columns of the dataframe
+        dataframe: pd.DataFrame
+            Rows to be inserted, the index is not written
+        """
+        columns = list(dataframe.columns)
+        values = dataframe.astype(object).where(dataframe.notna(), None)
+        rows = values.itertuples(index=False, name=None)
+
+        while True:
+            chunk = list(itertools.islice(rows, self.BULK_CHUNK_SIZE))
+            if not chunk:
+                return
+
+            if connection.dialect.name == "postgresql":
+                self.copy_rows(table, connection, columns, iter(chunk))
+            else:
+                connection.execute(table.insert(), [dict(zip(columns, row)) for row in chunk])
 
     def get_postgreSQL(self, table_name : str) -> Optional[pd.DataFrame]:
         """
@@ -99,6 +494,7 @@ class RacingPostUploader():
             Dataframe retrived from RDS or None if table not found
 
         """
+        import pandas as pd
 
         try:
             return pd.read_sql_table(table_name, self.engine)
@@ -107,7 +503,83 @@ class RacingPostUploader():
             
         return None
 
-    def upload_to_s3(self, file_path : str, key_name : str, busket : str = None) -> str:
+    def get_bucket_region(self, busket : str) -> str:
+        """
+        Region of a bucket, asked to S3 once per bucket
+
+        Parameters
+        =================
+        busket: str
+            The busket
+
+        Returns
+        =================
+        str:
+            Region of the bucket
+        """
+        with self._lock:
+            if busket not in self._bucket_regions:
+                bucket_location = self.s3_client.get_bucket_location(Bucket=busket)
+                # buckets in us-east-1 have no location constraint
+                self._bucket_regions[busket] = bucket_location['LocationConstraint'] or "us-east-1"
+
+            return self._bucket_regions[busket]
+
+    def get_s3_url(self, key_name : str, busket : str = None) -> str:
+        """
+        URL of an object in S3
+
+        Parameters
+        =================
+        key_name: str
+            Key name for file in S3
+        busket: str
+            The busket. Default: None, it means it will read the busket name from the config file
+
+        Returns
+        =================
+        str:
+            URL for the file in S3
+        """
+        if not busket:
+            busket = self.s3_bucket
+
+        return "https://s3-{0}.amazonaws.com/{1}/{2}".format(self.get_bucket_region(busket), busket, key_name)
+
+    @staticmethod
+    def file_md5(file_path : str) -> str:
+        """
+        MD5 of a file, as in the ETag of an object uploaded in one part
+        """
+        digest = hashlib.md5()
+
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def get_s3_md5(self, key_name : str, busket : str) -> Optional[str]:
+        """
+        MD5 of an object in S3, from the metadata set by this uploader or the ETag
+
+        Returns
+        =================
+        Optional[str]:
+            MD5 or None if the object doesn't exist
+        """
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.s3_client.head_object(Bucket=busket, Key=key_name)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+        return head.get("Metadata", {}).get("md5") or head.get("ETag", "").strip('"')
+
+    def upload_to_s3(self, file_path : str, key_name : str, busket : str = None, skip_unchanged : bool = False) -> str:
         """
         Upload file into S3
 
@@ -121,25 +593,76 @@ class RacingPostUploader():
         busket: str
             The busket to store the file
             Default: None, it means it will read the busket name from the config file
+        skip_unchanged: bool
+            Don't upload the file if the object in S3 has the same MD5
             
         Returns
         =================
         str:
             URL for the uploaded file in S3
         """
+        from boto3.s3.transfer import TransferConfig
 
         if not busket:
             busket = self.s3_bucket
 
-        response = self.s3_client.upload_file(file_path, busket, key_name)
-        bucket_location = self.s3_client.get_bucket_location(Bucket=busket)
+        md5 = self.file_md5(file_path)
+
+        if skip_unchanged and self.get_s3_md5(key_name, busket) == md5:
+            with self._lock:
+                self.s3_stats["skipped"] += 1
+
+            return self.get_s3_url(key_name, busket)
+
+        # the files are uploaded in parallel by upload_files_to_s3, not by the transfer manager
+        config = TransferConfig(multipart_threshold=self.MULTIPART_THRESHOLD, use_threads=False)
+        self.s3_client.upload_file(file_path, busket, key_name, ExtraArgs={"Metadata": {"md5": md5}}, Config=config)
+
+        with self._lock:
+            self.s3_stats["uploaded"] += 1
+
+        return self.get_s3_url(key_name, busket)
+
+    def upload_files_to_s3(self, files : Dict[str, str], busket : str = None, skip_unchanged : bool = True) -> Dict[str, Optional[str]]:
+        """
+        Upload files into S3 concurrently
+
+        Parameters
+        =================
+        files: Dict[str, str]
+            File's path of each key name
+        busket: str
+            The busket to store the files
+            Default: None, it means it will read the busket name from the config file
+        skip_unchanged: bool
+            Don't upload the files whose object in S3 has the same MD5
+
+        Returns
+        =================
+        Dict[str, Optional[str]]:
+            URL of each key name, None if the file cannot be uploaded
+        """
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        if not files:
+            return {}
+
+        if not busket:
+            busket = self.s3_bucket
+
+        self.get_bucket_region(busket)
+
+        def upload(key_name):
+            try:
+                return self.upload_to_s3(files[key_name], key_name, busket, skip_unchanged)
+            except (BotoCoreError, ClientError, OSError) as e:
+                print(f"Cannot upload {key_name}: {e!r}")
+                return None
 
-        object_url = "https://s3-{0}.amazonaws.com/{1}/{2}".format(
-            bucket_location['LocationConstraint'],
-            busket,
-            key_name)
+        keys = list(files)
 
-        return object_url
+        with ThreadPoolExecutor(max_workers=min(self.s3_workers, len(keys)), thread_name_prefix="s3") as executor:
+            return dict(zip(keys, executor.map(upload, keys)))
 
     def download_from_s3(self, file_path : str, key_name : str, busket : str = None) -> None:
         """
@@ -166,4 +689,6 @@ class RacingPostUploader():
         """
         Close any opened DB connection
         """
-        self.engine.dispose()
\ No newline at end of file
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
\ No newline at end of file
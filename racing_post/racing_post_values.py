@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Tuple, TYPE_CHECKING
+
+# pandas is imported on first use, it takes most of the start up time
+if TYPE_CHECKING:
+    import pandas as pd
+
+class RacingPostValueParser():
+    """
+    Parse the display text of the normalised tables into numbers, a column at a time with the vectorised
+    string methods of pandas. The text columns are kept and numeric columns are added:
+    prize in minor units (e.g. pence) and its currency, decimal odds and implied probability,
+    distance in yards, total weight in lb. The ratings (OR, TS, RPR) become numbers, "–" becomes null.
+    A value that cannot be parsed is null.
+    """
+
+    CURRENCIES = {"£": "GBP", "€": "EUR", "$": "USD"}
+
+    YARDS_PER_MILE = 1760
+    YARDS_PER_FURLONG = 220
+    LB_PER_STONE = 14
+
+    RATING_COLUMNS = ("horse_or", "horse_ts", "horse_rpr")
+
+    @classmethod
+    def parse(cls, df_race : pd.DataFrame, df_prize : pd.DataFrame, df_horse : pd.DataFrame) \
+        -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Add the numeric columns to the tables of RacingPostNormalizer.normalize
+
+        Parameters
+        ------------
+        df_race: pd.DataFrame
+            race_info table
+        df_prize: pd.DataFrame
+            prize_info table
+        df_horse: pd.DataFrame
+            horse_record table
+
+        Returns
+        ------------
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+            New race_info, prize_info and horse_record tables with the numeric columns
+        """
+        df_race = df_race.copy()
+        df_race["distance_yards"] = cls.parse_distance(df_race["distance"])
+
+        df_prize = df_prize.copy()
+        df_prize["prize_minor"], df_prize["prize_currency"] = cls.parse_prize(df_prize["prize"])
+
+        df_horse = df_horse.copy()
+        df_horse["horse_odd_decimal"], df_horse["horse_implied_probability"] = cls.parse_odds(df_horse["horse_odd"])
+        df_horse["horse_weight_lb"] = cls.parse_weight(df_horse["horse_st"], df_horse["horse_lb"])
+
+        for column in cls.RATING_COLUMNS:
+            df_horse[column] = cls.parse_integer(df_horse[column])
+
+        return df_race, df_prize, df_horse
+
+    @staticmethod
+    def parse_integer(values : pd.Series) -> pd.Series:
+        """
+        Integers of a text column, e.g. "112", null for "–" or an empty value
+        """
+        import pandas as pd
+
+        return pd.to_numeric(values.astype("string").str.strip(), errors="coerce").round().astype("Int64")
+
+    @classmethod
+    def parse_prize(cls, values : pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Prize in minor units and its currency, e.g. "£44,444.44" is (4444444, "GBP")
+        """
+        import pandas as pd
+
+        parts = values.astype("string").str.strip().str.extract(r"^(?P<symbol>[^\d\s]*)\s*(?P<amount>\d[\d,]*(?:\.\d+)?)$")
+
+        amount = pd.to_numeric(parts["amount"].str.replace(",", "", regex=False), errors="coerce")
+        minor = (amount * 100).round().astype("Int64")
+        currency = parts["symbol"].map(cls.CURRENCIES).astype("string")
+
+        return minor, currency
+
+    @staticmethod
+    def parse_odds(values : pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Decimal odds and implied probability of fractional odds, e.g. "207/10" is (21.7, 0.046),
+        "9/4F" (favourite) is (3.25, 0.308) and "Evs" is (2.0, 0.5)
+        """
+        import pandas as pd
+
+        text = values.astype("string").str.strip()
+        parts = text.str.extract(r"^(?P<numerator>\d+)/(?P<denominator>\d+)")
+
+        numerator = pd.to_numeric(parts["numerator"], errors="coerce")
+        denominator = pd.to_numeric(parts["denominator"], errors="coerce")
+
+        decimal = (numerator / denominator.where(denominator > 0) + 1).astype("Float64")
+        decimal = decimal.mask(text.str.match(r"^Evs|^Evens", case=False).fillna(False), 2.0)
+
+        return decimal, 1 / decimal
+
+    @classmethod
+    def parse_distance(cls, values : pd.Series) -> pd.Series:
+        """
+        Distance in yards, e.g. "(2m3f66yds)" is 4246 and "1m" is 1760
+        """
+        import pandas as pd
+
+        parts = values.astype("string").str.strip(" ()").str.extract(r"^(?:(?P<m>\d+)m)?\s*(?:(?P<f>\d+)f)?\s*(?:(?P<y>\d+)y(?:ds?)?)?$")
+        parts = parts.apply(pd.to_numeric, errors="coerce")
+
+        yards = parts["m"].fillna(0) * cls.YARDS_PER_MILE + parts["f"].fillna(0) * cls.YARDS_PER_FURLONG + parts["y"].fillna(0)
+
+        # nothing matched, e.g. an empty distance
+        return yards.where(parts.notna().any(axis=1)).round().astype("Int64")
+
+    @classmethod
+    def parse_weight(cls, stones : pd.Series, pounds : pd.Series) -> pd.Series:
+        """
+        Total weight in lb of the weight in stones and pounds, e.g. 9st 13lb is 139
+        """
+        return cls.parse_integer(stones) * cls.LB_PER_STONE + cls.parse_integer(pounds)
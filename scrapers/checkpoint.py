@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+from typing import List
+
+class JsonlCheckpoint():
+    """
+    Append-only JSON Lines file of the records captured so far. Every record is flushed and
+    fsync'ed as soon as it is appended, so a crash loses at most the record being written;
+    a truncated last line is ignored when the checkpoint is loaded again.
+    """
+    def __init__(self, file_path : str) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_path: str
+            File path of the checkpoint, the folder is created on the first append
+        """
+        self.file_path = file_path
+        self._lock = threading.Lock()
+
+    def load(self) -> List[dict]:
+        """
+        Read the records of a previous run
+
+        Returns
+        ----------
+        List[dict]:
+            Records in the order they were appended, empty if there is no checkpoint
+        """
+        records = []
+        valid_size = 0
+
+        try:
+            with open(self.file_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete line")
+
+                        records.append(json.loads(line))
+                        valid_size += len(line)
+                    except ValueError:
+                        # the last record was being written when the process stopped
+                        print(f"Skip incomplete record in {self.file_path}")
+                        break
+        except FileNotFoundError:
+            return records
+
+        # drop the incomplete tail, so the next record starts on a new line
+        if valid_size < os.path.getsize(self.file_path):
+            with open(self.file_path, "r+b") as f:
+                f.truncate(valid_size)
+
+        return records
+
+    def append(self, record : dict) -> None:
+        """
+        Append a record durably, it can be called from several threads
+
+        Parameters
+        ----------
+        record: dict
+            Record in dictionary format
+        """
+        line = json.dumps(record) + "\n"
+
+        with self._lock:
+            folder = os.path.dirname(self.file_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+            with open(self.file_path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        """
+        Remove the checkpoint once its records are saved somewhere else
+        """
+        with self._lock:
+            try:
+                os.remove(self.file_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Callable
+
+class WebDriverCommandCounter():
+    """
+    Count the WebDriver commands (HTTP round trips to chromedriver) sent by a driver.
+
+    Every command issued by the driver or by any of its WebElements goes through
+    WebDriver.execute, so wrapping it on the driver instance is enough to count
+    find_element, .text, get_attribute, execute_script, ... calls alike.
+    """
+    def __init__(self, driver : Any) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        driver: WebDriver
+            The driver to be counted
+        """
+        self.driver = driver
+        self.commands = Counter()
+        self._execute = driver.execute
+
+        driver.execute = self._counting_execute(self._execute)
+        driver.command_counter = self
+
+    @classmethod
+    def attach(cls, driver : Any) -> WebDriverCommandCounter:
+        """
+        Get the counter of a driver, a driver shared by several scrapers is only wrapped once
+
+        Parameters
+        ----------
+        driver: WebDriver
+            The driver to be counted
+
+        Returns
+        ----------
+        WebDriverCommandCounter
+            The counter already attached to the driver or a new one
+        """
+        counter = getattr(driver, "command_counter", None)
+        return counter if isinstance(counter, cls) else cls(driver)
+
+    def _counting_execute(self, execute : Callable) -> Callable:
+        def counting_execute(driver_command : str, params : dict = None) -> Any:
+            self.commands[driver_command] += 1
+            return execute(driver_command, params)
+
+        return counting_execute
+
+    @property
+    def total(self) -> int:
+        """
+        Returns
+        ----------
+        int
+            Number of commands sent since the last reset
+        """
+        return sum(self.commands.values())
+
+    def reset(self) -> int:
+        """
+        Reset the counter
+
+        Returns
+        ----------
+        int
+            Number of commands sent before the reset
+        """
+        total = self.total
+        self.commands.clear()
+
+        return total
+
+    def detach(self) -> None:
+        """
+        Restore the original execute method of the driver
+        """
+        self.driver.execute = self._execute
+        self.driver.command_counter = None
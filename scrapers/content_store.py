@@ -0,0 +1,92 @@
+import hashlib
+import os
+from typing import Optional, Tuple
+
+class ContentAddressedStore():
+    """
+    Store files under the SHA-256 of their content, as {root}/{first characters of the hash}/{hash}{extension}.
+    A file with the same content is only stored once, whatever its name or where it comes from.
+    """
+    def __init__(self, root : str, prefix_length : int = 2) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        root: str
+            Root folder of the store
+        prefix_length: int
+            Number of characters of the hash used as the sub folder, it keeps the folders small
+        """
+        if not root.endswith("/"):
+            root += "/"
+
+        self.root = root
+        self.prefix_length = prefix_length
+
+    @staticmethod
+    def hash_file(file_path : str) -> Optional[str]:
+        """
+        SHA-256 of a file
+
+        Returns
+        ----------
+        Optional[str]:
+            Hex digest or None if the file cannot be read
+        """
+        digest = hashlib.sha256()
+
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+
+        return digest.hexdigest()
+
+    def key(self, content_hash : str, extension : str = "") -> str:
+        """
+        Key of a content relative to the root, e.g. 3f/3fa2...e1.svg
+        """
+        return f"{content_hash[:self.prefix_length]}/{content_hash}{extension}"
+
+    def path(self, key : str) -> str:
+        """
+        Local path of a key
+        """
+        return self.root + key
+
+    def add(self, file_path : str, extension : str = None) -> Optional[Tuple[str, str]]:
+        """
+        Move a file into the store, the file is removed if the same content is already stored
+
+        Parameters
+        ----------
+        file_path: str
+            File to be stored
+        extension: str
+            Extension of the stored file. Default: None, it means the extension of file_path
+
+        Returns
+        ----------
+        Optional[Tuple[str, str]]:
+            (key, content hash) or None if the file cannot be read
+        """
+        content_hash = self.hash_file(file_path)
+        if not content_hash:
+            return None
+
+        if extension is None:
+            extension = os.path.splitext(file_path)[1]
+
+        key = self.key(content_hash, extension)
+        target = self.path(key)
+
+        if os.path.exists(target):
+            os.remove(file_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(file_path, target)
+
+        return key, content_hash
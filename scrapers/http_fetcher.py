@@ -0,0 +1,88 @@
+import requests
+import time
+from requests.adapters import HTTPAdapter
+from scrapers.rate_limiter import RateLimiter
+from typing import Any
+
+class HttpFetcher():
+    """
+    Fetch pages over plain HTTP with a pooled requests.Session. The session keeps the connections
+    alive between requests, accepts gzip responses and can take over the cookies (e.g. the cookie
+    consent) and the user agent of a Selenium session, so pages that don't need JavaScript can be
+    fetched without the browser.
+    """
+    def __init__(self, pool_size : int = 10, timeout : int = 30, rate_limiter : RateLimiter = None) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        pool_size: int
+            Number of connections kept alive for each host
+        timeout: int
+            Timeout in seconds for each request
+        rate_limiter: RateLimiter
+            Rate limiter shared with the other requests to the same hosts, no limit if not specified
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def copy_browser_session(self, driver : Any) -> None:
+        """
+        Copy cookies and the user agent from a Selenium session
+
+        Parameters
+        ----------
+        driver: WebDriver
+            The driver that the cookies are copied from
+        """
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"], \
+                domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+        user_agent = driver.execute_script("return navigator.userAgent")
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent.replace("HeadlessChrome", "Chrome")
+
+    def get(self, url : str) -> str:
+        """
+        Get a page
+
+        Parameters
+        ----------
+        url: str
+            URL of the page
+
+        Returns
+        ----------
+        str:
+            Page source, decoded according to the response
+        """
+        if self.rate_limiter:
+            self.rate_limiter.wait(url)
+
+        start = time.monotonic()
+        response = self.session.get(url, timeout=self.timeout)
+
+        if self.rate_limiter:
+            self.rate_limiter.report(url, response.status_code, time.monotonic() - start)
+
+        response.raise_for_status()
+
+        return response.text
+
+    def close(self) -> None:
+        """
+        Close the pooled connections
+        """
+        self.session.close()
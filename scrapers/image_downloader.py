@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import requests
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+from scrapers.rate_limiter import RateLimiter
+from typing import Dict, Hashable, Optional, Tuple
+
+class ImageDownloader():
+    """
+    Download images concurrently with a shared requests.Session. The connections are kept alive
+    and reused by the worker threads, failed requests (connection errors, 429 and 5xx) are retried
+    with an exponential backoff, and the number of downloads from the same host at the same time
+    is capped by max_per_host.
+    """
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, workers : int = 8, max_per_host : int = None, retries : int = 3, backoff : float = 0.5, \
+        timeout : int = 30, rate_limiter : RateLimiter = None) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        workers: int
+            Number of images downloaded at the same time, also the size of the connection pool
+        max_per_host: int
+            Maximum number of downloads from the same host at the same time. Default: None, it means up to workers
+        retries: int
+            Number of retries of a failed request
+        backoff: float
+            Backoff factor of the retries, the n-th retry waits backoff * 2 ** (n - 1) seconds
+        timeout: int
+            Timeout in seconds for each request
+        rate_limiter: RateLimiter
+            Rate limiter shared with the other requests to the same hosts, no limit if not specified
+        """
+        if workers < 1:
+            raise ValueError(f"Number of workers should be at least 1 but found {workers}")
+
+        self.workers = workers
+        self.max_per_host = max_per_host if max_per_host else workers
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff, \
+            status_forcelist=self.RETRY_STATUS, allowed_methods=["GET"], raise_on_status=False)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+
+    def _host_limit(self, url : str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._host_limits[urlparse(url).netloc]
+
+    def download(self, url : str, img_path : str, file_name : str = None) -> Optional[str]:
+        """
+        Download a image from an URL and save to the path
+
+        Parameters
+        ------------
+        url: str
+            URL of the image
+        img_path: str
+            path to store the image
+        file_name: str
+            file name for the downloaded image
+
+        Returns
+        ------------
+        Optional[str]:
+            Local file name if the image is downloaded successfully or None if unable to download
+        """
+        local_filename = file_name if file_name else url.split('/')[-1]
+
+        with self._host_limit(url):
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.wait(url)
+
+                start = time.monotonic()
+
+                with self.session.get(url, stream=True, timeout=self.timeout) as r:
+                    if self.rate_limiter:
+                        self.rate_limiter.report(url, r.status_code, time.monotonic() - start)
+
+                    r.raise_for_status()
+
+                    os.makedirs(img_path, exist_ok=True)
+
+                    # write to a temporary file, a failed download doesn't leave half an image
+                    temp_file = img_path + local_filename + ".part"
+                    with open(temp_file, 'wb') as f:
+                        for chunk in r.iter_content(chunk_size=8192):
+                            f.write(chunk)
+
+                    os.replace(temp_file, img_path + local_filename)
+
+                    return local_filename
+            except (requests.RequestException, OSError) as e:
+                print(e)
+
+        return None
+
+    def download_all(self, jobs : Dict[Hashable, Tuple[str, str]]) -> Dict[Hashable, Optional[str]]:
+        """
+        Download images concurrently
+
+        Parameters
+        ------------
+        jobs: Dict[Hashable, Tuple[str, str]]
+            (URL, path to store the image) of each key, e.g. (race_id, horse index)
+
+        Returns
+        ------------
+        Dict[Hashable, Optional[str]]:
+            Local file name of each key, None if the image cannot be downloaded
+        """
+        if not jobs:
+            return {}
+
+        keys = list(jobs)
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(keys)), thread_name_prefix="image") as executor:
+            file_names = executor.map(lambda key: self.download(*jobs[key]), keys)
+
+            return dict(zip(keys, file_names))
+
+    def close(self) -> None:
+        """
+        Close the pooled connections
+        """
+        self.session.close()
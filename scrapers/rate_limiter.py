@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from typing import Callable, Dict
+
+@dataclass
+class HostBucket():
+    """
+    Token bucket state of a host
+    """
+    rate: float
+    tokens: float
+    updated: float
+    backoff: float = 1.0
+    throttled: float = 0.0
+    requests: int = 0
+
+class RateLimiter():
+    """
+    A token bucket rate limiter keyed by host, shared by everything that sends requests to a site.
+
+    Each host gets its own request rate (requests per second) with a small burst, plus a random
+    jitter on top of every wait. When a host answers with HTTP 429 / 5xx or responds slowly the rate
+    of that host is halved (up to max_backoff times slower) and it recovers gradually afterwards.
+    The time spent waiting is recorded for each host.
+    """
+    def __init__(self, rates : Dict[str, float] = None, default_rate : float = 1.0, burst : int = 1, jitter : float = 0.0, \
+        slow_seconds : float = 10.0, max_backoff : float = 16.0, sleep : Callable[[float], None] = time.sleep, \
+        clock : Callable[[], float] = time.monotonic) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        rates: Dict[str, float]
+            Requests per second for each host, e.g. {"racingpost.com": 0.2}
+        default_rate: float
+            Requests per second for the hosts not in rates
+        burst: int
+            Number of requests allowed back to back
+        jitter: float
+            Maximum random seconds added to every wait
+        slow_seconds: float
+            A response taking longer than this is treated as a sign of load and backs off the host
+        max_backoff: float
+            Maximum factor the rate of a host is slowed down by
+        sleep: Callable
+            Function for sleeping, replaceable for testing
+        clock: Callable
+            Monotonic clock in seconds, replaceable for testing
+        """
+        self.rates = { self.host_key(host): rate for host, rate in (rates or {}).items() }
+        self.default_rate = default_rate
+        self.burst = burst
+        self.jitter = jitter
+        self.slow_seconds = slow_seconds
+        self.max_backoff = max_backoff
+
+        self.sleep = sleep
+        self.clock = clock
+
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url : str) -> str:
+        """
+        Key of the host for an URL or a host name, sub domains share the key of their site
+
+        Parameters
+        ----------
+        url: str
+            URL or host name, e.g. https://www.racingpost.com/results/ or www.racingpost.com
+
+        Returns
+        ----------
+        str:
+            Host key, e.g. racingpost.com
+        """
+        host = (urlparse(url).hostname if "//" in url else url.split(":")[0]) or ""
+
+        if host.replace(".", "").isdigit():
+            return host
+
+        return ".".join(host.lower().split(".")[-2:])
+
+    def _bucket(self, host : str) -> HostBucket:
+        if host not in self.buckets:
+            self.buckets[host] = HostBucket(rate=self.rates.get(host, self.default_rate), tokens=self.burst, updated=self.clock())
+
+        return self.buckets[host]
+
+    def wait(self, url : str) -> float:
+        """
+        Wait until a request to the host of the URL is allowed
+
+        Parameters
+        ----------
+        url: str
+            URL of the request
+
+        Returns
+        ----------
+        float:
+            Seconds waited
+        """
+        host = self.host_key(url)
+
+        with self._lock:
+            bucket = self._bucket(host)
+            now = self.clock()
+            rate = bucket.rate / bucket.backoff
+
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+
+            # take a token, a negative balance reserves a slot for the waiting requests
+            delay = max(0.0, (1 - bucket.tokens) / rate)
+            bucket.tokens -= 1
+
+            delay += random.uniform(0, self.jitter) if self.jitter > 0 else 0
+            bucket.throttled += delay
+            bucket.requests += 1
+
+        if delay > 0:
+            self.sleep(delay)
+
+        return delay
+
+    def report(self, url : str, status_code : int = None, elapsed : float = None) -> None:
+        """
+        Report the response of a request, the host backs off on HTTP 429, 5xx or a slow response
+        and recovers gradually on normal responses
+
+        Parameters
+        ----------
+        url: str
+            URL of the request
+        status_code: int
+            HTTP status code of the response, None if unknown (e.g. page loaded in browser)
+        elapsed: float
+            Seconds taken by the request
+        """
+        host = self.host_key(url)
+        overloaded = (status_code is not None and (status_code == 429 or status_code >= 500)) \
+            or (elapsed is not None and elapsed > self.slow_seconds)
+
+        with self._lock:
+            bucket = self._bucket(host)
+
+            if overloaded:
+                bucket.backoff = min(self.max_backoff, bucket.backoff * 2)
+                print(f"Slowing down requests to {host} by {bucket.backoff:g}x (status {status_code}, {elapsed or 0:.1f}s)")
+            else:
+                bucket.backoff = max(1.0, bucket.backoff * 0.75)
+
+    def throttled_seconds(self, url : str = None) -> float:
+        """
+        Seconds spent waiting
+
+        Parameters
+        ----------
+        url: str
+            URL or host name, all hosts if not specified
+
+        Returns
+        ----------
+        float:
+            Seconds spent waiting for the host or all hosts
+        """
+        with self._lock:
+            if url:
+                bucket = self.buckets.get(self.host_key(url))
+                return bucket.throttled if bucket else 0.0
+
+            return sum(bucket.throttled for bucket in self.buckets.values())
+
+    def summary(self) -> str:
+        """
+        Summary of requests and time spent waiting for each host
+
+        Returns
+        ----------
+        str:
+            One line for each host
+        """
+        with self._lock:
+            return "\n".join(f"{host}: {bucket.requests} requests, {bucket.throttled:.1f}s throttled" \
+                for host, bucket in sorted(self.buckets.items()))
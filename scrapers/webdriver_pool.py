@@ -0,0 +1,189 @@
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from selenium.common.exceptions import WebDriverException
+from typing import Any, Callable, List, Optional
+
+class WebDriverPool():
+    """
+    A bounded pool of web drivers for scraping pages concurrently.
+
+    Drivers are created on demand up to the size of the pool and reused between pages. The number
+    of pages loaded from the same host at the same time is capped by max_per_host to stay polite.
+    """
+    def __init__(self, size : int, driver_factory : Callable[[], Any], max_per_host : int = None, \
+        initializer : Callable[[Any], None] = None) -> None:
+        """
+        Constructor
+
+        Parameters
+        ----------
+        size: int
+            Maximum number of drivers
+        driver_factory: Callable
+            Function to create a new driver, e.g. WebScrapper.create_driver
+        max_per_host: int
+            Maximum number of pages loaded from the same host at the same time.
+            Default: None, it means up to the size of the pool
+        initializer: Callable
+            Function called with every new driver before it is used, e.g. for copying cookies
+        """
+        if size < 1:
+            raise ValueError(f"Pool size should be at least 1 but found {size}")
+
+        self.size = size
+        self.driver_factory = driver_factory
+        self.max_per_host = max_per_host if max_per_host else size
+        self.initializer = initializer
+
+        self.drivers = []
+        self._created = 0
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+
+    def _checkout(self) -> Any:
+        """
+        Take an idle driver or create one if the pool isn't full yet. The slot is reserved under the lock
+        and the driver is created outside it, so several drivers can start at the same time
+        """
+        while True:
+            with self._lock:
+                reserved = self._idle.empty() and self._created < self.size
+                if reserved:
+                    self._created += 1
+
+            if reserved:
+                return self._create()
+
+            driver = self._idle.get()
+
+            # None wakes up a page waiting for a driver after a slot is released, the slot is taken again
+            if driver is not None:
+                return driver
+
+    def _create(self) -> Any:
+        """
+        Create and initialise a driver in a reserved slot, the slot is released if it fails
+        """
+        driver = None
+
+        try:
+            driver = self.driver_factory()
+
+            if self.initializer:
+                self.initializer(driver)
+        except BaseException:
+            if driver is not None:
+                self._quit(driver)
+
+            self._release()
+            raise
+
+        with self._lock:
+            self.drivers.append(driver)
+
+        return driver
+
+    def _checkin(self, driver : Any) -> None:
+        self._idle.put(driver)
+
+    def _discard(self, driver : Any) -> None:
+        """
+        Quit a driver which raised an error (e.g. a crashed Chrome) and free its slot for a new driver
+        """
+        with self._lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+
+        self._quit(driver)
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._created -= 1
+
+        self._idle.put(None)
+
+    @staticmethod
+    def _quit(driver : Any) -> None:
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            print(e)
+
+    def _host_limit(self, url : str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._host_limits[urlparse(url).netloc]
+
+    def run(self, func : Callable[[Any, str], Any], url : str) -> Optional[Any]:
+        """
+        Run a function with a driver from the pool
+
+        Parameters
+        ----------
+        func: Callable
+            Function called with a driver and the url, e.g. to load and parse a page
+        url: str
+            The URL of the page
+
+        Returns
+        ----------
+        Optional[Any]:
+            Result of the function or None if the driver raised an error
+        """
+        try:
+            driver = self._checkout()
+        except Exception as e:
+            print(f"Driver cannot be created for {url}: {e}")
+            return None
+
+        try:
+            with self._host_limit(url):
+                result = func(driver, url)
+        except WebDriverException as e:
+            print(e)
+
+            # the session may be lost, a new driver takes its slot
+            self._discard(driver)
+            return None
+        except BaseException:
+            self._checkin(driver)
+            raise
+
+        self._checkin(driver)
+
+        return result
+
+    def map(self, func : Callable[[Any, str], Any], urls : List[str]) -> List[Optional[Any]]:
+        """
+        Spread the URLs over the drivers in the pool
+
+        Parameters
+        ----------
+        func: Callable
+            Function called with a driver and each url
+        urls: List[str]
+            URLs of the pages
+
+        Returns
+        ----------
+        List[Optional[Any]]:
+            Results in the same order as the URLs, None for the pages which failed
+        """
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(lambda url: self.run(func, url), urls))
+
+    def quit(self) -> None:
+        """
+        Quit every driver created by the pool
+        """
+        with self._lock:
+            for driver in self.drivers:
+                self._quit(driver)
+
+            self.drivers = []
+            self._created = 0
+            self._idle = queue.Queue()
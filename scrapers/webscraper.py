@@ -1,5 +1,6 @@
 import requests
 import os
+import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -9,12 +10,65 @@ from selenium.common.exceptions import *
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.remote.webelement import WebElement
 from typing import Optional, Any, Tuple, List
+from scrapers.command_counter import WebDriverCommandCounter
+from scrapers.rate_limiter import RateLimiter
+
+# Resolve as soon as an element matching the XPath is attached to the document. A MutationObserver
+# is notified by the browser on every DOM change, so there is no polling interval to wait for.
+WAIT_FOR_XPATH_SCRIPT = """
+var xpath = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+
+function found() {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+}
+
+if (found()) {
+    done(true);
+    return;
+}
+
+var timer = null;
+var observer = new MutationObserver(function () {
+    if (found()) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+
+observer.observe(document.documentElement || document, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () {
+    observer.disconnect();
+    done(found());
+}, timeout);
+"""
+
+# Resources blocked by the resource blocking profile. Images are blocked by the content settings
+# and fonts by --disable-remote-fonts for every window, the patterns below are blocked through
+# DevTools on the driver's own window, and the domains are not resolved by the browser at all.
+# Only the loading is blocked, the src attribute of an image is kept in the page.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+]
+
+BLOCKED_DOMAINS = [
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+    "google-analytics.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com",
+    "rubiconproject.com", "pubmatic.com", "casalemedia.com", "criteo.com", "criteo.net",
+    "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com", "chartbeat.com",
+    "chartbeat.net", "hotjar.com", "facebook.net", "connect.facebook.net", "twitter.com",
+    "ads-twitter.com", "moatads.com", "teads.tv", "smartadserver.com", "permutive.com",
+]
 
 class WebScrapper():
     """
     This is the base class of doing web scraping
     """
-    def __init__(self, url : str, image_path : str = None, out_path : str = None, out_file : str = None, force_capture : bool = False, is_testing : bool = False) -> None:
+    def __init__(self, url : str, image_path : str = None, out_path : str = None, out_file : str = None, force_capture : bool = False, is_testing : bool = False, \
+        poll_frequency : float = 0.1, page_load_strategy : str = "normal", block_resources : bool = False, \
+        blocked_domains : List[str] = None, driver : webdriver.Chrome = None, user_data_dir : str = None) -> None:
         """
         Constructor
         Parameters
@@ -31,18 +85,39 @@ class WebScrapper():
             Capture the races that have already existed in the database 
         is_testing: bool
             Whether the process is run in testing mode
+        poll_frequency: float
+            Seconds between two checks when waiting for an expected condition
+        page_load_strategy: str
+            Page load strategy of Chrome, "normal" waits for all resources, 
+            "eager" returns once the DOM is ready and leaves the rest to the waits
+        block_resources: bool
+            Don't load images, fonts, media and the ad/analytics domains
+        blocked_domains: List[str]
+            Domains to be blocked with block_resources. Default: None, it means BLOCKED_DOMAINS
+        driver: webdriver.Chrome
+            A long-lived driver shared with other scrapers, it is not closed by stop_scraping. 
+            Default: None, it means a new driver is created for this scraper
+        user_data_dir: str
+            Chrome profile folder kept between runs (cookies, cache), only used when a new driver is created
         """
 
         print(url, image_path, out_path, out_file)
 
         self.url = url
+        self.poll_frequency = poll_frequency
 
-        options = Options()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--headless")
-        options.add_argument("--disable-dev-shm-usage")
+        # settings for every driver created for this scraper
+        self.driver_settings = {
+            "page_load_strategy": page_load_strategy,
+            "blocked_resources": BLOCKED_URL_PATTERNS if block_resources else None,
+            "blocked_domains": (blocked_domains if blocked_domains is not None else BLOCKED_DOMAINS) if block_resources else None,
+        }
 
-        self.driver = webdriver.Chrome(options=options)
+        # Chrome is only started when the driver is used for the first time,
+        # so jobs working from the cached raw data don't launch a browser
+        self.owns_driver = driver is None
+        self.user_data_dir = user_data_dir
+        self._driver = driver
 
         if not image_path.endswith("/"):
             image_path += "/"
@@ -65,12 +140,91 @@ class WebScrapper():
         print(f"Raw data file {self.out_path + self.out_file}")
         print("================================================")
 
+    @property
+    def driver(self) -> webdriver.Chrome:
+        """
+        The web driver of this scraper, created on first use
+
+        Returns
+        ----------
+        webdriver.Chrome:
+            The shared driver or a new driver created with the settings of this scraper
+        """
+        if self._driver is None:
+            self._driver = self.create_driver(**self.driver_settings, user_data_dir=self.user_data_dir)
+
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver : webdriver.Chrome) -> None:
+        self._driver = driver
+
+    @property
+    def command_counter(self) -> WebDriverCommandCounter:
+        """
+        The counter of the WebDriver commands sent by the driver, the driver is created if needed
+        """
+        return WebDriverCommandCounter.attach(self.driver)
+
     def process(self) -> None:
         """
         Please write your own function in the subclass
         """
         pass
 
+    @staticmethod
+    def create_driver(page_load_strategy : str = "normal", blocked_resources : List[str] = None, \
+        blocked_domains : List[str] = None, user_data_dir : str = None) -> webdriver.Chrome:
+        """
+        Create a headless Chrome driver
+
+        Parameters
+        ----------
+        page_load_strategy: str
+            Page load strategy, either "normal", "eager" or "none"
+        blocked_resources: List[str]
+            URL patterns not to be loaded, e.g. BLOCKED_URL_PATTERNS. Images and fonts are blocked in
+            every window when it is set, nothing is blocked if not specified
+        blocked_domains: List[str]
+            Domains (and their sub domains) not to be loaded, e.g. BLOCKED_DOMAINS
+        user_data_dir: str
+            Chrome profile folder, cookies (e.g. the cookie consent) and cache are kept in the folder 
+            between runs. A folder can only be used by one driver at a time. 
+            Default: None, it means a temporary profile
+
+        Returns
+        ----------
+        webdriver.Chrome
+            The driver
+        """
+        options = Options()
+        options.add_argument("--no-sandbox")
+        options.add_argument("--headless")
+        options.add_argument("--disable-dev-shm-usage")
+        options.page_load_strategy = page_load_strategy
+
+        if user_data_dir:
+            options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+
+        if blocked_resources:
+            options.add_argument("--disable-remote-fonts")
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+        if blocked_domains:
+            rules = ", ".join(f"MAP {domain} ~NOTFOUND, MAP *.{domain} ~NOTFOUND" for domain in blocked_domains)
+            options.add_argument(f"--host-resolver-rules={rules}")
+
+        driver = webdriver.Chrome(options=options)
+
+        blocked_urls = list(blocked_resources or []) + [f"*://*.{domain}/*" for domain in blocked_domains or []] \
+            + [f"*://{domain}/*" for domain in blocked_domains or []]
+
+        if blocked_urls:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+
+        return driver
+
     def load_url(self, wait_seconds : int = 10, wait_until : Any = None) -> None:
         """
         Ask Chrome to open the url and wait the accept cookies button appear
@@ -90,7 +244,7 @@ class WebScrapper():
         self.driver.get(self.url)
 
         if wait_until:
-            wait = WebDriverWait(self.driver, wait_seconds, poll_frequency=1)
+            wait = WebDriverWait(self.driver, wait_seconds, poll_frequency=self.poll_frequency)
             wait.until(wait_until)
 
     def get_EC_element_clickable(self, xpath : str = None, element_class : str = None, element_id : str = None) -> Optional[EC.element_to_be_clickable]:
@@ -156,6 +310,37 @@ class WebScrapper():
 
         return until
     
+    def get_EC_element_invisible(self, xpath : str = None, element_class : str = None, element_id : str = None) -> Optional[EC.invisibility_of_element_located]:
+        """
+        A helper class to get an element to be invisible or removed object, 
+        either one of xpath, class or id should be inputed to get the element
+
+        Parameters
+        ------------
+        xpath: str
+            xpath of the element
+        element_class: str
+            class name of the element
+        element_id: str
+            element ID of the element
+
+        Returns
+        -------------
+        invisibility_of_element_located
+            element to be invisible class searching by either xpath, class or id
+
+        """
+        until = None 
+
+        if xpath:
+            until = EC.invisibility_of_element_located((By.XPATH, xpath))
+        elif element_class:
+            until = EC.invisibility_of_element_located((By.CLASS_NAME, element_class))
+        elif element_id:
+            until = EC.invisibility_of_element_located((By.ID, element_id))
+
+        return until
+
     def get_EC_window_open(self) -> EC.new_window_is_opened:
         """
         A helper class to get an EC object for a window is opened, 
@@ -169,7 +354,7 @@ class WebScrapper():
         handles = self.driver.window_handles
         return EC.new_window_is_opened(handles)
 
-    def wait_until(self, until : Any, wait_secounds : int = 10) -> None:
+    def wait_until(self, until : Any, wait_secounds : int = 10, driver : webdriver.Chrome = None) -> None:
         """
         Ask Selenium to wait for something happen in some seconds 
 
@@ -179,13 +364,52 @@ class WebScrapper():
             Any object from expected condition (EC) class
         wait_seconds: int
             number of seconds to be waited
+        driver: webdriver.Chrome
+            The driver to wait for, the driver of this scraper if not specified
         
         """
         try:
-            WebDriverWait(self.driver, wait_secounds, poll_frequency=1).until(until)
+            WebDriverWait(driver if driver else self.driver, wait_secounds, poll_frequency=self.poll_frequency).until(until)
         except TimeoutException as e:
             print(e)
 
+    def wait_for_xpath(self, xpath : str, wait_seconds : int = 10, driver : webdriver.Chrome = None) -> bool:
+        """
+        Wait until an element matching the xpath is attached to the page. The browser reports the DOM changes
+        through a MutationObserver, so it returns as soon as the element appears instead of at the next poll.
+        It falls back to wait_until if the script cannot run, e.g. when the page navigates during the wait
+
+        Parameters
+        ------------
+        xpath: str
+            xpath of the element
+        wait_seconds: int
+            number of seconds to be waited
+        driver: webdriver.Chrome
+            The driver to wait for, the driver of this scraper if not specified
+
+        Returns
+        ------------
+        bool:
+            Whether the element is found
+        
+        """
+        driver = driver if driver else self.driver
+
+        try:
+            driver.set_script_timeout(wait_seconds + 1)
+            if driver.execute_async_script(WAIT_FOR_XPATH_SCRIPT, xpath, int(wait_seconds * 1000)):
+                return True
+
+            print(f"Timeout waiting for {xpath}")
+            return False
+        except WebDriverException as e:
+            print(e)
+
+        self.wait_until(self.get_EC_element_presence(xpath=xpath), wait_seconds, driver)
+
+        return len(driver.find_elements(By.XPATH, xpath)) > 0
+
     def move_to_element(self, xpath : str = None, element_class : str = None, element_id : str = None)  -> None:
         """
         Scroll to element
@@ -371,12 +595,15 @@ class WebScrapper():
     
     def stop_scraping(self) -> None:
         """
-        Simpliy close the web driver and release the resource
+        Simpliy close the web driver and release the resource, 
+        a driver shared with other scrapers is left open for the next scraper
         """
-        self.driver.quit()
+        if self.owns_driver and self._driver is not None:
+            self._driver.quit()
+            self._driver = None
 
     @staticmethod
-    def download_image(url : str, img_path : str, file_name : str = None) -> str:
+    def download_image(url : str, img_path : str, file_name : str = None, rate_limiter : RateLimiter = None) -> str:
         """
         Download a image from an URL and save to the path
         
@@ -388,6 +615,8 @@ class WebScrapper():
             path to store the image
         file_name: str
             file name for the downloaded image
+        rate_limiter: RateLimiter
+            Rate limiter for the host of the image, no limit if not specified
 
         Returns 
         ------------
@@ -399,7 +628,15 @@ class WebScrapper():
         try: 
             local_filename = file_name if file_name else url.split('/')[-1]
             
+            if rate_limiter:
+                rate_limiter.wait(url)
+
+            start = time.monotonic()
+
             with requests.get(url, stream=True) as r:
+                if rate_limiter:
+                    rate_limiter.report(url, r.status_code, time.monotonic() - start)
+
                 r.raise_for_status()
 
                 os.makedirs(img_path, exist_ok=True)
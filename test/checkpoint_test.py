@@ -0,0 +1,41 @@
+from scrapers.checkpoint import JsonlCheckpoint
+import threading
+
+class TestJsonlCheckpoint():
+    def test_append_and_load(self, tmp_path):
+        checkpoint = JsonlCheckpoint(str(tmp_path / "raw" / "20220221.json.checkpoint.jsonl"))
+
+        assert checkpoint.load() == []
+
+        checkpoint.append({"url": "a", "horse_rank": [{"horse_name": "x"}]})
+        checkpoint.append({"url": "b"})
+
+        assert JsonlCheckpoint(checkpoint.file_path).load() == [{"url": "a", "horse_rank": [{"horse_name": "x"}]}, {"url": "b"}]
+
+        checkpoint.remove()
+        checkpoint.remove()
+        assert checkpoint.load() == []
+
+    def test_incomplete_record(self, tmp_path):
+        checkpoint = JsonlCheckpoint(str(tmp_path / "checkpoint.jsonl"))
+        checkpoint.append({"url": "a"})
+
+        # the process stopped while writing the second record
+        with open(checkpoint.file_path, "a") as f:
+            f.write('{"url": "b", "ti')
+
+        assert checkpoint.load() == [{"url": "a"}]
+
+        checkpoint.append({"url": "c"})
+        assert checkpoint.load() == [{"url": "a"}, {"url": "c"}]
+
+    def test_concurrent_append(self, tmp_path):
+        checkpoint = JsonlCheckpoint(str(tmp_path / "checkpoint.jsonl"))
+
+        threads = [threading.Thread(target=lambda i=i: [checkpoint.append({"id": i, "n": n}) for n in range(20)]) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(checkpoint.load()) == 100
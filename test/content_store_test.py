@@ -0,0 +1,26 @@
+from scrapers.content_store import ContentAddressedStore
+import hashlib
+
+class TestContentAddressedStore():
+    def test_add(self, tmp_path):
+        store = ContentAddressedStore(str(tmp_path / "images"))
+        silk = b"<svg>silk</svg>"
+        content_hash = hashlib.sha256(silk).hexdigest()
+
+        # the same silk downloaded for two races
+        for race in ("race1", "race2"):
+            (tmp_path / race).mkdir()
+            (tmp_path / race / "190532.svg").write_bytes(silk)
+
+        key1, hash1 = store.add(str(tmp_path / "race1" / "190532.svg"))
+        key2, hash2 = store.add(str(tmp_path / "race2" / "190532.svg"))
+
+        assert key1 == key2 == f"{content_hash[:2]}/{content_hash}.svg"
+        assert hash1 == hash2 == content_hash
+        assert open(store.path(key1), "rb").read() == silk
+        assert not (tmp_path / "race1" / "190532.svg").exists()
+        assert not (tmp_path / "race2" / "190532.svg").exists()
+        assert len(list((tmp_path / "images").rglob("*.svg"))) == 1
+
+    def test_missing_file(self, tmp_path):
+        assert ContentAddressedStore(str(tmp_path)).add(str(tmp_path / "missing.svg")) is None
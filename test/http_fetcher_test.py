@@ -0,0 +1,75 @@
+import pytest
+from scrapers.http_fetcher import HttpFetcher
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import requests
+import threading
+
+PAGE = "<html><body><h1>Full result £3,942</h1></body></html>"
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        PageHandler.requests_seen.append((self.path, dict(self.headers), self.client_address[1]))
+
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = gzip.compress(PAGE.encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeDriver():
+    def get_cookies(self):
+        return [{"name": "notice_gdpr_prefs", "value": "0,1,2", "domain": "127.0.0.1", "path": "/"}]
+
+    def execute_script(self, script):
+        return "Mozilla/5.0 HeadlessChrome/99.0"
+
+@pytest.fixture(scope="module")
+def page_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+
+    server.shutdown()
+
+class TestHttpFetcher():
+    def test_get_with_browser_session(self, page_server):
+        PageHandler.requests_seen.clear()
+
+        fetcher = HttpFetcher()
+        fetcher.copy_browser_session(FakeDriver())
+
+        assert fetcher.get(page_server + "/race/1") == PAGE
+        assert fetcher.get(page_server + "/race/2") == PAGE
+        fetcher.close()
+
+        (_, headers, first_port), (_, _, second_port) = PageHandler.requests_seen
+
+        assert "gzip" in headers["Accept-Encoding"]
+        assert headers["Cookie"] == "notice_gdpr_prefs=0,1,2"
+        assert headers["User-Agent"] == "Mozilla/5.0 Chrome/99.0"
+
+        # the connection is kept alive between requests
+        assert first_port == second_port
+
+    def test_get_error(self, page_server):
+        fetcher = HttpFetcher()
+
+        with pytest.raises(requests.HTTPError):
+            fetcher.get(page_server + "/missing")
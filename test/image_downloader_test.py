@@ -0,0 +1,78 @@
+import pytest
+from scrapers.image_downloader import ImageDownloader
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+SILK = b'<svg xmlns="http://www.w3.org/2000/svg" width="40" height="40"></svg>'
+
+class SilkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    ports = set()
+    attempts = {}
+    active = 0
+    max_active = 0
+
+    def do_GET(self):
+        with SilkHandler.lock:
+            SilkHandler.ports.add(self.client_address[1])
+            SilkHandler.attempts[self.path] = SilkHandler.attempts.get(self.path, 0) + 1
+            SilkHandler.active += 1
+            SilkHandler.max_active = max(SilkHandler.max_active, SilkHandler.active)
+            attempt = SilkHandler.attempts[self.path]
+
+        time.sleep(0.05)
+
+        with SilkHandler.lock:
+            SilkHandler.active -= 1
+
+        # the flaky silk fails once before it is served
+        if self.path == "/missing.svg" or (self.path == "/flaky.svg" and attempt == 1):
+            self.send_response(404 if self.path == "/missing.svg" else 503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/svg+xml")
+        self.send_header("Content-Length", str(len(SILK)))
+        self.end_headers()
+        self.wfile.write(SILK)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture()
+def silk_server():
+    SilkHandler.ports, SilkHandler.attempts, SilkHandler.active, SilkHandler.max_active = set(), {}, 0, 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SilkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+
+    server.shutdown()
+
+class TestImageDownloader():
+    def test_download_all(self, silk_server, tmp_path):
+        downloader = ImageDownloader(workers=4, max_per_host=2, backoff=0.01)
+        jobs = {(f"race{i}", 0): (f"{silk_server}/{i}.svg", f"{tmp_path}/race{i}/") for i in range(12)}
+        jobs[("race0", 1)] = (f"{silk_server}/missing.svg", f"{tmp_path}/race0/")
+        jobs[("race1", 1)] = (f"{silk_server}/flaky.svg", f"{tmp_path}/race1/")
+
+        file_names = downloader.download_all(jobs)
+        downloader.close()
+
+        assert file_names[("race3", 0)] == "3.svg"
+        assert (tmp_path / "race3" / "3.svg").read_bytes() == SILK
+        assert file_names[("race0", 1)] is None
+        assert file_names[("race1", 1)] == "flaky.svg"
+        assert SilkHandler.attempts["/flaky.svg"] == 2
+
+        # the connections are reused and the host limit is kept
+        assert SilkHandler.max_active <= 2
+        assert len(SilkHandler.ports) <= 4
+
+    def test_no_jobs(self):
+        assert ImageDownloader().download_all({}) == {}
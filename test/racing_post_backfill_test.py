@@ -0,0 +1,90 @@
+from racing_post.racing_post_backfill import RacingPostBackfill
+from datetime import date
+
+class FakeScraper():
+    uploaded = []
+
+    def __init__(self, race_date, driver):
+        self.race_date = race_date
+        self.driver = driver
+        self.races = [f"{race_date}-1", f"{race_date}-2"]
+        self.cleaned = False
+
+    def scrape(self):
+        if self.race_date == date(2022, 2, 3):
+            raise RuntimeError("chrome crashed")
+
+    def save_raw_data(self):
+        pass
+
+    def upload_s3(self):
+        pass
+
+    def upload_rds(self, races):
+        FakeScraper.uploaded.append(races)
+
+    def export_parquet(self, races):
+        pass
+
+    def cleanup(self):
+        self.cleaned = True
+
+class FakeDriver():
+    def __init__(self):
+        self.quitted = False
+
+    def quit(self):
+        self.quitted = True
+
+class FakeUploader():
+    def __init__(self):
+        self.closed = False
+
+    def close_connection(self):
+        self.closed = True
+
+def create_backfill(monkeypatch, **kwargs):
+    drivers = []
+
+    def create_driver(**settings):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    monkeypatch.setattr("racing_post.racing_post_backfill.WebScrapper.create_driver", staticmethod(create_driver))
+    FakeScraper.uploaded = []
+
+    backfill = RacingPostBackfill(date(2022, 2, 1), date(2022, 2, 5), "./images/", "./raw_data/", \
+        uploader=FakeUploader(), **kwargs)
+    monkeypatch.setattr(backfill, "create_scraper", lambda race_date: FakeScraper(race_date, backfill.worker_driver()))
+
+    return backfill, drivers
+
+class TestBackfill():
+    def test_date_urls(self):
+        dates = list(RacingPostBackfill.date_range(date(2022, 2, 27), date(2022, 3, 2)))
+
+        assert dates == [date(2022, 2, 27), date(2022, 2, 28), date(2022, 3, 1), date(2022, 3, 2)]
+        assert RacingPostBackfill.date_url(dates[0]) == "https://www.racingpost.com/results/2022-02-27/time-order/"
+        assert RacingPostBackfill.date_file(dates[0]) == "20220227.jsonl.gz"
+
+    def test_batches_and_failures(self, monkeypatch):
+        backfill, drivers = create_backfill(monkeypatch, upload_batch_size=2)
+        backfill.process()
+
+        # 2022-02-03 fails, the others are uploaded in batches of 2 dates
+        assert backfill.failed_dates == [date(2022, 2, 3)]
+        assert backfill.race_count == 8
+        assert [len(races) for races in FakeScraper.uploaded] == [4, 2, 2]
+
+        # the driver is reused until it fails, all drivers are closed at the end
+        assert len(drivers) == 2
+        assert all(driver.quitted for driver in drivers)
+        assert not backfill.uploader.closed
+
+    def test_concurrency(self, monkeypatch):
+        backfill, drivers = create_backfill(monkeypatch, concurrency=3, upload_batch_size=5)
+        backfill.process()
+
+        assert sorted(backfill.scraped_dates) == backfill.scraped_dates
+        assert len(backfill.scraped_dates) == 4
+        assert 1 <= len(drivers) <= 4
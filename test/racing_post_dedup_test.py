@@ -0,0 +1,58 @@
+from racing_post.racing_post_dedup import RacingPostDedup
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+import pandas as pd
+import pytest
+
+class FakeUploader():
+    def __init__(self, engine):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if isinstance(self._engine, Exception):
+            raise self._engine
+
+        if self._engine is None:
+            raise OperationalError("connect", {}, Exception("could not connect to server"))
+
+        return self._engine
+
+def create_dedup(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rds.sqlite'}")
+
+    pd.DataFrame({"race_id": ["r1", "r2"], "url": ["https://a/1", "https://a/2"]}).to_sql("race_info", engine, index=False)
+
+    return RacingPostDedup(FakeUploader(engine), cache_file=str(tmp_path / "cache" / "dedup.sqlite"))
+
+class TestRacingPostDedup():
+    def test_find(self, tmp_path):
+        dedup = create_dedup(tmp_path)
+
+        assert dedup.find_races(["https://a/2", "https://a/3", None]) == {"https://a/2": "r2"}
+        assert dedup.find_races([]) == {}
+
+    def test_missing_table(self, tmp_path):
+        dedup = RacingPostDedup(FakeUploader(create_engine("sqlite://")), is_testing=True)
+
+        assert dedup.find_races(["https://a/1"]) == {}
+
+    def test_cache_fallback(self, tmp_path):
+        dedup = create_dedup(tmp_path)
+        dedup.find_races(["https://a/1"])
+        dedup.close()
+
+        # RDS cannot be reached, the URLs seen before are answered by the local cache
+        offline = RacingPostDedup(FakeUploader(None), cache_file=dedup.cache_file)
+
+        assert offline.find_races(["https://a/1", "https://a/2"]) == {"https://a/1": "r1"}
+
+    def test_config_error_not_hidden(self, tmp_path):
+        dedup = create_dedup(tmp_path)
+        dedup.find_races(["https://a/1"])
+
+        # e.g. a key missing in aws.yaml, it's not answered by the local cache
+        broken = RacingPostDedup(FakeUploader(KeyError("aws-rds")), cache_file=dedup.cache_file)
+
+        with pytest.raises(KeyError):
+            broken.find_races(["https://a/1"])
@@ -0,0 +1,103 @@
+from racing_post.racing_post_extractor import RacingPostDetailExtractor, DETAIL_PAGE_SCRIPT
+from racing_post.racing_post_record import Constant, RacingPostRaceRecord
+from scrapers.command_counter import WebDriverCommandCounter
+import uuid
+
+DETAIL_URL = "https://www.racingpost.com/results/1353/newcastle-aw/2022-02-21/802614"
+
+PAYLOAD = {
+    "time": "7:30",
+    "course": "Newcastle (AW)",
+    "date": "21 Feb 2022",
+    "title": "Betway Novice Stakes (GBB Race)",
+    "rating": "(3yo+)",
+    "distance": "5f",
+    "race_class": "(Class 5)",
+    "condition": "Standard To Slow",
+    "prize": "1st £3,942 2nd £1,850.55",
+    "rows": [
+        {"class": "rp-horseTable__mainRow", "pos": "1 (2)", "draw": "(2)", "length": " ", "tds": [
+            {"class": "rp-horseTable__horseCell", "data_ending": None, "text": "", "horse": {
+                "no": "2.", "name": "High Velocity Horse", "name_children": ["Horse"], "country": "(IRE)",
+                "odd": "4/6F", "silk_src": "https://www.rp-assets.com/svg/1/2/3/123.svg",
+                "humans": [{"prefix": "J:", "name": "Jockey One"}, {"prefix": "T:", "name": "Trainer One"}]}},
+            {"class": "rp-horseTable__spanNarrow_age", "data_ending": None, "text": "3"},
+            {"class": "rp-horseTable__wgt", "data_ending": None, "text": "9-2", "spans": [
+                {"class": "rp-horseTable__st", "selector": None, "text": "9", "extra_weight": None},
+                {"class": "", "selector": "horse-weight-lb", "text": "2", "extra_weight": None},
+                {"class": "rp-horseTable__headGear", "selector": None, "text": "t", "extra_weight": None}]},
+            {"class": "", "data_ending": "OR", "text": "–"},
+            {"class": "", "data_ending": "TS", "text": "30"},
+            {"class": "", "data_ending": "RPR", "text": "70"},
+            {"class": "", "data_ending": "MR", "text": "–"}]},
+        {"class": "rp-horseTable__commentRow", "comment": "Made all"},
+        {"class": "rp-horseTable__separator"},
+        {"class": "rp-horseTable__mainRow", "pos": "2", "draw": None, "length": "1", "tds": [
+            {"class": "rp-horseTable__horseCell", "data_ending": None, "text": "", "horse": {
+                "no": "1.", "name": "Top Notch Tommy", "name_children": [], "country": None,
+                "odd": "2/1", "silk_src": "https://www.rp-assets.com/svg/4/5/6/456.svg", "humans": []}}]},
+    ],
+    "extra_info": [{"text": "6 ran Off time: 7:30:34", "svg_titles": []}, {"text": "Non-runnersInfo", "svg_titles": ["Info"]}],
+    "comment": "Race comment",
+}
+
+class FakeDriver():
+    def execute(self, driver_command, params=None):
+        return {"value": driver_command}
+
+    def execute_script(self, script, *args):
+        self.execute("executeScript", {"script": script, "args": list(args)})
+        return PAYLOAD
+
+class TestRacingPostDetailExtractor():
+    def test_build_race_record(self):
+        race = RacingPostDetailExtractor.build_race_record(DETAIL_URL, PAYLOAD)
+
+        assert isinstance(race, RacingPostRaceRecord)
+        assert race.race_id == uuid.uuid5(uuid.NAMESPACE_URL, DETAIL_URL).hex
+        assert race.course == "Newcastle (AW)"
+        assert race.prize.rank == ["1st", "2nd"]
+        assert race.prize.prize == ["£3,942", "£1,850.55"]
+        assert race.race_extra_info == "6 ran Off time: 7:30:34\nNon-runners"
+        assert race.race_info_comment == "Race comment"
+        assert len(race.horse_rank) == 2
+
+        winner, second = race.horse_rank
+        assert winner.horse_rank == "1"
+        assert winner.horse_draw == "2"
+        assert winner.horse_name == "High Velocity "
+        assert winner.horse_silk_url == "https://www.rp-assets.com/svg/1/2/3/123.svg"
+        assert winner.horse_jockey == "Jockey One"
+        assert winner.horse_trainer == "Trainer One"
+        assert (winner.horse_age, winner.horse_st, winner.horse_lb, winner.horse_head_gear) == ("3", "9", "2", "t")
+        assert (winner.horse_or, winner.horse_ts, winner.horse_rpr, winner.horse_mr) == ("–", "30", "70", "–")
+        assert winner.horse_comment == "Made all"
+
+        # silk is captured for the winner only
+        assert second.horse_rank == "2"
+        assert second.horse_draw is None
+        assert second.horse_silk_url is None
+
+    def test_extract_counts_one_command(self):
+        driver = FakeDriver()
+        counter = WebDriverCommandCounter(driver)
+
+        race = RacingPostDetailExtractor.extract(driver, DETAIL_URL)
+
+        assert counter.total == 1
+        assert counter.commands["executeScript"] == 1
+        assert race.time == "7:30"
+
+        assert counter.reset() == 1
+        assert counter.total == 0
+
+        counter.detach()
+        driver.execute("get")
+        assert counter.total == 0
+
+    def test_script_arguments(self):
+        arguments = RacingPostDetailExtractor.script_arguments()
+
+        for name in ("XPATH_RESULT_HORSE_TABLE", "XPATH_RESULT_HORSE_ROW", "ATTRIBUTE_DATA_ENDING", "ATTRIBUTE_TAG_SVG"):
+            assert arguments[name] == getattr(Constant, name)
+            assert f"C.{name}" in DETAIL_PAGE_SCRIPT
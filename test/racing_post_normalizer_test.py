@@ -0,0 +1,38 @@
+from racing_post.racing_post_normalizer import RacingPostNormalizer
+from racing_post.racing_post_raw_data import RacingPostRawData
+import os
+import pandas as pd
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "raw_data", "20220221.json")
+
+class TestNormalizer():
+    def test_normalize(self):
+        races = list(RacingPostRawData(RAW_DATA_FILE).read())
+        df_race, df_prize, df_horse = RacingPostNormalizer.normalize(iter(races))
+
+        race_dicts = [race.to_dictionary() for race in races]
+
+        assert df_race.index.tolist() == [race["race_id"] for race in race_dicts]
+        assert df_race.loc[races[0].race_id, "url"] == races[0].url
+        assert "prize" not in df_race.columns and "horse_rank" not in df_race.columns
+
+        assert df_prize.index.tolist() == [(race["race_id"], rank) for race in race_dicts for rank in race["prize"]]
+        assert df_prize["prize"].tolist() == [prize for race in race_dicts for prize in race["prize"].values()]
+
+        horses = [dict(horse, race_id=race["race_id"]) for race in race_dicts for horse in race["horse_rank"]]
+        expected = pd.DataFrame(horses, columns=RacingPostNormalizer.HORSE_COLUMNS).set_index(RacingPostNormalizer.HORSE_INDEX)
+        pd.testing.assert_frame_equal(df_horse, expected)
+
+    def test_chunks(self):
+        df_race, df_prize, df_horse = RacingPostNormalizer.normalize(RacingPostRawData(RAW_DATA_FILE).read())
+        chunks = list(RacingPostNormalizer.normalize_chunks(RacingPostRawData(RAW_DATA_FILE).read(), 10))
+
+        assert [chunk[0].shape[0] for chunk in chunks] == [10, 10, 3]
+        assert pd.concat([chunk[2] for chunk in chunks]).index.equals(df_horse.index)
+        pd.testing.assert_frame_equal(pd.concat([chunk[1] for chunk in chunks]), df_prize)
+
+    def test_empty(self):
+        df_race, df_prize, df_horse = RacingPostNormalizer.normalize([])
+
+        assert df_race.empty and df_prize.empty and df_horse.empty
+        assert list(df_horse.index.names) == RacingPostNormalizer.HORSE_INDEX
@@ -0,0 +1,56 @@
+from racing_post.racing_post_parquet import RacingPostParquetStore
+from racing_post.racing_post_raw_data import RacingPostRawData
+from racing_post.racing_post_scraper import RacingPostFastResult
+from datetime import date
+import os
+import pytest
+
+RAW_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "raw_data", "")
+
+@pytest.fixture
+def tables(tmp_path):
+    scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+        str(tmp_path) + "/", RAW_DATA_PATH, "20220221.json")
+
+    races = list(RacingPostRawData(RAW_DATA_PATH + "20220221.json").read()) \
+        + list(RacingPostRawData(RAW_DATA_PATH + "20220301.json").read())
+
+    yield races, scraper.normalize_race_record(races), scraper.normalize_race_record(races[:3])
+
+    scraper.cleanup()
+
+class TestParquetStore():
+    def test_partitioned_by_race_date(self, tables, tmp_path):
+        pytest.importorskip("pyarrow")
+
+        races, (df_race, df_prize, df_horse), _ = tables
+        store = RacingPostParquetStore(str(tmp_path / "parquet"))
+        store.write(df_race, df_prize, df_horse)
+
+        assert sorted(os.listdir(store.table_path("horse_record"))) == ["race_date=2022-02-21", "race_date=2022-03-01"]
+
+        df = store.read("horse_record", date(2022, 2, 21), date(2022, 2, 28))
+        assert set(df["race_date"]) == {date(2022, 2, 21)}
+        assert df.shape[0] == sum(len(race.horse_rank) for race in races if race.date == "21 Feb 2022")
+
+        # typed and dictionary encoded columns
+        assert str(df["horse_rpr"].dtype) == "Int64"
+        assert str(df["horse_jockey"].dtype) == "category"
+
+        assert store.read("race_info").shape[0] == len(races)
+        assert store.read("prize_info", from_date=date(2022, 3, 1)).shape[0] == df_prize.loc[[race.race_id for race in races[23:]]].shape[0]
+
+    def test_write_again(self, tables, tmp_path):
+        pytest.importorskip("pyarrow")
+
+        races, normalized, first_races = tables
+        store = RacingPostParquetStore(str(tmp_path / "parquet"))
+        store.write(*normalized)
+        store.write(*first_races)
+
+        df_race = store.read("race_info", columns=["race_id"])
+        assert sorted(df_race["race_id"]) == sorted(race.race_id for race in races)
+        assert store.read("horse_record").shape[0] == normalized[2].shape[0]
+
+    def test_missing_table(self, tmp_path):
+        assert RacingPostParquetStore(str(tmp_path)).read("race_info") is None
@@ -0,0 +1,152 @@
+import pytest
+from racing_post.racing_post_parser import RacingPostHtmlParser
+from racing_post.racing_post_record import RacingPostRaceRecord
+from html import escape
+import json
+import os
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "raw_data", "20220221.json")
+
+SVG = "<span><svg><title>Info</title></svg></span>"
+
+def element(tag, css_class, value, **attributes):
+    """
+    Render an element, value None means the element doesn't exist on the page
+    """
+    if value is None:
+        return ""
+
+    attrs = "".join(f' {k.replace("_", "-")}="{escape(v)}"' for k, v in attributes.items())
+    return f'<{tag} class="{css_class}"{attrs}>{escape(value).replace(" ", "&nbsp;") if value.strip() == "" else escape(value)}</{tag}>'
+
+def render_horse(horse):
+    """
+    Render the main row and comment row of a horse in the same structure as the horse table of the detail page
+    """
+    rank, draw = horse["horse_rank"], horse["horse_draw"]
+    draw_html = f'<sup class="rp-horseTable__pos__draw">({escape(draw)})</sup>' if draw is not None else ""
+    name = horse["horse_name"]
+    name_html = f'<a class="rp-horseTable__horse__name">{escape(name)}<span>Horse</span></a>' if name is not None else ""
+    silk = horse["horse_silk_url"] or "https://www.rp-assets.com/svg/0/0/0/0.svg"
+
+    humans = ""
+    for prefix, value in (("J:", horse["horse_jockey"]), ("T:", horse["horse_trainer"])):
+        if value is not None:
+            humans += f'<span class="rp-horseTable__human__wrapper" data-prefix="{prefix}"><a class="rp-horseTable__human__link">{escape(value)}</a></span>'
+
+    extra_weight = horse["horse_extra_weight"]
+    weight = element("span", "rp-horseTable__st", horse["horse_st"]) \
+        + element("span", "", horse["horse_lb"], data_test_selector="horse-weight-lb") \
+        + (f'<span class="rp-horseTable__extraData"><span>{escape(extra_weight)}</span></span>' if extra_weight is not None else "") \
+        + element("span", "rp-horseTable__headGear", horse["horse_head_gear"])
+
+    ratings = "".join(element("td", "", horse[key], data_ending=ending) \
+        for key, ending in (("horse_or", "OR"), ("horse_ts", "TS"), ("horse_rpr", "RPR"), ("horse_mr", "MR")))
+
+    main_row = f"""
+        <tr class="rp-horseTable__mainRow">
+            <td><div class="rp-horseTable__pos"><div>
+                <span class="rp-horseTable__pos__number">{escape(rank)} {draw_html}</span>
+                {element("span", "rp-horseTable__pos__length", horse["horse_length"])}
+            </div></div></td>
+            <td class="rp-horseTable__horseCell"><div class="rp-horseTable__horseContainer">
+                <img class="rp-horseTable__silk" src="{escape(silk)}">
+                <div class="rp-horseTable__info">
+                    {element("span", "rp-horseTable__saddleClothNo", horse["horse_no"])}
+                    {name_html}
+                    {element("span", "rp-horseTable__horse__country", horse["horse_country"])}
+                    {element("span", "rp-horseTable__horse__price", horse["horse_odd"])}
+                    <div class="rp-horseTable__human">{humans}</div>
+                </div>
+            </div></td>
+            {element("td", "rp-horseTable__spanNarrow_age", horse["horse_age"])}
+            <td class="rp-horseTable__wgt">{weight}</td>
+            {ratings}
+        </tr>"""
+
+    comment = horse["horse_comment"]
+    comment_row = f'<tr class="rp-horseTable__commentRow"><td>{escape(comment)}</td></tr>' if comment is not None else ""
+
+    return main_row + comment_row + '<tr class="rp-horseTable__separator"></tr>'
+
+def render_extra_info(line):
+    """
+    Render a line of race info, the double spaces and trailing space come from the svg icons on the page
+    """
+    line = escape(line).replace("  ", f" {SVG} ")
+    return f"<li>{line[:-1] + ' ' + SVG if line.endswith(' ') else line}</li>"
+
+def render_detail_page(race):
+    """
+    Render a detail page from a race captured by the Selenium path
+    """
+    prize = " ".join(f"{rank} {prize}" for rank, prize in race["prize"].items())
+    extra_info = "".join(render_extra_info(line) for line in race["race_extra_info"].split("\n"))
+
+    return f"""<html><head><title>{escape(race["title"])}</title></head><body>
+        <section class="rp-resultsWrapper__section">
+            <div class="rp-raceTimeCourseName">
+                <h1>
+                    {element("span", "rp-raceTimeCourseName__time", race["time"])}
+                    {element("a", "rp-raceTimeCourseName__name", race["course"])}
+                    {element("span", "rp-raceTimeCourseName__date", race["date"])}
+                </h1>
+                <div class="rp-raceTimeCourseName__info">
+                    {element("h2", "rp-raceTimeCourseName__title", race["title"])}
+                    <span class="rp-raceTimeCourseName__info_container">
+                        {element("span", "rp-raceTimeCourseName_ratingBandAndAgesAllowed", race["rating"])}
+                        {element("span", "rp-raceTimeCourseName_distance", race["distance"])}
+                        {element("span", "rp-raceTimeCourseName_class", race["race_class"])}
+                        {element("span", "rp-raceTimeCourseName_condition", race["condition"])}
+                        <div data-test-selector="text-prizeMoney">{escape(prize)}</div>
+                    </span>
+                </div>
+            </div>
+            <table class="rp-horseTable__table"><tbody>
+                {"".join(render_horse(horse) for horse in race["horse_rank"])}
+            </tbody></table>
+            <div class="rp-raceInfo"><ul>{extra_info}</ul></div>
+            {element("span", "rp-raceInfo__comments", race["race_info_comment"])}
+        </section>
+        <script>var title = "not part of the page text";</script>
+    </body></html>"""
+
+def load_races():
+    with open(RAW_DATA_FILE, "r") as f:
+        races = json.load(f)
+
+    # silks are added after the detail page is captured
+    for race in races:
+        for horse in race["horse_rank"]:
+            horse["horse_silk"] = None
+            horse["horse_silk_url_s3"] = None
+
+    return races
+
+class TestRacingPostHtmlParser():
+    @pytest.mark.parametrize("race", load_races(), ids=lambda race: race["race_id"])
+    def test_parity_with_selenium_capture(self, race):
+        expected = RacingPostRaceRecord.from_dict(race)
+
+        result = RacingPostHtmlParser.parse(render_detail_page(race), race["url"])
+
+        assert result == expected
+
+    def test_parse_file(self, tmp_path):
+        race = load_races()[-1]
+        page = tmp_path / "detail.html"
+        page.write_text(render_detail_page(race), encoding="utf-8")
+
+        result = RacingPostHtmlParser.parse_file(str(page), race["url"])
+
+        assert result.title == "Betway Novice Stakes (GBB Race)"
+        assert result.horse_rank[2].horse_name == "Red How "
+        assert result.horse_rank[2].horse_length == "½ [4¼]"
+
+    def test_relative_silk_url(self):
+        race = load_races()[-1]
+        page = render_detail_page(race).replace("https://www.rp-assets.com/", "/")
+
+        result = RacingPostHtmlParser.parse(page, race["url"])
+
+        assert result.horse_rank[0].horse_silk_url.startswith("https://www.racingpost.com/svg/")
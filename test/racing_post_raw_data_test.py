@@ -0,0 +1,68 @@
+from racing_post.racing_post_raw_data import RacingPostRawData
+from racing_post.racing_post_record import RacingPostRaceRecord
+import gzip
+import json
+import os
+import pytest
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "raw_data", "20220221.json")
+
+@pytest.fixture
+def races():
+    with open(RAW_DATA_FILE) as f:
+        return [RacingPostRaceRecord.from_dict(race) for race in json.load(f)]
+
+class TestRawData():
+    def test_read_json_array(self, races, monkeypatch):
+        # elements span several reads
+        monkeypatch.setattr(RacingPostRawData, "READ_SIZE", 100)
+
+        assert list(RacingPostRawData(RAW_DATA_FILE).read()) == races
+
+    def test_write_json_array(self, races, tmp_path):
+        file_path = str(tmp_path / "20220221.json")
+        RacingPostRawData(file_path).write(iter(races))
+
+        with open(file_path) as f:
+            content = f.read()
+
+        assert content == json.dumps([race.to_dictionary() for race in races], indent=4)
+
+        RacingPostRawData(file_path).write([])
+        assert list(RacingPostRawData(file_path).read()) == []
+
+    @pytest.mark.parametrize("file_name", ["20220221.jsonl", "20220221.jsonl.gz"])
+    def test_jsonl(self, races, tmp_path, monkeypatch, file_name):
+        monkeypatch.setattr(RacingPostRawData, "READ_SIZE", 100)
+
+        raw_data = RacingPostRawData(str(tmp_path / file_name))
+        assert raw_data.write(races) == len(races)
+
+        reader = raw_data.read()
+        assert next(reader) == races[0]
+        assert list(reader) == races[1:]
+
+        assert not os.path.exists(raw_data.file_path + ".tmp")
+
+    def test_gzip_is_reproducible(self, races, tmp_path):
+        first = RacingPostRawData(str(tmp_path / "a.jsonl.gz"))
+        second = RacingPostRawData(str(tmp_path / "b.jsonl.gz"))
+        first.write(races)
+        second.write(races)
+
+        with open(first.file_path, "rb") as f, open(second.file_path, "rb") as g:
+            assert f.read() == g.read()
+
+        with gzip.open(first.file_path, "rt", encoding="utf-8") as f:
+            assert len(f.readlines()) == len(races)
+
+    def test_zstd(self, races, tmp_path):
+        pytest.importorskip("zstandard")
+
+        raw_data = RacingPostRawData(str(tmp_path / "20220221.jsonl.zst"))
+        raw_data.write(races)
+
+        assert list(raw_data.read()) == races
+
+    def test_missing_file(self, tmp_path):
+        assert list(RacingPostRawData(str(tmp_path / "missing.jsonl")).read()) == []
@@ -0,0 +1,46 @@
+from racing_post.racing_post_record import RacingPostHorseRecord, RacingPostPrizeRecord, RacingPostRaceRecord
+import copy
+import json
+import os
+import pickle
+import pytest
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "raw_data", "20220221.json")
+
+@pytest.fixture
+def race_dicts():
+    with open(RAW_DATA_FILE) as f:
+        return json.load(f)
+
+class TestRecords():
+    def test_round_trip(self, race_dicts):
+        races = [RacingPostRaceRecord.from_dict(race) for race in race_dicts]
+
+        assert [race.to_dictionary() for race in races] == race_dicts
+        assert not hasattr(races[0], "__dict__")
+        assert not hasattr(races[0].horse_rank[0], "__dict__")
+        assert isinstance(races[0].prize, RacingPostPrizeRecord)
+
+    def test_tuple(self, race_dicts):
+        horse = RacingPostRaceRecord.from_dict(race_dicts[0]).horse_rank[0]
+        values = horse.to_tuple()
+
+        assert len(values) == len(RacingPostHorseRecord.FIELDS)
+        assert RacingPostHorseRecord.from_tuple(values) == horse
+
+    def test_equality(self, race_dicts):
+        race = RacingPostRaceRecord.from_dict(race_dicts[0])
+        other = copy.deepcopy(race)
+
+        assert race == other == pickle.loads(pickle.dumps(race))
+
+        other.horse_rank[-1].horse_rpr = "1"
+        assert race != other
+        assert race != race_dicts[0]
+
+    def test_unknown_keys(self):
+        horse = RacingPostHorseRecord.from_dict({"horse_name": "Barraza", "unknown": 1})
+
+        assert horse.horse_name == "Barraza"
+        assert horse.horse_rank is None
+        assert RacingPostRaceRecord().horse_rank == []
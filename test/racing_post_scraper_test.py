@@ -0,0 +1,251 @@
+from racing_post.racing_post_parser import RacingPostHtmlParser
+from racing_post.racing_post_record import Constant, RacingPostRaceRecord
+from racing_post.racing_post_scraper import RacingPostFastResult
+from racing_post.racing_post_silk_registry import SilkEntry
+from racing_post.racing_post_uploader import RacingPostUploader
+from scrapers.rate_limiter import RateLimiter
+from scrapers.webscraper import WebScrapper
+from collections import Counter
+import os
+
+RAW_DATA_PATH = "./raw_data/"
+RAW_DATA_FILE = "20220221.json"
+
+def no_driver(*args, **kwargs):
+    raise AssertionError("Chrome should not be started")
+
+class TestLazyInit():
+    def test_cache_jobs_without_browser(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(WebScrapper, "create_driver", staticmethod(no_driver))
+
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), RAW_DATA_PATH, RAW_DATA_FILE)
+        scraper.uploader.config_file = str(tmp_path / "missing.yaml")
+
+        scraper.restore_cache_result()
+        df_race, df_prize, df_horse = scraper.normalize_race_record()
+
+        assert df_race.shape[0] == len(scraper.races) == 23
+        assert df_horse.shape[0] > 0
+
+        # neither the DB nor S3 has been touched
+        assert scraper.uploader._engine is None
+        assert scraper.uploader._s3_client is None
+
+        scraper.stop_scraping()
+        scraper.cleanup()
+
+class TestCheckpoint():
+    def test_restore_checkpoint(self, tmp_path):
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), RAW_DATA_PATH, RAW_DATA_FILE)
+        scraper.restore_cache_result()
+        races = scraper.races[:3]
+
+        scraper.checkpoint.file_path = str(tmp_path / "checkpoint.jsonl")
+        for race in races:
+            scraper.checkpoint.append(race.to_dictionary())
+
+        assert scraper.restore_checkpoint() == races
+
+        scraper.cleanup()
+        assert scraper.restore_checkpoint() == []
+
+class CountingRateLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(sleep=lambda seconds: None)
+        self.waits = Counter()
+
+    def wait(self, url):
+        self.waits[url] += 1
+        return super().wait(url)
+
+class FakeResponse():
+    status_code = 200
+    text = "<html></html>"
+
+    def raise_for_status(self):
+        pass
+
+class FakeElement():
+    def __init__(self, url):
+        self.url = url
+
+    def get_attribute(self, name):
+        return self.url
+
+def fake_listing(scraper, monkeypatch, urls):
+    """
+    Listing page with a full result button for each URL
+    """
+    monkeypatch.setattr(scraper, "wait_for_xpath", lambda xpath: True)
+    monkeypatch.setattr(scraper, "move_to_element", lambda xpath: None)
+    monkeypatch.setattr(scraper, "get_web_elements", lambda parent, xpath: [FakeElement(url) for url in urls])
+    monkeypatch.setattr(scraper, "get_web_element", lambda parent=None, xpath=None: parent)
+
+class TestHttpEngine():
+    def test_one_wait_per_detail_page(self, tmp_path, monkeypatch):
+        urls = [f"https://www.racingpost.com/results/1/course/2022-02-21/{i}" for i in range(3)]
+        rate_limiter = CountingRateLimiter()
+
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), str(tmp_path) + "/", RAW_DATA_FILE, fetch_engine=Constant.FETCH_ENGINE_HTTP, rate_limiter=rate_limiter)
+
+        # the listing page is read from fake elements, the detail pages from a fake session
+        fake_listing(scraper, monkeypatch, urls)
+        monkeypatch.setattr(scraper.dedup, "find_races", lambda urls: {})
+        monkeypatch.setattr(scraper.http_fetcher.session, "get", lambda url, timeout: FakeResponse())
+        monkeypatch.setattr(RacingPostHtmlParser, "parse", staticmethod(lambda page_source, url: RacingPostRaceRecord(url=url)))
+
+        scraper.process_main_page()
+
+        assert [race.url for race in scraper.races] == list(reversed(urls))
+        assert rate_limiter.waits == Counter(urls)
+
+        scraper.checkpoint.remove()
+        scraper.http_fetcher.close()
+
+class TestStoredCheckpoint():
+    def test_stored_races_not_uploaded_again(self, tmp_path, monkeypatch):
+        from sqlalchemy import create_engine
+        import pandas as pd
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'rds.sqlite'}")
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=engine)
+        checkpoint_file = str(tmp_path / "checkpoint.jsonl")
+
+        # a run checkpointed every race and uploaded all but the first, then stopped before cleanup
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), RAW_DATA_PATH, RAW_DATA_FILE, is_testing=True, uploader=uploader)
+        scraper.dedup.cache_file = str(tmp_path / "dedup.sqlite")
+        scraper.checkpoint.file_path = checkpoint_file
+        scraper.restore_cache_result()
+
+        races = scraper.races
+        for race in races:
+            scraper.checkpoint.append(race.to_dictionary())
+
+        scraper.upload_rds(races[1:])
+        scraper.dedup.close()
+
+        rerun = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), str(tmp_path) + "/", RAW_DATA_FILE, is_testing=True, uploader=uploader, \
+            fetch_engine=Constant.FETCH_ENGINE_HTTP)
+        rerun.dedup.cache_file = str(tmp_path / "dedup.sqlite")
+        rerun.checkpoint.file_path = checkpoint_file
+
+        fake_listing(rerun, monkeypatch, [race.url for race in races])
+        monkeypatch.setattr(rerun.http_fetcher, "get", no_driver)
+
+        rerun.process_main_page()
+
+        # only the race missing in RDS is kept, nothing is fetched again
+        assert rerun.races == races[:1]
+
+        rerun.upload_rds()
+        rerun.cleanup()
+
+        assert pd.read_sql_table("race_info_test", engine).shape[0] == len(races)
+        assert rerun.restore_checkpoint() == []
+
+        uploader.close_connection()
+
+class TestReplacedRaces():
+    def test_upsert_replaced_races(self, tmp_path):
+        from sqlalchemy import create_engine
+        import pandas as pd
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'rds.sqlite'}")
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=engine)
+
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), RAW_DATA_PATH, RAW_DATA_FILE, is_testing=True, uploader=uploader)
+        scraper.dedup.cache_file = str(tmp_path / "dedup.sqlite")
+        scraper.restore_cache_result()
+        scraper.upload_rds()
+        scraper.cleanup()
+
+        races = scraper.races
+        horse_count = pd.read_sql_table("horse_record_test", engine).shape[0]
+
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path), RAW_DATA_PATH, RAW_DATA_FILE, force_capture=True, is_testing=True, uploader=uploader)
+        scraper.dedup.cache_file = str(tmp_path / "dedup.sqlite")
+        scraper.replaced_race_ids = {races[5].race_id}
+        scraper.upload_rds(races[:5])
+        scraper.cleanup()
+
+        df_race = pd.read_sql_table("race_info_test", engine)
+        df_horse = pd.read_sql_table("horse_record_test", engine)
+
+        # captured again once, the replaced race without new records is removed, the others are untouched
+        assert df_race.shape[0] == len(races) - 1
+        assert df_race["race_id"].is_unique
+        assert races[5].race_id not in set(df_race["race_id"])
+        assert df_horse.shape[0] == horse_count - len(races[5].horse_rank)
+
+        uploader.close_connection()
+
+class TestDownloadImages():
+    def test_same_silk_stored_once(self, tmp_path, monkeypatch):
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path / "images"), RAW_DATA_PATH, RAW_DATA_FILE)
+        scraper.restore_cache_result()
+        monkeypatch.setattr(scraper.silk_registry, "pull", lambda silk_urls: {})
+
+        # two different silk URLs have the same image
+        def download_all(jobs):
+            for url, path in jobs.values():
+                os.makedirs(path, exist_ok=True)
+                with open(path + url.split("/")[-1], "w") as f:
+                    f.write("<svg>same</svg>" if url.endswith(("0.svg", "1.svg")) else url)
+
+            return {key: url.split("/")[-1] for key, (url, path) in jobs.items()}
+
+        monkeypatch.setattr(scraper.image_downloader, "download_all", download_all)
+        scraper.download_images()
+
+        winners = [horse for race in scraper.races for horse in race.horse_rank if horse.horse_silk_url]
+        silk_urls = {horse.horse_silk_url for horse in winners}
+        stored = {horse.horse_silk for horse in winners}
+
+        assert all(os.path.exists(scraper.image_path + horse.horse_silk) for horse in winners)
+        same = [url for url in silk_urls if url.endswith(("0.svg", "1.svg"))]
+        assert len(stored) == len(silk_urls) - len(same) + 1
+        assert len(list((tmp_path / "images").rglob("*.svg"))) == len(stored)
+
+        scraper.cleanup()
+
+class TestUploadS3():
+    def test_failed_upload_keeps_silk_url(self, tmp_path, monkeypatch):
+        scraper = RacingPostFastResult("https://www.racingpost.com/results/2022-02-21/time-order/", \
+            str(tmp_path / "images"), RAW_DATA_PATH, RAW_DATA_FILE, force_capture=True)
+        scraper.restore_cache_result()
+        scraper.races = scraper.races[:1]
+        horses = [horse for horse in scraper.races[0].horse_rank if horse.horse_silk_url]
+
+        # only the first silk has a local file, the others were resolved from RDS by another machine
+        for i, horse in enumerate(horses):
+            scraper.silk_registry.put(horse.horse_silk_url, SilkEntry(horse.horse_silk, f"https://s3/{i}.svg", str(i)), sync=False)
+
+        os.makedirs(os.path.dirname(scraper.image_path + horses[0].horse_silk), exist_ok=True)
+        with open(scraper.image_path + horses[0].horse_silk, "w") as f:
+            f.write("<svg/>")
+
+        uploaded = {}
+        def upload_files_to_s3(files):
+            uploaded.update(files)
+            return {key: None for key in files}
+
+        monkeypatch.setattr(scraper.uploader, "upload_files_to_s3", upload_files_to_s3)
+        monkeypatch.setattr(scraper.uploader, "upload_to_s3", lambda *args, **kwargs: None)
+        monkeypatch.setattr(scraper.silk_registry, "sync", lambda: 0)
+        monkeypatch.setattr(scraper, "save_raw_data", lambda: None)
+
+        scraper.upload_s3()
+
+        # the failed upload and the silks without a file keep their URL in S3
+        assert uploaded == {horses[0].horse_silk: scraper.image_path + horses[0].horse_silk}
+        assert [horse.horse_silk_url_s3 for horse in horses] == [f"https://s3/{i}.svg" for i in range(len(horses))]
+
+        scraper.cleanup()
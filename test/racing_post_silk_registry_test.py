@@ -0,0 +1,72 @@
+from racing_post.racing_post_silk_registry import SilkRegistry, SilkEntry
+from sqlalchemy import create_engine
+import pandas as pd
+import hashlib
+
+class FakeUploader():
+    def __init__(self, engine):
+        self.engine = engine
+
+def create_engine_with_horses(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rds.sqlite'}")
+
+    pd.DataFrame({"race_id": ["r1", "r2"], "horse_silk_url": ["https://s/1.svg", None], \
+        "horse_silk": ["r1/1.svg", None], "horse_silk_url_s3": ["https://s3/r1/1.svg", None]}) \
+        .to_sql("horse_record", engine, index=False)
+
+    return engine
+
+class TestSilkRegistry():
+    def test_put_and_get(self, tmp_path):
+        registry = SilkRegistry(FakeUploader(None), registry_file=str(tmp_path / "images" / "registry.sqlite"), cache_size=2)
+
+        for i in range(3):
+            registry.put(f"https://s/{i}.svg", SilkEntry(f"r{i}/{i}.svg", None, f"hash{i}"))
+
+        # the oldest entry is evicted from memory but still in the local file
+        assert list(registry._memory) == ["https://s/1.svg", "https://s/2.svg"]
+        assert registry.get("https://s/0.svg") == SilkEntry("r0/0.svg", None, "hash0")
+        assert registry.get("https://s/9.svg") is None
+        registry.close()
+
+        reopened = SilkRegistry(FakeUploader(None), registry_file=registry.registry_file)
+        assert reopened.get("https://s/2.svg") == SilkEntry("r2/2.svg", None, "hash2")
+
+    def test_resolve_and_sync(self, tmp_path):
+        engine = create_engine_with_horses(tmp_path)
+        registry = SilkRegistry(FakeUploader(engine))
+
+        # silks stored before the registry are found in the horse records
+        assert registry.resolve(["https://s/1.svg", "https://s/2.svg", None]) == \
+            {"https://s/1.svg": SilkEntry("r1/1.svg", "https://s3/r1/1.svg", None)}
+
+        registry.put("https://s/2.svg", SilkEntry("r2/2.svg", "https://s3/r2/2.svg", "hash2"))
+        assert registry.sync() == 1
+        assert registry.sync() == 0
+
+        registry.put("https://s/2.svg", SilkEntry("r2/2.svg", "https://s3/r2/2.svg", "hash2b"))
+        assert registry.sync() == 1
+
+        # another machine with an empty local registry
+        other = SilkRegistry(FakeUploader(engine))
+        assert other.resolve(["https://s/2.svg"]) == {"https://s/2.svg": SilkEntry("r2/2.svg", "https://s3/r2/2.svg", "hash2b")}
+
+    def test_sync_retry(self, tmp_path):
+        class OfflineUploader():
+            @property
+            def engine(self):
+                raise OSError("network is unreachable")
+
+        registry = SilkRegistry(OfflineUploader())
+        registry.put("https://s/1.svg", SilkEntry("r1/1.svg"))
+
+        assert registry.resolve(["https://s/1.svg", "https://s/2.svg"]) == {"https://s/1.svg": SilkEntry("r1/1.svg")}
+        assert registry.sync() == 0
+        assert "https://s/1.svg" in registry._pending
+
+    def test_content_hash(self, tmp_path):
+        silk = tmp_path / "1.svg"
+        silk.write_bytes(b"<svg/>")
+
+        assert SilkRegistry.content_hash(str(silk)) == hashlib.sha256(b"<svg/>").hexdigest()
+        assert SilkRegistry.content_hash(str(tmp_path / "missing.svg")) is None
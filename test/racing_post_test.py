@@ -1,11 +1,13 @@
 import pytest
 from racing_post.racing_post_scraper import RacingPostFastResult, RacingPostRaceRecord, RacingPostPrizeRecord, RacingPostHorseRecord, Constant
+from racing_post.racing_post_parser import RacingPostHtmlParser
 import os
 import re
 from datetime import date, timedelta
 from selenium.webdriver.common.by import By
 import uuid
 import copy
+import json
 
 CORRECTNESS_TEST_URL = "https://www.racingpost.com/results/2022-02-21/time-order/"
 CORRECTNESS_RAW_DATA_FILE = "20220221.json"
@@ -365,6 +367,19 @@ class TestRacingPostResult():
         self.assert_part_value(first_race, "race_extra_info", "Tote win: £1.19 PL: £1.10 £3.70 Ex: £4.30 CSF: £4.16 Trifecta: £17.30")
         
 
+    def test_html_parser_parity(self, fast_result_correctness):
+        """
+        Test the lxml parser returns the same record as the Selenium path on a live detail page
+        """
+        with open(f"./raw_data/{CORRECTNESS_RAW_DATA_FILE}", "r") as f:
+            url = json.load(f)[-1]["url"]
+
+        fast_result_correctness.driver.get(url)
+        selenium_race = fast_result_correctness.process_detail_page(url, move_to_new_window=False)
+        parsed_race = RacingPostHtmlParser.parse(fast_result_correctness.driver.page_source, url)
+
+        assert parsed_race == selenium_race
+
     def test_format(self, fast_result_format):
         fast_result_format.process()
         race_list = fast_result_format.races
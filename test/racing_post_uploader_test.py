@@ -0,0 +1,285 @@
+from racing_post.racing_post_schema import RacingPostSchema
+from racing_post.racing_post_uploader import RacingPostUploader
+from botocore.exceptions import ClientError
+from collections import Counter
+from datetime import date
+import hashlib
+import json
+import os
+import shutil
+
+class FileSystemS3Client():
+    """
+    S3 stand-in storing the objects in a local folder
+    """
+    def __init__(self, root, region="eu-west-2"):
+        self.root = root
+        self.region = region
+        self.calls = Counter()
+
+    def path(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def get_bucket_location(self, Bucket):
+        self.calls["get_bucket_location"] += 1
+        return {"LocationConstraint": self.region}
+
+    def head_object(self, Bucket, Key):
+        self.calls["head_object"] += 1
+        path = self.path(Bucket, Key)
+
+        if not os.path.exists(path):
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+
+        with open(path, "rb") as f:
+            etag = hashlib.md5(f.read()).hexdigest()
+
+        with open(path + ".meta") as f:
+            metadata = json.load(f)
+
+        return {"ETag": f'"{etag}"', "Metadata": metadata}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None):
+        self.calls["upload_file"] += 1
+        path = self.path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+
+        with open(path + ".meta", "w") as f:
+            json.dump((ExtraArgs or {}).get("Metadata", {}), f)
+
+def create_files(tmp_path, count):
+    files = {}
+    for i in range(count):
+        path = tmp_path / "images" / f"{i:02d}.svg"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"<svg>{i}</svg>")
+        files[f"ab/{i:02d}.svg"] = str(path)
+
+    return files
+
+class TestUploadToS3():
+    def test_upload_files(self, tmp_path):
+        client = FileSystemS3Client(str(tmp_path / "s3"))
+        uploader = RacingPostUploader(s3_client=client, s3_bucket="racing", s3_workers=4)
+        files = create_files(tmp_path, 10)
+
+        urls = uploader.upload_files_to_s3(files)
+
+        assert urls["ab/03.svg"] == "https://s3-eu-west-2.amazonaws.com/racing/ab/03.svg"
+        assert open(client.path("racing", "ab/03.svg")).read() == "<svg>3</svg>"
+        assert client.calls["upload_file"] == 10
+        assert client.calls["get_bucket_location"] == 1
+
+        # only the changed file is uploaded again
+        with open(files["ab/05.svg"], "w") as f:
+            f.write("<svg>changed</svg>")
+
+        assert uploader.upload_files_to_s3(files) == urls
+        assert client.calls["upload_file"] == 11
+        assert uploader.s3_stats == {"uploaded": 11, "skipped": 9}
+        assert open(client.path("racing", "ab/05.svg")).read() == "<svg>changed</svg>"
+
+    def test_upload_error(self, tmp_path):
+        uploader = RacingPostUploader(s3_client=FileSystemS3Client(str(tmp_path / "s3")), s3_bucket="racing")
+        files = create_files(tmp_path, 2)
+        files["ab/missing.svg"] = str(tmp_path / "missing.svg")
+
+        urls = uploader.upload_files_to_s3(files)
+
+        assert urls["ab/missing.svg"] is None
+        assert urls["ab/01.svg"]
+
+    def test_us_east_1(self, tmp_path):
+        uploader = RacingPostUploader(s3_client=FileSystemS3Client(str(tmp_path), region=None), s3_bucket="racing")
+
+        assert uploader.get_s3_url("raw_data/20220221.json") == "https://s3-us-east-1.amazonaws.com/racing/raw_data/20220221.json"
+
+class TestUpsertPostgreSQL():
+    def test_replace_rows(self, tmp_path):
+        from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine
+        import pandas as pd
+        import pytest
+
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=create_engine("sqlite://"))
+
+        metadata = MetaData()
+        Table("prize_info", metadata, Column("race_id", Text, primary_key=True), Column("rank", Integer, primary_key=True), \
+            Column("prize", Integer))
+
+        df_prize = pd.DataFrame({"race_id": ["1", "1", "2", "3"], "rank": [1, 2, 1, 1], "prize": [10, 5, 20, 30]}) \
+            .set_index(["race_id", "rank"])
+
+        # a missing table is only created from the schema
+        with pytest.raises(ValueError):
+            uploader.upsert_postgreSQL({"prize_info": df_prize})
+
+        uploader.upsert_postgreSQL({"prize_info": df_prize}, metadata=metadata)
+
+        df_new = pd.DataFrame({"race_id": ["1"], "rank": [1], "prize": [11]}).set_index(["race_id", "rank"])
+        uploader.upsert_postgreSQL({"prize_info": df_new}, "race_id", {"3"})
+
+        df = pd.read_sql_table("prize_info", uploader.engine).sort_values(["race_id", "rank"])
+
+        assert df.values.tolist() == [["1", 1, 11], ["2", 1, 20]]
+        assert set(pd.read_sql_query("SELECT name FROM sqlite_master WHERE type = 'table'", uploader.engine)["name"]) == {"prize_info"}
+
+        uploader.close_connection()
+
+    def test_staging_types(self, tmp_path):
+        from sqlalchemy import create_engine, event
+        import pandas as pd
+
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=create_engine("sqlite://"))
+        schema = RacingPostSchema()
+
+        statements = []
+        event.listen(uploader.engine, "before_cursor_execute", \
+            lambda connection, cursor, statement, *args: statements.append(statement))
+
+        # no date in the batch, the staging column is still a date instead of the text inferred by pandas
+        df_race = uploader.conform_frame(schema.race_info, pd.DataFrame({"race_id": ["1"], "url": ["a"], "date": [None]}))
+        uploader.upsert_postgreSQL({schema.race_info.name: df_race}, metadata=schema.metadata)
+
+        staging = [statement for statement in statements if statement.lstrip().startswith("CREATE TEMPORARY TABLE")]
+        assert len(staging) == 1
+        assert "date DATE" in staging[0] and "race_id TEXT" in staging[0]
+        assert pd.read_sql_table("race_info", uploader.engine)["date"].isna().all()
+
+        uploader.close_connection()
+
+class FakeCopyCursor():
+    """
+    psycopg2 cursor recording the COPY statements
+    """
+    def __init__(self, copies):
+        self.copies = copies
+
+    def copy_expert(self, sql, file):
+        self.copies.append((sql, file.read()))
+
+    def close(self):
+        pass
+
+class TestBulkLoad():
+    def test_copy_rows(self):
+        from types import SimpleNamespace
+
+        copies = []
+        connection = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: FakeCopyCursor(copies)))
+        table = SimpleNamespace(name="horse_record", schema=None)
+
+        count = RacingPostUploader.copy_rows(table, connection, ["race_id", "horse_name", "comment"], \
+            iter([("1", 'Horse "A"', None), ("2", "Horse, B", "")]))
+
+        assert RacingPostUploader.insert_method(SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))) \
+            == RacingPostUploader.copy_rows
+        assert count == 2
+        assert copies == [('COPY "horse_record" ("race_id", "horse_name", "comment") FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', \
+            '1,"Horse ""A""",\\N\r\n2,"Horse, B",\r\n')]
+
+    def test_executemany_fallback(self, tmp_path):
+        from sqlalchemy import create_engine
+        import pandas as pd
+
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=create_engine("sqlite://"))
+        assert uploader.insert_method(uploader.engine) is None
+
+        df = pd.DataFrame({"race_id": [str(i) for i in range(5)], "prize": range(5)}).set_index("race_id")
+        uploader.upload_postgreSQL(df, "race_info", chunksize=2)
+
+        assert pd.read_sql_table("race_info", uploader.engine).shape[0] == 5
+
+        uploader.close_connection()
+
+class TestSchema():
+    def test_conform_frame(self):
+        import pandas as pd
+
+        schema = RacingPostSchema()
+        df = pd.DataFrame({"race_id": ["1", "1"], "horse_rank": ["1", "PU"], "horse_name": ["A", "B"], \
+            "horse_no": ["3.", "10."], "horse_or": ["95", "–"], "horse_lb": [None, "7"], "unknown": [1, 2]}) \
+            .set_index(["race_id", "horse_rank", "horse_name"])
+
+        df = RacingPostUploader.conform_frame(schema.horse_record, df)
+
+        assert list(df.index.names) == ["race_id", "horse_rank", "horse_name"]
+        assert list(df.columns) == ["horse_no", "horse_lb", "horse_or"]
+        assert df["horse_no"].tolist() == [3, 10]
+        assert df["horse_or"].isna().tolist() == [False, True]
+        assert df["horse_lb"].isna().tolist() == [True, False]
+
+        df_race = RacingPostUploader.conform_frame(schema.race_info, pd.DataFrame({"race_id": ["1"], "date": ["21 Feb 2022"]}))
+        assert df_race["date"].tolist() == [date(2022, 2, 21)]
+
+    def test_migrate_untyped_tables(self, tmp_path):
+        from sqlalchemy import create_engine, inspect
+        import pandas as pd
+
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=create_engine("sqlite://"))
+
+        # tables as written by DataFrame.to_sql, with a duplicated race
+        pd.DataFrame({"race_id": ["1", "2", "2"], "url": ["a", "b", "b"], "date": ["21 Feb 2022"] * 3}) \
+            .set_index("race_id").to_sql("race_info", uploader.engine)
+        pd.DataFrame({"race_id": ["1"], "rank": ["1st"], "prize": ["£100"]}) \
+            .set_index(["race_id", "rank"]).to_sql("prize_info", uploader.engine)
+
+        schema = RacingPostSchema()
+        uploader.migrate_schema(schema.metadata)
+
+        inspector = inspect(uploader.engine)
+        assert inspector.get_pk_constraint("race_info")["constrained_columns"] == ["race_id"]
+        assert inspector.get_pk_constraint("prize_info")["constrained_columns"] == ["race_id", "rank"]
+        assert inspector.get_pk_constraint("horse_record")["constrained_columns"] == ["race_id", "horse_rank", "horse_name"]
+        assert {index["name"] for index in inspector.get_indexes("race_info")} >= {"ix_race_info_url"}
+        assert {index["name"] for index in inspector.get_indexes("horse_record")} >= {"ix_horse_record_horse_silk_url"}
+        assert not inspector.has_table("race_info_legacy")
+
+        df_race = pd.read_sql_table("race_info", uploader.engine)
+        assert df_race["race_id"].tolist() == ["1", "2"]
+        assert df_race["date"].dt.date.tolist() == [date(2022, 2, 21)] * 2
+        assert pd.read_sql_table("prize_info", uploader.engine).shape[0] == 1
+
+        uploader.close_connection()
+
+    def test_migrate_with_foreign_keys(self, tmp_path):
+        from sqlalchemy import create_engine, event
+        import pandas as pd
+
+        engine = create_engine("sqlite://")
+        event.listen(engine, "connect", lambda connection, record: connection.execute("PRAGMA foreign_keys=ON"))
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=engine)
+
+        # rows without a key or whose race is missing, they would break the keys of the typed tables
+        pd.DataFrame({"race_id": ["1", "2", None], "url": ["a", "b", "c"]}).set_index("race_id").to_sql("race_info", engine)
+        pd.DataFrame({"race_id": ["1", "1", "9"], "rank": ["1st", None, "1st"], "prize": ["£100", "£50", "£10"]}) \
+            .set_index(["race_id", "rank"]).to_sql("prize_info", engine)
+        pd.DataFrame({"race_id": ["1", "2", "2", "9"], "horse_rank": ["1", "1", "2", "1"], "horse_name": ["A", "B", None, "C"]}) \
+            .set_index(["race_id", "horse_rank", "horse_name"]).to_sql("horse_record", engine)
+
+        uploader.migrate_schema(RacingPostSchema().metadata)
+
+        assert pd.read_sql_table("race_info", engine)["race_id"].tolist() == ["1", "2"]
+        assert pd.read_sql_table("prize_info", engine)[["race_id", "rank"]].values.tolist() == [["1", "1st"]]
+        assert pd.read_sql_table("horse_record", engine)["horse_name"].tolist() == ["A", "B"]
+
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA foreign_key_check").fetchall() == []
+
+        uploader.close_connection()
+
+    def test_add_missing_columns(self, tmp_path):
+        from sqlalchemy import Column, MetaData, Table, Text, create_engine, inspect
+
+        uploader = RacingPostUploader(str(tmp_path / "missing.yaml"), engine=create_engine("sqlite://"))
+
+        metadata = MetaData()
+        Table("race_info", metadata, Column("race_id", Text, primary_key=True))
+        metadata.create_all(uploader.engine)
+
+        uploader.migrate_schema(RacingPostSchema().metadata)
+
+        columns = {column["name"] for column in inspect(uploader.engine).get_columns("race_info")}
+        assert columns == {column.name for column in RacingPostSchema().race_info.columns}
+
+        uploader.close_connection()
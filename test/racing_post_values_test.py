@@ -0,0 +1,65 @@
+from racing_post.racing_post_normalizer import RacingPostNormalizer
+from racing_post.racing_post_raw_data import RacingPostRawData
+from racing_post.racing_post_schema import RacingPostSchema
+from racing_post.racing_post_uploader import RacingPostUploader
+from racing_post.racing_post_values import RacingPostValueParser
+import os
+import pandas as pd
+import pytest
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "raw_data", "20220221.json")
+
+class TestValueParser():
+    def test_prize(self):
+        minor, currency = RacingPostValueParser.parse_prize(pd.Series(["£44,444.44", "€6,195", "£870", None, ""]))
+
+        assert minor.tolist() == [4444444, 619500, 87000, pd.NA, pd.NA]
+        assert currency.tolist() == ["GBP", "EUR", "GBP", pd.NA, pd.NA]
+
+    def test_odds(self):
+        decimal, probability = RacingPostValueParser.parse_odds(pd.Series(["207/10", "9/4F", "Evs", "EvensF", "–", None]))
+
+        assert decimal.tolist()[:4] == pytest.approx([21.7, 3.25, 2.0, 2.0])
+        assert probability.tolist()[:4] == pytest.approx([1 / 21.7, 1 / 3.25, 0.5, 0.5])
+        assert decimal.isna().tolist() == [False] * 4 + [True] * 2
+
+    def test_distance(self):
+        yards = RacingPostValueParser.parse_distance(pd.Series(["(2m3f66yds)", "(6f110yds)", "1m", "6f", "(1m5yds)", "", None]))
+
+        assert yards.tolist() == [4246, 1430, 1760, 1320, 1765, pd.NA, pd.NA]
+
+    def test_weight_and_ratings(self):
+        weight = RacingPostValueParser.parse_weight(pd.Series(["9", "11", None]), pd.Series(["13", "0", "4"]))
+        ratings = RacingPostValueParser.parse_integer(pd.Series(["112", "–", None]))
+
+        assert weight.tolist() == [139, 154, pd.NA]
+        assert ratings.tolist() == [112, pd.NA, pd.NA]
+
+    def test_parse(self):
+        frames = RacingPostNormalizer.normalize(RacingPostRawData(RAW_DATA_FILE).read())
+        df_race, df_prize, df_horse = RacingPostValueParser.parse(*frames)
+
+        # the text columns are kept and the input frames are left untouched
+        assert df_race["distance"].equals(frames[0]["distance"])
+        assert "distance_yards" not in frames[0].columns
+        assert not pd.api.types.is_numeric_dtype(frames[2]["horse_or"])
+
+        assert df_race["distance_yards"].notna().all()
+        assert df_prize["prize_minor"].notna().all() and set(df_prize["prize_currency"]) <= {"GBP", "EUR"}
+        assert df_horse["horse_weight_lb"].between(100, 200).all()
+        assert df_horse["horse_implied_probability"].dropna().between(0, 1).all()
+        assert str(df_horse["horse_or"].dtype) == "Int64"
+
+    def test_schema(self):
+        df_race, df_prize, df_horse = RacingPostValueParser.parse(*RacingPostNormalizer.normalize(RacingPostRawData(RAW_DATA_FILE).read()))
+        schema = RacingPostSchema()
+
+        # every parsed column has a typed column in the schema, and the values are kept by conform_frame
+        horses = RacingPostUploader.conform_frame(schema.horse_record, df_horse)
+        prizes = RacingPostUploader.conform_frame(schema.prize_info, df_prize)
+
+        assert list(horses.columns) == [column.name for column in schema.horse_record.columns if column.name in horses.columns]
+        assert set(df_horse.columns) <= set(horses.columns) and set(df_prize.columns) <= set(prizes.columns)
+        assert horses["horse_weight_lb"].equals(df_horse["horse_weight_lb"])
+        assert prizes["prize_minor"].equals(df_prize["prize_minor"])
+        assert "distance_yards" in RacingPostUploader.conform_frame(schema.race_info, df_race).columns
@@ -0,0 +1,82 @@
+from scrapers.rate_limiter import RateLimiter
+
+class FakeClock():
+    """
+    Clock that only moves when the limiter sleeps
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def create_limiter(**kwargs):
+    clock = FakeClock()
+    return RateLimiter(sleep=clock.sleep, clock=clock, **kwargs), clock
+
+class TestRateLimiter():
+    def test_host_key(self):
+        assert RateLimiter.host_key("https://www.racingpost.com/results/2022-02-21/time-order/") == "racingpost.com"
+        assert RateLimiter.host_key("https://www.rp-assets.com/svg/2/3/5/190532.svg") == "rp-assets.com"
+        assert RateLimiter.host_key("www.racingpost.com") == "racingpost.com"
+        assert RateLimiter.host_key("http://127.0.0.1:8000/page") == "127.0.0.1"
+
+    def test_rate_per_host(self):
+        limiter, clock = create_limiter(rates={"racingpost.com": 0.5, "rp-assets.com": 4})
+
+        for _ in range(3):
+            limiter.wait("https://www.racingpost.com/results/1")
+
+        # the first request is free, then one request every 2 seconds
+        assert clock.now == 4.0
+
+        for _ in range(5):
+            limiter.wait("https://www.rp-assets.com/svg/1.svg")
+
+        assert limiter.throttled_seconds("racingpost.com") == 4.0
+        assert limiter.throttled_seconds("rp-assets.com") == 1.0
+        assert limiter.throttled_seconds() == 5.0
+        assert "racingpost.com: 3 requests, 4.0s throttled" in limiter.summary()
+
+    def test_tokens_refill(self):
+        limiter, clock = create_limiter(default_rate=1, burst=2)
+
+        assert limiter.wait("https://a.com/1") == 0
+        assert limiter.wait("https://a.com/2") == 0
+
+        clock.now += 10
+        assert limiter.wait("https://a.com/3") == 0
+        assert limiter.wait("https://a.com/4") == 0
+        assert limiter.wait("https://a.com/5") == 1.0
+
+    def test_jitter(self):
+        limiter, clock = create_limiter(default_rate=1, jitter=0.5)
+
+        for _ in range(10):
+            waited = limiter.wait("https://a.com/")
+            assert 0 <= waited <= 1.5
+
+    def test_backoff_and_recover(self):
+        limiter, clock = create_limiter(default_rate=1, max_backoff=4, slow_seconds=5)
+        limiter.wait("https://a.com/")
+
+        limiter.report("https://a.com/", status_code=429)
+        assert limiter.wait("https://a.com/") == 2.0
+
+        limiter.report("https://a.com/", status_code=503)
+        limiter.report("https://a.com/", elapsed=30)
+        assert limiter.buckets["a.com"].backoff == 4
+
+        limiter.report("https://a.com/", status_code=200, elapsed=0.5)
+        assert limiter.buckets["a.com"].backoff == 3
+
+        for _ in range(10):
+            limiter.report("https://a.com/", status_code=200)
+
+        assert limiter.buckets["a.com"].backoff == 1
+
+        # other hosts are not affected
+        assert limiter.wait("https://b.com/") == 0
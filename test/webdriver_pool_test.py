@@ -0,0 +1,145 @@
+import pytest
+from scrapers.webdriver_pool import WebDriverPool
+from selenium.common.exceptions import WebDriverException
+import threading
+import time
+
+class FakeDriver():
+    def __init__(self):
+        self.quitted = False
+        self.pages = []
+
+    def quit(self):
+        self.quitted = True
+
+class ConcurrencyProbe():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def load(self, driver, url):
+        host = url.split("/")[2]
+
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+
+        time.sleep(0.02)
+        driver.pages.append(url)
+
+        with self.lock:
+            self.active[host] -= 1
+
+        return url.split("/")[-1]
+
+class TestWebDriverPool():
+    def test_map_keeps_order(self):
+        drivers = []
+        def factory():
+            drivers.append(FakeDriver())
+            return drivers[-1]
+
+        pool = WebDriverPool(3, factory)
+        urls = [f"https://www.racingpost.com/results/{i}" for i in range(10)]
+
+        assert pool.map(ConcurrencyProbe().load, urls) == [str(i) for i in range(10)]
+        assert 1 <= len(drivers) <= 3
+        assert sum(len(driver.pages) for driver in drivers) == 10
+
+        pool.quit()
+        assert all(driver.quitted for driver in drivers)
+
+    def test_max_per_host(self):
+        probe = ConcurrencyProbe()
+        pool = WebDriverPool(4, FakeDriver, max_per_host=1)
+        urls = [f"https://{host}/{i}" for i in range(4) for host in ("a.com", "b.com")]
+
+        pool.map(probe.load, urls)
+
+        assert probe.peak == {"a.com": 1, "b.com": 1}
+
+    def test_initializer_and_errors(self):
+        initialized = []
+        pool = WebDriverPool(2, FakeDriver, initializer=initialized.append)
+
+        def load(driver, url):
+            if url.endswith("bad"):
+                raise WebDriverException("page crashed")
+            return url
+
+        assert pool.map(load, ["https://a.com/1", "https://a.com/bad", "https://a.com/3"]) == ["https://a.com/1", None, "https://a.com/3"]
+
+        # the driver which raised is quit and replaced, it's never given another page
+        crashed = [driver for driver in initialized if driver not in pool.drivers]
+        assert len(crashed) == 1 and crashed[0].quitted
+        assert "https://a.com/bad" not in sum((driver.pages for driver in pool.drivers), [])
+        assert all(driver in initialized for driver in pool.drivers)
+        assert len(pool.drivers) <= 2
+
+    def test_crashed_driver_replaced(self):
+        pool = WebDriverPool(1, FakeDriver)
+        drivers = []
+
+        def load(driver, url):
+            drivers.append(driver)
+            if url.endswith("crash"):
+                raise WebDriverException("chrome not reachable")
+            return url
+
+        assert pool.map(load, ["https://a.com/crash", "https://a.com/2", "https://a.com/3"]) == [None, "https://a.com/2", "https://a.com/3"]
+        assert drivers[0].quitted and drivers[0] not in pool.drivers
+        assert drivers[1] is drivers[2] and pool.drivers == [drivers[1]]
+
+    def test_failed_driver_creation(self):
+        attempts = []
+        def factory():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise WebDriverException("session not created")
+            return FakeDriver()
+
+        pool = WebDriverPool(1, factory)
+
+        # the failed page returns None, the released slot is used by the next pages
+        assert pool.map(lambda driver, url: url, ["https://a.com/1", "https://a.com/2", "https://a.com/3"]) == [None, "https://a.com/2", "https://a.com/3"]
+        assert len(attempts) == 2 and len(pool.drivers) == 1
+
+    def test_failed_initializer(self):
+        drivers = []
+        def factory():
+            drivers.append(FakeDriver())
+            return drivers[-1]
+
+        def initializer(driver):
+            if len(drivers) == 1:
+                raise RuntimeError("cookie page not loaded")
+
+        pool = WebDriverPool(1, factory, initializer=initializer)
+
+        assert pool.map(lambda driver, url: url, ["https://a.com/1", "https://a.com/2"]) == [None, "https://a.com/2"]
+        assert drivers[0].quitted and pool.drivers == [drivers[1]]
+
+    def test_drivers_created_concurrently(self):
+        pool = WebDriverPool(3, FakeDriver)
+        started = threading.Barrier(3, timeout=5)
+
+        def factory():
+            # every driver waits for the others, it only passes if they are created at the same time
+            started.wait()
+            return FakeDriver()
+
+        pool.driver_factory = factory
+        urls = [f"https://a.com/{i}" for i in range(3)]
+
+        def load(driver, url):
+            # the host limit is looked up while drivers are still starting
+            time.sleep(0.05)
+            return url
+
+        assert pool.map(load, urls) == urls
+        assert len(pool.drivers) == 3
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            WebDriverPool(0, FakeDriver)
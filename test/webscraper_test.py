@@ -0,0 +1,117 @@
+from scrapers.webscraper import WebScrapper, WAIT_FOR_XPATH_SCRIPT, BLOCKED_URL_PATTERNS
+from scrapers import webscraper
+from selenium.common.exceptions import JavascriptException
+from scrapers.command_counter import WebDriverCommandCounter
+
+class FakeDriver():
+    def __init__(self, script_result=True, elements=None):
+        self.script_result = script_result
+        self.elements = elements or []
+        self.script_timeout = None
+        self.scripts = []
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_async_script(self, script, *args):
+        self.scripts.append((script, args))
+        if isinstance(self.script_result, Exception):
+            raise self.script_result
+        return self.script_result
+
+    def find_element(self, by, value):
+        return self.elements[0]
+
+    def find_elements(self, by, value):
+        return self.elements
+
+def create_scraper(driver):
+    scraper = WebScrapper.__new__(WebScrapper)
+    scraper.driver = driver
+    scraper.poll_frequency = 0.01
+
+    return scraper
+
+class TestWaitForXpath():
+    def test_found(self):
+        driver = FakeDriver(True)
+
+        assert create_scraper(driver).wait_for_xpath("//section", 5)
+        assert driver.scripts == [(WAIT_FOR_XPATH_SCRIPT, ("//section", 5000))]
+        assert driver.script_timeout == 6
+
+    def test_timeout(self):
+        assert not create_scraper(FakeDriver(False)).wait_for_xpath("//section", 1)
+
+    def test_fallback_to_polling(self):
+        other_driver = FakeDriver(JavascriptException("document unloaded"), elements=["section"])
+        scraper = create_scraper(FakeDriver(True))
+
+        assert scraper.wait_for_xpath("//section", 1, driver=other_driver)
+        assert scraper.driver.scripts == []
+
+class FakeChrome():
+    def __init__(self, options):
+        self.options = options
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append((cmd, params))
+
+class TestCreateDriver():
+    def test_default(self, monkeypatch):
+        monkeypatch.setattr(webscraper.webdriver, "Chrome", FakeChrome)
+
+        driver = WebScrapper.create_driver("eager")
+
+        assert driver.options.page_load_strategy == "eager"
+        assert "--headless" in driver.options.arguments
+        assert "--disable-remote-fonts" not in driver.options.arguments
+        assert driver.cdp_commands == []
+
+    def test_block_resources(self, monkeypatch):
+        monkeypatch.setattr(webscraper.webdriver, "Chrome", FakeChrome)
+
+        driver = WebScrapper.create_driver(blocked_resources=BLOCKED_URL_PATTERNS, blocked_domains=["doubleclick.net"])
+
+        assert "--disable-remote-fonts" in driver.options.arguments
+        assert "--host-resolver-rules=MAP doubleclick.net ~NOTFOUND, MAP *.doubleclick.net ~NOTFOUND" in driver.options.arguments
+        assert driver.options.experimental_options["prefs"] == {"profile.managed_default_content_settings.images": 2}
+
+        blocked_urls = dict(driver.cdp_commands)["Network.setBlockedURLs"]["urls"]
+        assert "*.woff2" in blocked_urls
+        assert "*://*.doubleclick.net/*" in blocked_urls
+
+class CountedDriver():
+    def __init__(self):
+        self.executed = []
+        self.quitted = False
+
+    def execute(self, driver_command, params=None):
+        self.executed.append(driver_command)
+
+    def quit(self):
+        self.quitted = True
+
+class TestSharedDriver():
+    def test_counter_attached_once(self):
+        driver = CountedDriver()
+        counter = WebDriverCommandCounter.attach(driver)
+
+        assert WebDriverCommandCounter.attach(driver) is counter
+
+        driver.execute("getTitle")
+        assert counter.total == 1
+        assert driver.executed == ["getTitle"]
+
+    def test_shared_driver_not_quitted(self):
+        driver = CountedDriver()
+        scraper = create_scraper(driver)
+        scraper.owns_driver = False
+
+        scraper.stop_scraping()
+        assert not driver.quitted
+
+        scraper.owns_driver = True
+        scraper.stop_scraping()
+        assert driver.quitted